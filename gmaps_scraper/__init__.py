@@ -0,0 +1,50 @@
+# --- Google Maps Scraper Package ---
+# links.py collects the Google Maps URLs for a search, details.py extracts the
+# detailed information from those URLs. The public functions are re-exported
+# here lazily so that `import gmaps_scraper` does not pull in selenium/pandas.
+
+import importlib
+
+__version__ = "0.2.0"
+
+_lazy_exports = {
+    'setup_driver': 'driver',
+    'close_driver': 'driver',
+    'navigate_search_and_collect_all_item_links': 'links',
+    'run_full_extraction_process': 'links',
+    'parse_card_text': 'links',
+    'scrape_detail_page_from_link': 'details',
+    'run_scrape_from_links': 'details',
+    'detail_columns': 'details',
+    'create_driver_watchdog': 'watchdog',
+    'run_refresh_from_previous': 'refresh',
+    'ensure_environment': 'env',
+    'open_broker': 'work_queue',
+    'reextract_archive': 'archive',
+    'parse_detail_html': 'archive',
+    'run_links_worker': 'work_queue',
+    'run_details_worker': 'work_queue',
+    'coordinates_from_url': 'geo',
+    'build_spatial_index': 'geo',
+    'filter_links_to_polygon': 'geo',
+    'load_polygon': 'geo',
+    'assign_duplicate_clusters': 'dedupe',
+    'normalize_fields': 'normalize',
+    'iter_place_reviews': 'reviews',
+    'run_review_harvest': 'reviews',
+    'run_autotune': 'autotune',
+    'StandInServer': 'standin',
+    'PlaceRecord': 'records',
+    'RecordBuffer': 'records',
+}
+
+__all__ = sorted(_lazy_exports)
+
+
+def __getattr__(name):
+    module_name = _lazy_exports.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
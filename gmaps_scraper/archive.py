@@ -0,0 +1,230 @@
+# --- Raw Page Snapshot Archive and Offline Re-extraction ---
+# When Google renames a class (DUwDvf, Io6YTe, ...) every field silently turns
+# into "N/A" and the only fix used to be a full re-scrape. With a snapshot
+# directory set, the detail scraper also stores the HTML of the place panel
+# (div[role="main"], a fraction of the full page source):
+#   <archive>/objects/ab/abcdef....html.gz   compressed, named by the SHA-256 of
+#                                           the HTML, so identical panels are
+#                                           stored once (zstd if the zstandard
+#                                           package is installed, else gzip)
+#   <archive>/index.jsonl                   one line per capture: url, snapshot, captured_at
+# reextract_archive() re-runs the field parsers over the latest snapshot of
+# every URL in a process pool, with no browser at all. It needs lxml and
+# cssselect.
+
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .details import detail_columns, value_from_aria_label
+from .geo import coordinate_fields
+from .selector_registry import get_selector_registry, use_selector_registry, load_selector_overrides
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+snapshot_column = 'Snapshot'
+
+# Returns the place panel's HTML; falls back to the whole document
+panel_html_script = """
+var panel = document.querySelector('div[role="main"]') || document.documentElement;
+return panel.outerHTML;
+"""
+
+
+def snapshot_path(archive_dir, snapshot_hash, extension):
+    return os.path.join(archive_dir, "objects", snapshot_hash[:2], f"{snapshot_hash}.html.{extension}")
+
+
+def compress_html(html_bytes):
+    if zstandard is not None:
+        return zstandard.ZstdCompressor(level=9).compress(html_bytes), "zst"
+    return gzip.compress(html_bytes, compresslevel=6), "gz"
+
+
+# Stores the HTML (once per distinct content) and returns its hash
+def store_snapshot(archive_dir, html):
+    html_bytes = html.encode('utf-8')
+    snapshot_hash = hashlib.sha256(html_bytes).hexdigest()
+    for extension in ["zst", "gz"]:
+        if os.path.exists(snapshot_path(archive_dir, snapshot_hash, extension)):
+            return snapshot_hash # Already archived (deduplicated)
+
+    compressed, extension = compress_html(html_bytes)
+    path = snapshot_path(archive_dir, snapshot_hash, extension)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write to a temp file and rename, so a concurrent reader never sees a partial snapshot
+    file_descriptor, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(file_descriptor, "wb") as temp_file:
+        temp_file.write(compressed)
+    os.replace(temp_path, path)
+    return snapshot_hash
+
+
+def load_snapshot(archive_dir, snapshot_hash):
+    zst_path = snapshot_path(archive_dir, snapshot_hash, "zst")
+    if os.path.exists(zst_path):
+        if zstandard is None:
+            raise RuntimeError("Snapshot is zstd-compressed but the zstandard package is not installed")
+        with open(zst_path, "rb") as snapshot_file:
+            return zstandard.ZstdDecompressor().decompress(snapshot_file.read()).decode('utf-8')
+    with open(snapshot_path(archive_dir, snapshot_hash, "gz"), "rb") as snapshot_file:
+        return gzip.decompress(snapshot_file.read()).decode('utf-8')
+
+
+def record_snapshot(archive_dir, url, snapshot_hash):
+    os.makedirs(archive_dir, exist_ok=True)
+    line = json.dumps({'url': url, 'snapshot': snapshot_hash,
+                       'captured_at': time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())})
+    # One short append per capture; O_APPEND keeps lines from concurrent workers intact
+    with open(os.path.join(archive_dir, "index.jsonl"), "a", encoding='utf-8') as index_file:
+        index_file.write(line + "\n")
+
+
+# Captures the current page's place panel into the archive; returns the snapshot hash (or None)
+def capture_snapshot(driver, archive_dir, url):
+    try:
+        html = driver.execute_script(panel_html_script)
+        if not html:
+            return None
+        snapshot_hash = store_snapshot(archive_dir, html)
+        record_snapshot(archive_dir, url, snapshot_hash)
+        return snapshot_hash
+    except Exception as e:
+        print(f"Warning: Could not archive snapshot for {url}: {e}")
+        return None
+
+
+# Latest snapshot per URL, in first-seen URL order
+def latest_snapshots(archive_dir):
+    latest = {}
+    with open(os.path.join(archive_dir, "index.jsonl"), encoding='utf-8') as index_file:
+        for line in index_file:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue # Torn line from a crashed writer
+            latest[entry['url']] = entry['snapshot']
+    return latest
+
+
+# CSS -> XPath translation is the slow part of cssselect, so each selector is compiled once per process
+compiled_selectors = {}
+
+
+def compiled_selector(selector):
+    compiled = compiled_selectors.get(selector)
+    if compiled is None:
+        from lxml.cssselect import CSSSelector
+        compiled = compiled_selectors[selector] = CSSSelector(selector)
+    return compiled
+
+
+def element_text(element):
+    return " ".join(element.text_content().split())
+
+
+# --- Field parsers over archived HTML (same registry fallbacks and rules as scrape_detail_page_from_link) ---
+def parse_detail_html(html, detail_url, registry=None):
+    import lxml.html
+
+    registry = registry or get_selector_registry()
+
+    data_item = {
+        'Google Maps Link': detail_url,
+        'Name': 'N/A',
+        'Address': 'N/A',
+        'Category': 'N/A',
+        'Phone': 'N/A',
+        'Website': 'N/A',
+        **coordinate_fields(detail_url),
+        'Scrape Status': 'Success',
+    }
+    document = lxml.html.fromstring(html)
+
+    def first(field, within=None):
+        return registry.find_in_document(within if within is not None else document, field, compiled_selector)
+
+    name_element = first('detail_name')
+    if name_element is not None:
+        data_item['Name'] = element_text(name_element) or 'N/A'
+
+    category_element = first('detail_category')
+    if category_element is not None:
+        data_item['Category'] = element_text(category_element) or 'N/A'
+
+    for field, registry_field, prefix in [('Address', 'detail_address', "Address:"), ('Phone', 'detail_phone', "Phone:")]:
+        container = first(registry_field)
+        if container is None:
+            continue
+        value = value_from_aria_label(container.get('aria-label'), prefix)
+        if value == "N/A":
+            nested_element = first('detail_nested_value', within=container)
+            if nested_element is not None and element_text(nested_element):
+                value = element_text(nested_element)
+        data_item[field] = value
+
+    website_element = first('detail_website')
+    if website_element is not None and website_element.get('href'):
+        data_item['Website'] = website_element.get('href')
+
+    if data_item['Name'] == 'N/A':
+        data_item['Scrape Status'] = "Major Failure: Name Not Found"
+    return data_item
+
+
+# Process pool initializer: the workers need the same selector overrides as the parent
+def init_reextract_worker(selector_overrides):
+    if selector_overrides:
+        use_selector_registry(load_selector_overrides(selector_overrides))
+
+
+# Process pool worker: load, decompress and parse one snapshot
+def reextract_snapshot(task):
+    archive_dir, url, snapshot_hash = task
+    try:
+        data_item = parse_detail_html(load_snapshot(archive_dir, snapshot_hash), url)
+    except Exception as e:
+        data_item = {'Google Maps Link': url, 'Scrape Status': f"Offline Re-extraction Failed: {e}"}
+    data_item[snapshot_column] = snapshot_hash
+    return data_item
+
+
+# --- Main Process: Re-extract Every Archived Place Without a Browser ---
+# selector_overrides is an optional JSON overrides file for the selector registry (e.g. after a class rename).
+def reextract_archive(archive_dir, csv_filename="Maps_reextracted_details.csv", processes=None, chunksize=64,
+                      selector_overrides=None):
+    import pandas as pd
+
+    print(f"--- Starting Offline Re-extraction from '{archive_dir}' ---")
+    try:
+        snapshots = latest_snapshots(archive_dir)
+    except FileNotFoundError:
+        print(f"--- ERROR: No snapshot index found in '{archive_dir}' ---")
+        return pd.DataFrame(columns=detail_columns + [snapshot_column])
+
+    tasks = [(archive_dir, url, snapshot_hash) for url, snapshot_hash in snapshots.items()]
+    start_time = time.time()
+    with ProcessPoolExecutor(max_workers=processes, initializer=init_reextract_worker,
+                             initargs=(selector_overrides,)) as executor:
+        records = list(executor.map(reextract_snapshot, tasks, chunksize=chunksize))
+    elapsed = max(time.time() - start_time, 1e-9)
+    print(f"Re-extracted {len(records)} places in {elapsed:.1f}s ({len(records) / elapsed:.0f} pages/s).")
+
+    df = pd.DataFrame(records, columns=detail_columns + [snapshot_column])
+    if csv_filename and not df.empty:
+        try:
+            df.to_csv(csv_filename, index=False)
+            print(f"Data successfully saved to '{csv_filename}'")
+        except Exception as e:
+            print(f"--- ERROR: Failed to save re-extracted data to CSV ---")
+            print(f"Error details: {e}")
+    print("\nScrape Status Summary:")
+    print(df['Scrape Status'].value_counts())
+    return df
@@ -0,0 +1,366 @@
+# --- Worker-Count Autotuner ---
+# Ramps the number of parallel browsers (and, for the details stage, the
+# prefetch depth) and measures each setting with the real scraping code:
+#   pages/s   successful places (details) or collected links (links) per second
+#             between the first page start and the last page end, so browser
+#             start-up is not counted
+#   p50/p95   per-page (details) or per-query (links) latency
+#   RSS       peak total resident memory of all the trial's worker processes and
+#             their browsers
+#   errors    share of pages that failed or hit a block page
+# Each worker runs in its own process, as queue workers do, and like queue workers
+# the trial's processes share one set of rate limiter buckets (a scratch SQLite
+# store), so more workers do not simply mean a higher total request rate. Against
+# the stand-in the buckets start at what the stand-in can serve (max_place_rps,
+# otherwise no limit): a short trial from the limiters' cautious starting rate
+# would measure the limiter warming up, not the browsers. The ramp stops once
+# more workers stop paying off (less than min_gain more throughput) or break the
+# error / latency / memory limits. The chosen setting is the knee of the curve:
+# the cheapest acceptable setting within min_gain of the best throughput.
+# By default the trials run against a local stand-in server (standin.py), so
+# they need no network and never touch Google; pass live links or a live query
+# to measure the real thing instead.
+# apply=True saves the result to autotune_settings_path, where the CLI picks it
+# up as the default --prefetch-depth and as `queue worker --processes auto`.
+
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+
+autotune_settings_path = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")),
+    "gmaps_scraper", "autotune.json")
+
+autotune_stages = ['details', 'links']
+standin_unlimited_rate = 1000.0 # Pages/s: no limit in practice
+
+
+def load_tuned_settings():
+    try:
+        with open(autotune_settings_path) as settings_file:
+            return json.load(settings_file)
+    except Exception:
+        return {}
+
+
+def save_tuned_settings(settings):
+    try:
+        os.makedirs(os.path.dirname(autotune_settings_path), exist_ok=True)
+        with open(autotune_settings_path, "w") as settings_file:
+            json.dump(settings, settings_file, indent=2)
+        print(f"Tuned settings saved to '{autotune_settings_path}'")
+    except Exception as e:
+        print(f"Warning: Could not save the tuned settings: {e}")
+
+
+# The tuned value for a stage ('details' / 'links'), or default when there is none
+def tuned_setting(stage, name, default=None):
+    return load_tuned_settings().get(stage, {}).get('recommended', {}).get(name, default)
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def available_memory_mb():
+    try:
+        import psutil
+        return psutil.virtual_memory().available / (1024 * 1024)
+    except ImportError:
+        pass
+    try:
+        with open('/proc/meminfo') as meminfo_file:
+            for line in meminfo_file:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) / 1024
+    except Exception:
+        pass
+    return None
+
+
+# --- Trial Worker (runs in its own process) ---
+# items are detail URLs (details stage) or search queries (links stage). Sends one result dict back.
+# rate_limits: per-target limiter settings (see standin_rate_limits)
+def run_trial_worker(stage, items, prefetch_depth, driver_config, base_url, result_queue, rate_store_path=None,
+                     rate_limits=None, quiet=True):
+    import contextlib
+    import io
+
+    result = {'pages': [], 'first_start': None, 'last_end': None, 'startup_seconds': None, 'failed_start': False}
+    output = io.StringIO() if quiet else None
+    with contextlib.redirect_stdout(output) if quiet else contextlib.nullcontext():
+        from .driver import configure_driver, setup_driver, close_driver
+
+        configure_driver(**driver_config)
+        if rate_limits:
+            from .rate_limit import configure_rate_limits
+            configure_rate_limits(rate_limits)
+        if rate_store_path:
+            from .rate_limit import use_shared_rate_store
+            from .work_queue import SQLiteTaskBroker
+            use_shared_rate_store(SQLiteTaskBroker(rate_store_path))
+        started = time.time()
+        driver, display = setup_driver()
+        result['startup_seconds'] = time.time() - started
+        if not driver:
+            result['failed_start'] = True
+        else:
+            try:
+                if stage == 'details':
+                    run_details_trial(driver, items, prefetch_depth, result)
+                else:
+                    run_links_trial(driver, items, base_url, result)
+            except Exception as e:
+                result['error'] = str(e)
+            finally:
+                close_driver(driver, display, step_label="Autotune trial cleanup")
+    result_queue.put(result)
+
+
+def run_details_trial(driver, urls, prefetch_depth, result):
+    from .details import scrape_detail_page_from_link
+    from .prefetch import TabPrefetcher
+
+    prefetcher = TabPrefetcher(driver, depth=prefetch_depth) if prefetch_depth > 0 else None
+    for url_index, url in enumerate(urls):
+        page_start = time.time()
+        prefetched = None
+        fill_prefetch = None
+        if prefetcher:
+            prefetched = prefetcher.take(url)
+            upcoming_urls = urls[url_index + 1:url_index + 1 + prefetch_depth]
+            fill_prefetch = lambda: prefetcher.fill(upcoming_urls)
+        record = scrape_detail_page_from_link(driver, url, prefetched=prefetched, on_loaded=fill_prefetch)
+        page_end = time.time()
+        result['first_start'] = result['first_start'] or page_start
+        result['last_end'] = page_end
+        result['pages'].append((page_end - page_start, record.get('Scrape Status') == 'Success', 1))
+    if prefetcher:
+        prefetcher.close()
+
+
+def run_links_trial(driver, queries, base_url, result):
+    from .links import navigate_search_and_collect_all_item_links
+
+    for query in queries:
+        query_start = time.time()
+        links = navigate_search_and_collect_all_item_links(driver, query=query, base_url=base_url)
+        query_end = time.time()
+        result['first_start'] = result['first_start'] or query_start
+        result['last_end'] = query_end
+        result['pages'].append((query_end - query_start, bool(links), len(links)))
+
+
+# --- One Trial: `workers` processes sharing the items ---
+def run_trial(stage, workers, prefetch_depth, items, driver_config, base_url=None, timeout_seconds=600,
+              sample_seconds=1.0, rate_limits=None):
+    from .watchdog import get_process_tree_rss_mb
+
+    context = multiprocessing.get_context('spawn') # No inherited threads or browser handles
+    result_queue = context.Queue()
+    rate_store_dir = tempfile.TemporaryDirectory(prefix="gmaps_autotune_")
+    rate_store_path = os.path.join(rate_store_dir.name, "rate_buckets.db")
+    processes = [context.Process(target=run_trial_worker,
+                                 args=(stage, items[worker_index::workers], prefetch_depth, driver_config, base_url,
+                                       result_queue, rate_store_path, rate_limits))
+                 for worker_index in range(workers)]
+    for process in processes:
+        process.start()
+
+    # Peak memory of all worker processes and their browsers while the trial runs
+    peak_rss_mb = 0.0
+    deadline = time.time() + timeout_seconds
+    while any(process.is_alive() for process in processes) and time.time() < deadline:
+        peak_rss_mb = max(peak_rss_mb, sum(get_process_tree_rss_mb(process.pid) for process in processes
+                                           if process.is_alive()))
+        time.sleep(sample_seconds)
+
+    results = []
+    for _ in processes:
+        try:
+            results.append(result_queue.get(timeout=max(1.0, deadline - time.time())))
+        except Exception:
+            break # A worker died or timed out without reporting
+    for process in processes:
+        process.join(timeout=5)
+        if process.is_alive():
+            process.terminate()
+    rate_store_dir.cleanup()
+
+    pages = [page for worker_result in results for page in worker_result['pages']]
+    latencies = [seconds for seconds, _, _ in pages]
+    succeeded = sum(1 for _, ok, _ in pages if ok)
+    produced = sum(count for _, ok, count in pages if ok)
+    expected = len(items)
+    starts = [worker_result['first_start'] for worker_result in results if worker_result['first_start']]
+    ends = [worker_result['last_end'] for worker_result in results if worker_result['last_end']]
+    window_seconds = max(ends) - min(starts) if starts and ends else 0.0
+    return {
+        'stage': stage,
+        'workers': workers,
+        'prefetch_depth': prefetch_depth,
+        'items': expected,
+        'succeeded': succeeded,
+        # Unreported items (crashed or timed-out workers) count as errors too
+        'error_rate': round(1 - succeeded / expected, 4) if expected else 1.0,
+        'pages_per_sec': round(produced / window_seconds, 3) if window_seconds > 0 else 0.0,
+        'p50_seconds': round(percentile(latencies, 0.50), 2),
+        'p95_seconds': round(percentile(latencies, 0.95), 2),
+        'peak_rss_mb': round(peak_rss_mb),
+        'startup_seconds': round(percentile([worker_result['startup_seconds'] for worker_result in results
+                                             if worker_result['startup_seconds'] is not None], 0.5), 2),
+        'failed_starts': sum(1 for worker_result in results if worker_result['failed_start']) + workers - len(results),
+    }
+
+
+def format_trial(trial):
+    return (f"workers={trial['workers']:<3} prefetch={trial['prefetch_depth']}  {trial['pages_per_sec']:>7.2f} pages/s  "
+            f"p50 {trial['p50_seconds']:>5.2f}s  p95 {trial['p95_seconds']:>5.2f}s  RSS {trial['peak_rss_mb']:>6}MB  "
+            f"errors {trial['error_rate']:.1%}")
+
+
+# Why a trial is not acceptable, or None
+def trial_rejection(trial, baseline_p95, max_error_rate, max_latency_factor, max_rss_mb):
+    if trial['error_rate'] > max_error_rate:
+        return f"error rate {trial['error_rate']:.1%} > {max_error_rate:.1%}"
+    if baseline_p95 and trial['p95_seconds'] > baseline_p95 * max_latency_factor:
+        return f"p95 {trial['p95_seconds']:.2f}s > {max_latency_factor}x baseline {baseline_p95:.2f}s"
+    if max_rss_mb and trial['peak_rss_mb'] > max_rss_mb:
+        return f"RSS {trial['peak_rss_mb']}MB > {max_rss_mb:.0f}MB"
+    return None
+
+
+# Knee of the curve: the cheapest acceptable trial (fewest workers, then shallowest prefetch)
+# whose throughput is within min_gain of the best acceptable throughput
+def choose_knee(trials, max_error_rate=0.02, max_latency_factor=2.5, max_rss_mb=None, min_gain=0.1):
+    baseline_p95 = trials[0]['p95_seconds'] if trials else 0.0
+    acceptable = [trial for trial in trials
+                  if trial_rejection(trial, baseline_p95, max_error_rate, max_latency_factor, max_rss_mb) is None
+                  and trial['pages_per_sec'] > 0]
+    if not acceptable:
+        return None
+    best_throughput = max(trial['pages_per_sec'] for trial in acceptable)
+    for trial in sorted(acceptable, key=lambda trial: (trial['workers'], trial['prefetch_depth'])):
+        if trial['pages_per_sec'] >= best_throughput * (1 - min_gain):
+            return trial
+    return None
+
+
+# Limiter settings for trials against the stand-in: every target starts at full rate and
+# concurrency (prefetch tabs need free slots too), and place loads at max_place_rps if set
+def standin_rate_limits(standin):
+    from .rate_limit import maps_place_target, maps_search_target, maps_reviews_target
+
+    unlimited = {'initial_rate': standin_unlimited_rate, 'max_rate': standin_unlimited_rate,
+                 'initial_concurrency': 8, 'max_concurrency': 8}
+    rate_limits = {target: dict(unlimited) for target in [maps_place_target, maps_search_target, maps_reviews_target]}
+    if standin.max_place_rps:
+        rate_limits[maps_place_target].update(initial_rate=standin.max_place_rps, max_rate=standin.max_place_rps)
+    return rate_limits
+
+
+def default_worker_counts(max_workers):
+    counts = []
+    workers = 1
+    while workers < max_workers:
+        counts.append(workers)
+        workers *= 2
+    counts.append(max_workers)
+    return counts
+
+
+# --- Main Process: Ramp, Measure, Recommend (and optionally Apply) ---
+# stage: 'details' or 'links'. live_items: detail URLs / search queries to measure live instead of the stand-in.
+# Returns {'trials': [...], 'recommended': {...} or None}.
+def run_autotune(stage="details", max_workers=None, prefetch_depths=(0, 1, 2), items_per_worker=8, live_items=None,
+             driver_config=None, max_error_rate=0.02, max_latency_factor=2.5, max_rss_mb=None, min_gain=0.1,
+             standin_options=None, trial_timeout_seconds=600, apply=False):
+    print(f"--- Step 0: Autotuning the {stage} stage ---")
+    if stage not in autotune_stages:
+        raise ValueError(f"Unknown stage '{stage}' (expected one of {', '.join(autotune_stages)})")
+    cpu_count = os.cpu_count() or 1
+    max_workers = max_workers or max(2, cpu_count * 2)
+    if max_rss_mb is None:
+        memory_mb = available_memory_mb()
+        max_rss_mb = memory_mb * 0.8 if memory_mb else None
+    driver_config = driver_config or {}
+    depths = list(prefetch_depths) if stage == 'details' else [0] # Prefetching only applies to detail pages
+    print(f"Machine: {cpu_count} CPU(s), memory budget {f'{max_rss_mb:.0f}MB' if max_rss_mb else 'unknown'}; "
+          f"workers up to {max_workers}, prefetch depths {depths}")
+
+    standin = None
+    base_url = None
+    rate_limits = None
+    if not live_items:
+        from .standin import StandInServer
+        standin = StandInServer(**(standin_options or {})).start()
+        base_url = standin.maps_url
+        rate_limits = standin_rate_limits(standin)
+
+    trials = []
+    previous_best = 0.0
+    try:
+        for workers in default_worker_counts(max_workers):
+            item_count = items_per_worker * workers
+            if live_items:
+                items = list(live_items)[:item_count]
+            elif stage == 'details':
+                items = standin.place_urls(item_count)
+            else:
+                items = [f"stand-in query {index}" for index in range(max(1, item_count // 4))]
+
+            print(f"\n--- Trials with {workers} worker(s), {len(items)} {'places' if stage == 'details' else 'queries'} ---")
+            round_trials = []
+            for depth in depths:
+                trial = run_trial(stage, workers, depth, items, driver_config, base_url=base_url,
+                                  timeout_seconds=trial_timeout_seconds, rate_limits=rate_limits)
+                round_trials.append(trial)
+                trials.append(trial)
+                rejection = trial_rejection(trial, trials[0]['p95_seconds'], max_error_rate, max_latency_factor,
+                                            max_rss_mb)
+                print(format_trial(trial) + (f"  (rejected: {rejection})" if rejection else ""))
+                if trial['failed_starts'] == workers:
+                    print("--- No browser could be started; stopping the autotune. ---")
+                    break
+
+            accepted = [trial for trial in round_trials
+                        if trial_rejection(trial, trials[0]['p95_seconds'], max_error_rate, max_latency_factor,
+                                           max_rss_mb) is None]
+            if not accepted:
+                print(f"Every setting with {workers} worker(s) broke a limit. Stopping the ramp.")
+                break
+            round_best = max(trial['pages_per_sec'] for trial in accepted)
+            if previous_best and round_best < previous_best * (1 + min_gain):
+                print(f"{workers} worker(s) add less than {min_gain:.0%} throughput. Stopping the ramp.")
+                break
+            previous_best = max(previous_best, round_best)
+            if live_items and len(live_items) < items_per_worker * workers * 2:
+                print("Not enough live items for a larger trial. Stopping the ramp.")
+                break
+    finally:
+        if standin:
+            standin.stop()
+
+    knee = choose_knee(trials, max_error_rate=max_error_rate, max_latency_factor=max_latency_factor,
+                       max_rss_mb=max_rss_mb, min_gain=min_gain)
+    print(f"\n--- Autotune Result ({stage}) ---")
+    if knee is None:
+        print("No acceptable setting was found; keep a single worker without prefetching.")
+        recommended = None
+    else:
+        recommended = {'workers': knee['workers'], 'prefetch_depth': knee['prefetch_depth']}
+        print(f"Recommended: {knee['workers']} worker(s), prefetch depth {knee['prefetch_depth']} "
+              f"({knee['pages_per_sec']:.2f} pages/s, p95 {knee['p95_seconds']:.2f}s, RSS {knee['peak_rss_mb']}MB)")
+
+    outcome = {'trials': trials, 'recommended': recommended, 'target': 'live' if live_items else 'stand-in',
+               'cpu_count': cpu_count, 'tuned_at': time.strftime("%Y-%m-%dT%H:%M:%S")}
+    if apply and recommended:
+        settings = load_tuned_settings()
+        settings[stage] = outcome
+        save_tuned_settings(settings)
+    return outcome
@@ -0,0 +1,528 @@
+# --- Command-Line Entry Point ---
+# python -m gmaps_scraper links "doctor clinics in New York, NY 10036" --output links.csv
+# python -m gmaps_scraper details --input links.csv --output details.csv
+# python -m gmaps_scraper pipeline "doctor clinics in New York, NY 10036" --output details.csv
+# python -m gmaps_scraper pipeline "pizza in ny 10016" --limit 20 --min-rating 4.5 --category pizza   (sampling)
+# python -m gmaps_scraper refresh --previous details.csv --links-csv links.csv --budget 200
+# python -m gmaps_scraper queue enqueue --broker sqlite:///sweep.db --queries "hotels in ny 10016" "hotels in ny 10036"
+# python -m gmaps_scraper queue worker --broker sqlite:///sweep.db --stage details   (on as many nodes as needed)
+# python -m gmaps_scraper queue export --broker sqlite:///sweep.db --output details.csv
+# python -m gmaps_scraper reextract --archive snapshots/ --output details.csv   (no browser needed)
+# python -m gmaps_scraper geo --input details.csv --near 40.7489,-73.9833 --radius-km 1 --output nearby.csv
+# python -m gmaps_scraper dedupe --input details.csv --output details_clustered.csv
+# python -m gmaps_scraper normalize --input details.csv --output details_normalized.csv
+# python -m gmaps_scraper warm-profile ~/.cache/gmaps_scraper/profile-template
+# python -m gmaps_scraper --profile-template ~/.cache/gmaps_scraper/profile-template details --input links.csv
+# python -m gmaps_scraper autotune --stage details --apply   (offline, against a local stand-in server)
+# python -m gmaps_scraper queue worker --broker sqlite:///sweep.db --processes auto
+# python -m gmaps_scraper reviews --input links.csv --output reviews.csv --max-reviews 200 --since 2024-01-01
+# Heavy modules are only imported by the subcommand that runs.
+
+import argparse
+import csv
+import sys
+from datetime import datetime
+
+from .env import ensure_environment
+
+link_column_names = ['Business Link', 'Google Maps Link']
+card_column_names = ['Card Name', 'Card Rating', 'Card Reviews', 'Card Category', 'Card Fingerprint']
+# Subcommands that never start a browser (of the queue actions, only `worker` does)
+browserless_commands = ['queue', 'reextract', 'geo', 'dedupe', 'normalize', 'standin']
+
+
+# Reads links from a CSV written by the links stage (or a details CSV), or from a
+# plain text file with one URL per line. Returns (links, card data dict).
+def read_links_file(path):
+    links = []
+    card_data = {}
+    with open(path, newline='', encoding='utf-8') as links_file:
+        first_line = links_file.readline()
+        links_file.seek(0)
+        header = next(csv.reader([first_line]), [])
+        link_column = next((name for name in link_column_names if name in header), None)
+        if link_column is None:
+            links = [line.strip() for line in links_file if line.strip()]
+        else:
+            for row in csv.DictReader(links_file):
+                link = row.get(link_column)
+                links.append(link)
+                if link and all(name in row for name in card_column_names):
+                    card_data[link] = {name: row[name] for name in card_column_names}
+    return links, card_data
+
+
+def add_details_arguments(parser):
+    parser.add_argument("--output", default="Maps_scraped_details_from_links.csv", help="Details CSV to write")
+    parser.add_argument("--no-watchdog", action="store_true", help="Disable the browser memory/latency watchdog")
+    parser.add_argument("--max-rss-mb", type=int, default=2500, help="Recycle the browser above this RSS")
+    parser.add_argument("--max-pages-per-driver", type=int, default=None, help="Recycle the browser after N pages")
+    parser.add_argument("--snapshot-dir", default=None, help="Archive each detail panel's HTML here for offline re-extraction")
+    parser.add_argument("--prefetch-depth", type=int, default=None,
+                        help="Background tabs loading the next detail pages while the current one is read "
+                             "(default: the autotuned depth, else 0)")
+    parser.add_argument("--normalize", action="store_true",
+                        help="Add E.164 phone, street/city/state/ZIP and website domain columns")
+    add_polygon_arguments(parser)
+    add_limit_arguments(parser)
+
+
+def add_limit_arguments(parser):
+    parser.add_argument("--limit", type=int, default=None,
+                        help="Stop after this many qualifying places (first N of the feed)")
+    parser.add_argument("--min-rating", type=float, default=None, help="Only places whose feed card rating is at least this")
+    parser.add_argument("--category", action="append", default=None,
+                        help="Only places whose feed card category contains this text (repeatable)")
+
+
+# Card predicate from --min-rating / --category (None without them)
+def card_predicate_from_args(args):
+    from .links import build_card_predicate
+    return build_card_predicate(min_rating=args.min_rating, categories=args.category)
+
+
+def add_polygon_arguments(parser):
+    parser.add_argument("--polygon", default=None,
+                        help="Only fetch details of places inside this area (GeoJSON, or one 'lat,lng' per line)")
+    parser.add_argument("--keep-unlocated", action="store_true",
+                        help="With --polygon, also keep links that carry no coordinates")
+
+
+# Applies --polygon to a list of links (no-op without it)
+def filter_links_by_args(links, args):
+    if not args.polygon:
+        return links
+    from .geo import load_polygon, filter_links_to_polygon
+    return filter_links_to_polygon(links, load_polygon(args.polygon), keep_unlocated=args.keep_unlocated)
+
+
+def parse_float_list(text, count, name):
+    values = [float(value) for value in text.split(',')]
+    if len(values) != count:
+        raise argparse.ArgumentTypeError(f"{name} needs {count} comma-separated numbers")
+    return values
+
+
+# queue worker --processes N|auto. 'auto' takes the count autotuned for the queue this worker serves
+# (--stage links -> `autotune --stage links`), never another stage's.
+def worker_processes_from_args(args):
+    if args.processes != "auto":
+        return int(args.processes)
+    from .autotune import tuned_setting
+    from .work_queue import links_queue, details_queue
+    tuned_stage = links_queue if args.stage == "links" else details_queue
+    worker_processes = tuned_setting(tuned_stage, 'workers')
+    if worker_processes is None:
+        print(f"No autotuned worker count for the {tuned_stage} stage (run `autotune --stage {tuned_stage} --apply`); "
+              f"using 1 process.")
+        return 1
+    print(f"Using the autotuned {tuned_stage} worker count: {worker_processes} process(es).")
+    return worker_processes
+
+
+# pipeline --limit N collects up to N x this many links, the spares backfill failed detail pages
+pipeline_limit_headroom = 2
+
+
+# --prefetch-depth, falling back to the depth saved by `autotune --apply`
+def prefetch_depth_from_args(args):
+    if args.prefetch_depth is not None:
+        return args.prefetch_depth
+    from .autotune import tuned_setting
+    return tuned_setting('details', 'prefetch_depth', 0)
+
+
+def build_watchdog(args):
+    if args.no_watchdog:
+        return None
+    from .watchdog import create_driver_watchdog
+    return create_driver_watchdog(max_rss_mb=args.max_rss_mb, max_pages_per_driver=args.max_pages_per_driver)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="gmaps-scraper", description="Google Maps business link and detail scraper")
+    parser.add_argument("--install-missing", action="store_true",
+                        help="Install Chrome / Python packages if the environment check fails")
+    parser.add_argument("--recheck-env", action="store_true", help="Ignore the cached environment check")
+    parser.add_argument("--skip-env-check", action="store_true", help="Do not check the environment at all")
+    parser.add_argument("--selectors", default=None,
+                        help="JSON selector overrides: {\"version\": ..., \"fields\": {field: [selectors...]}}")
+    parser.add_argument("--profile-dir", default=None,
+                        help="Persistent Chrome profile (warm cache, consent cookies); one per concurrent worker")
+    parser.add_argument("--profile-template", default=None,
+                        help="Warmed Chrome profile that every browser starts from as a copy-on-write clone")
+    parser.add_argument("--display-mode", choices=["auto", "headless", "xvfb"], default="auto",
+                        help="auto: new headless Chrome, Xvfb only if that fails; xvfb: always a virtual display")
+    parser.add_argument("--proxy", default=None,
+                        help="Route every browser through this proxy (host:port or scheme://host:port); "
+                             "it gets its own rate limiter next to the per-target ones")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    links_parser = subparsers.add_parser("links", help="Search Google Maps and collect business links")
+    links_parser.add_argument("query", help="Search query, e.g. 'hotels in ny 10016'")
+    links_parser.add_argument("--output", default="Maps_business_links.csv", help="Links CSV to write")
+    links_parser.add_argument("--no-card-data", action="store_true",
+                              help="Do not export the feed card fields (name, rating, category) next to each link")
+    add_limit_arguments(links_parser)
+
+    details_parser = subparsers.add_parser("details", help="Scrape business details from collected links")
+    details_parser.add_argument("--input", required=True, help="Links CSV from the links stage, or one URL per line")
+    add_details_arguments(details_parser)
+
+    pipeline_parser = subparsers.add_parser("pipeline", help="Collect links for a query, then scrape their details")
+    pipeline_parser.add_argument("query", help="Search query, e.g. 'hotels in ny 10016'")
+    pipeline_parser.add_argument("--links-output", default="Maps_business_links.csv", help="Links CSV to write")
+    add_details_arguments(pipeline_parser)
+
+    refresh_parser = subparsers.add_parser("refresh", help="Re-scrape only stale or changed places of a previous run")
+    refresh_parser.add_argument("--previous", required=True, help="Details CSV from an earlier details/refresh run")
+    refresh_parser.add_argument("--links-csv", default=None, help="Fresh links CSV with card data from the links stage")
+    refresh_parser.add_argument("--budget", type=int, default=None, help="Maximum number of places to re-fetch")
+    refresh_parser.add_argument("--max-age-days", type=float, default=30, help="Re-fetch places older than this")
+    refresh_parser.add_argument("--output", default="Maps_scraped_details_refreshed.csv", help="Refreshed CSV to write")
+
+    queue_parser = subparsers.add_parser("queue", help="Share a sweep between many workers through a task queue")
+    queue_parser.add_argument("action", choices=["enqueue", "worker", "export", "stats"])
+    queue_parser.add_argument("--broker", required=True, help="sqlite:///path/to/sweep.db or redis://host:6379/0")
+    queue_parser.add_argument("--queries", nargs="*", default=[], help="Search queries to enqueue for the links stage")
+    queue_parser.add_argument("--links-csv", default=None, help="Links CSV (or one URL per line) to enqueue for the details stage")
+    queue_parser.add_argument("--stage", choices=["links", "details"], default="details", help="Stage a worker serves")
+    queue_parser.add_argument("--worker-id", default=None, help="Worker name (default: host-pid-random)")
+    queue_parser.add_argument("--batch-size", type=int, default=5, help="Details tasks leased at once")
+    queue_parser.add_argument("--lease-seconds", type=int, default=300, help="Lease length before a task is reclaimed")
+    queue_parser.add_argument("--max-attempts", type=int, default=3, help="Attempts before a task is marked failed")
+    queue_parser.add_argument("--idle-timeout", type=int, default=30, help="Worker exits after this long with no tasks")
+    queue_parser.add_argument("--output", default="Maps_scraped_details_from_queue.csv", help="CSV written by export")
+    queue_parser.add_argument("--no-watchdog", action="store_true", help="Disable the browser memory/latency watchdog")
+    queue_parser.add_argument("--max-rss-mb", type=int, default=2500, help="Recycle the browser above this RSS")
+    queue_parser.add_argument("--max-pages-per-driver", type=int, default=None, help="Recycle the browser after N pages")
+    queue_parser.add_argument("--snapshot-dir", default=None, help="Archive each detail panel's HTML here for offline re-extraction")
+    queue_parser.add_argument("--prefetch-depth", type=int, default=None,
+                              help="Background tabs loading the next links of a leased batch (default: autotuned, else 0)")
+    queue_parser.add_argument("--processes", default="1",
+                              help="With worker: run this many worker processes ('auto' = the autotuned count)")
+    queue_parser.add_argument("--normalize", action="store_true",
+                              help="With export: add E.164 phone, street/city/state/ZIP and website domain columns")
+    add_polygon_arguments(queue_parser)
+
+    reextract_parser = subparsers.add_parser("reextract", help="Re-run the field parsers over archived snapshots")
+    reextract_parser.add_argument("--archive", required=True, help="Snapshot directory written with --snapshot-dir")
+    reextract_parser.add_argument("--output", default="Maps_reextracted_details.csv", help="CSV to write")
+    reextract_parser.add_argument("--processes", type=int, default=None, help="Parser processes (default: CPU count)")
+
+    geo_parser = subparsers.add_parser("geo", help="Radius, bounding-box, nearest or polygon queries over stored results")
+    geo_parser.add_argument("--input", required=True, help="Links or details CSV")
+    geo_parser.add_argument("--near", type=lambda text: parse_float_list(text, 2, "--near"), default=None,
+                            help="Query point as lat,lng (with --radius-km or --nearest)")
+    geo_parser.add_argument("--radius-km", type=float, default=None, help="Places within this distance of --near")
+    geo_parser.add_argument("--nearest", type=int, default=None, help="The N places closest to --near")
+    geo_parser.add_argument("--bbox", type=lambda text: parse_float_list(text, 4, "--bbox"), default=None,
+                            help="Places inside south,west,north,east")
+    geo_parser.add_argument("--polygon", default=None, help="Places inside this area (GeoJSON, or one 'lat,lng' per line)")
+    geo_parser.add_argument("--cell-degrees", type=float, default=0.01, help="Grid cell size of the spatial index")
+    geo_parser.add_argument("--output", default=None, help="CSV to write the matching rows to (default: print them)")
+
+    dedupe_parser = subparsers.add_parser("dedupe", help="Give rows that are the same business a shared Cluster ID")
+    dedupe_parser.add_argument("--input", required=True, help="Details CSV")
+    dedupe_parser.add_argument("--output", default="Maps_scraped_details_clustered.csv", help="CSV to write")
+    dedupe_parser.add_argument("--threshold", type=float, default=0.6, help="Match score (0-1) needed to merge two rows")
+    dedupe_parser.add_argument("--max-block-size", type=int, default=200,
+                               help="Skip blocking keys shared by more rows than this (chains, call centres)")
+    dedupe_parser.add_argument("--collapse", action="store_true", help="Keep only the most complete row per cluster")
+
+    normalize_parser = subparsers.add_parser("normalize", help="Add E.164 phone, address part and website domain columns")
+    normalize_parser.add_argument("--input", required=True, help="Details CSV")
+    normalize_parser.add_argument("--output", default="Maps_scraped_details_normalized.csv", help="CSV to write")
+    normalize_parser.add_argument("--country-code", default="1", help="Calling code for numbers written without one")
+
+    warm_parser = subparsers.add_parser("warm-profile", help="Create or refresh a warmed Chrome profile for --profile-*")
+    warm_parser.add_argument("directory", help="Profile directory to warm (created if missing)")
+    warm_parser.add_argument("--query", default="restaurants", help="Search run once to fill the HTTP cache")
+
+    reviews_parser = subparsers.add_parser("reviews", help="Stream the reviews of collected places to a CSV")
+    reviews_parser.add_argument("--input", required=True, help="Links or details CSV, or one URL per line")
+    reviews_parser.add_argument("--output", default="Maps_reviews.csv", help="Reviews CSV to append to")
+    reviews_parser.add_argument("--max-reviews", type=int, default=None, help="Stop each place after N reviews")
+    reviews_parser.add_argument("--since", type=lambda text: datetime.strptime(text, "%Y-%m-%d"), default=None,
+                                help="Only reviews from this date on (YYYY-MM-DD); sorts by newest and stops early")
+    reviews_parser.add_argument("--batch-size", type=int, default=50, help="Review cards read (and dropped) per step")
+    reviews_parser.add_argument("--no-watchdog", action="store_true", help="Disable the browser memory/latency watchdog")
+    reviews_parser.add_argument("--max-rss-mb", type=int, default=2500, help="Recycle the browser above this RSS")
+    reviews_parser.add_argument("--max-pages-per-driver", type=int, default=None, help="Recycle the browser after N places")
+
+    autotune_parser = subparsers.add_parser("autotune", help="Measure worker counts / prefetch depths and pick the knee")
+    autotune_parser.add_argument("--stage", choices=["details", "links"], default="details", help="Stage to tune")
+    autotune_parser.add_argument("--max-workers", type=int, default=None, help="Largest worker count tried (default: 2x CPUs)")
+    autotune_parser.add_argument("--prefetch-depths", default="0,1,2", help="Prefetch depths tried per worker count")
+    autotune_parser.add_argument("--items-per-worker", type=int, default=8, help="Places (or 4x queries) per worker and trial")
+    autotune_parser.add_argument("--live-links", default=None,
+                                 help="Measure on these real links (CSV or one per line) instead of the stand-in server")
+    autotune_parser.add_argument("--live-queries", nargs="*", default=None,
+                                 help="Links stage: measure on these real queries instead of the stand-in server")
+    autotune_parser.add_argument("--max-error-rate", type=float, default=0.02, help="Reject settings above this error rate")
+    autotune_parser.add_argument("--max-latency-factor", type=float, default=2.5,
+                                 help="Reject settings whose p95 latency exceeds this multiple of the 1-worker p95")
+    autotune_parser.add_argument("--max-rss-mb", type=float, default=None, help="Memory budget (default: 80%% of available)")
+    autotune_parser.add_argument("--min-gain", type=float, default=0.1,
+                                 help="Stop ramping when doubling the workers adds less than this share of throughput")
+    autotune_parser.add_argument("--standin-latency-ms", type=int, default=150, help="Stand-in server response delay")
+    autotune_parser.add_argument("--standin-max-rps", type=float, default=None,
+                                 help="Stand-in server: redirect place loads above this rate to a block page")
+    autotune_parser.add_argument("--apply", action="store_true",
+                                 help="Save the result as the default --prefetch-depth and `queue worker --processes auto`")
+
+    standin_parser = subparsers.add_parser("standin", help="Serve the local Google Maps stand-in until interrupted")
+    standin_parser.add_argument("--port", type=int, default=8765, help="Port to listen on")
+    standin_parser.add_argument("--latency-ms", type=int, default=150, help="Delay of every response")
+    standin_parser.add_argument("--feed-total", type=int, default=60, help="Results per search")
+    standin_parser.add_argument("--max-rps", type=float, default=None, help="Redirect place loads above this rate to a block page")
+    return parser
+
+
+def run_autotune_command(args):
+    from .autotune import run_autotune
+    from .driver import driver_settings
+
+    live_items = None
+    if args.stage == "details" and args.live_links:
+        live_items = [link for link in read_links_file(args.live_links)[0] if link and link != 'N/A']
+    elif args.stage == "links" and args.live_queries:
+        live_items = args.live_queries
+    prefetch_depths = [int(depth) for depth in args.prefetch_depths.split(',') if depth.strip()]
+    driver_config = {'profile_template': driver_settings['profile_template'] or driver_settings['profile_dir'],
+                     'display_mode': driver_settings['display_mode'],
+                     'proxy': driver_settings['proxy'] if live_items else None} # The stand-in is local
+    standin_options = {'latency_ms': args.standin_latency_ms, 'max_place_rps': args.standin_max_rps}
+    outcome = run_autotune(stage=args.stage, max_workers=args.max_workers, prefetch_depths=prefetch_depths,
+                       items_per_worker=args.items_per_worker, live_items=live_items, driver_config=driver_config,
+                       max_error_rate=args.max_error_rate, max_latency_factor=args.max_latency_factor,
+                       max_rss_mb=args.max_rss_mb, min_gain=args.min_gain, standin_options=standin_options,
+                       apply=args.apply)
+    return 0 if outcome['recommended'] else 1
+
+
+def run_standin_command(args):
+    import time
+    from .standin import StandInServer
+
+    with StandInServer(host="127.0.0.1", port=args.port, latency_ms=args.latency_ms, feed_total=args.feed_total,
+                       max_place_rps=args.max_rps) as standin:
+        print(f"Search page: {standin.maps_url}   Example place: {standin.place_urls(1)[0]}")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            print(f"Stand-in server stopped. Requests served: {standin.stats}")
+    return 0
+
+
+# Starts `count` copies of this queue worker command as separate processes (worker ids <base>-1..N)
+def run_worker_processes(args, count, argv):
+    import subprocess
+    from .work_queue import default_worker_id
+
+    base_worker_id = args.worker_id or default_worker_id()
+    print(f"Starting {count} worker processes ({base_worker_id}-1..{count})")
+    processes = [subprocess.Popen([sys.executable, "-m", "gmaps_scraper", "--skip-env-check", *argv,
+                                   "--processes", "1", "--worker-id", f"{base_worker_id}-{index + 1}"])
+                 for index in range(count)]
+    return max(process.wait() for process in processes)
+
+
+def run_queue_command(args, argv):
+    from . import work_queue
+
+    broker = work_queue.open_broker(args.broker, lease_seconds=args.lease_seconds, max_attempts=args.max_attempts)
+    if args.action == "enqueue":
+        added = broker.enqueue(work_queue.links_queue, [{'query': query} for query in args.queries])
+        if args.links_csv:
+            links, card_data = read_links_file(args.links_csv)
+            links = filter_links_by_args(links, args)
+            added += broker.enqueue(work_queue.details_queue, [{'url': link, 'card': card_data.get(link)}
+                                                               for link in links if link and link != 'N/A'])
+        print(f"Enqueued {added} new task(s).")
+        return 0
+    if args.action == "worker":
+        worker_processes = worker_processes_from_args(args)
+        if worker_processes > 1:
+            return run_worker_processes(args, worker_processes, argv)
+        # Every worker of the sweep (any process, any node) draws from the same rate limiter buckets
+        from .rate_limit import use_shared_rate_store
+        use_shared_rate_store(broker)
+        if args.stage == "links":
+            polygon = None
+            if args.polygon:
+                from .geo import load_polygon
+                polygon = load_polygon(args.polygon)
+            work_queue.run_links_worker(broker, worker_id=args.worker_id, idle_timeout=args.idle_timeout,
+                                        polygon=polygon)
+        else:
+            work_queue.run_details_worker(broker, worker_id=args.worker_id, batch_size=args.batch_size,
+                                          idle_timeout=args.idle_timeout, use_watchdog=not args.no_watchdog,
+                                          watchdog=build_watchdog(args), snapshot_dir=args.snapshot_dir,
+                                          prefetch_depth=prefetch_depth_from_args(args))
+        return 0
+    if args.action == "export":
+        df = work_queue.export_details_results(broker, csv_filename=args.output, normalize=args.normalize)
+        return 0 if not df.empty else 1
+    for queue in [work_queue.links_queue, work_queue.details_queue]:
+        print(f"{queue}: {broker.stats(queue)}")
+    return 0
+
+
+def run_geo_command(args):
+    import pandas as pd
+    from . import geo
+
+    df = pd.read_csv(args.input)
+    if args.polygon:
+        area = geo.load_polygon(args.polygon)
+        coordinates = [geo.row_coordinates(row) for row in df.to_dict('records')]
+        mask = [point is not None and geo.point_in_area(point[0], point[1], area) for point in coordinates]
+        result_df = df[mask]
+    else:
+        index = geo.build_spatial_index(df, cell_degrees=args.cell_degrees)
+        print(f"Spatial index: {len(index)} of {len(df)} rows have coordinates.")
+        if args.bbox:
+            hits = index.within_bbox(*args.bbox)
+            result_df = pd.DataFrame([item for _, _, item in hits], columns=df.columns)
+        elif args.near and (args.radius_km is not None or args.nearest):
+            if args.nearest:
+                hits = index.nearest(args.near[0], args.near[1], k=args.nearest)
+            else:
+                hits = index.within_radius(args.near[0], args.near[1], args.radius_km * 1000.0)
+            result_df = pd.DataFrame([item for _, _, _, item in hits], columns=df.columns)
+            result_df['Distance (m)'] = [round(distance, 1) for distance, _, _, _ in hits]
+        else:
+            print("--- ERROR: Pass --bbox, --polygon, or --near with --radius-km or --nearest ---")
+            return 1
+
+    print(f"{len(result_df)} matching place(s).")
+    if args.output:
+        result_df.to_csv(args.output, index=False)
+        print(f"Data successfully saved to '{args.output}'")
+    else:
+        print(result_df.to_string(index=False))
+    return 0
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    args = build_parser().parse_args(argv)
+
+    if args.selectors:
+        from .selector_registry import load_selector_overrides, use_selector_registry
+        registry = use_selector_registry(load_selector_overrides(args.selectors))
+        print(f"Using selector registry version {registry.version}")
+
+    from .driver import configure_driver
+    configure_driver(profile_dir=args.profile_dir, profile_template=args.profile_template,
+                     display_mode=args.display_mode, proxy=args.proxy)
+
+    # Enqueueing, exporting and stats only talk to the broker, no browser needed
+    needs_browser = args.command not in browserless_commands or (args.command == "queue" and args.action == "worker")
+    if needs_browser and not args.skip_env_check:
+        environment = ensure_environment(install_missing=args.install_missing, recheck=args.recheck_env)
+        if not environment['ok']:
+            return 1
+
+    if args.command == "links":
+        from .links import run_full_extraction_process
+        card_data = None if args.no_card_data else {}
+        links = run_full_extraction_process(query=args.query, csv_filename=args.output, card_data=card_data,
+                                            target_count=args.limit, card_predicate=card_predicate_from_args(args))
+        return 0 if links else 1
+
+    if args.command == "details":
+        from .details import run_scrape_from_links
+        from .links import select_top_links
+        links, card_data = read_links_file(args.input)
+        links = filter_links_by_args(links, args)
+        card_predicate = card_predicate_from_args(args)
+        if card_predicate is not None:
+            if not card_data:
+                print("Warning: --min-rating/--category need the card columns of a links CSV; no link qualifies.")
+            # Every qualifying link stays queued so failed pages are backfilled until --limit succeed
+            links = select_top_links(links, card_data, card_predicate=card_predicate)
+            print(f"{len(links)} links pass the card filter.")
+        df = run_scrape_from_links(links, csv_filename=args.output, use_watchdog=not args.no_watchdog,
+                                   watchdog=build_watchdog(args), snapshot_dir=args.snapshot_dir,
+                                   normalize=args.normalize, target_count=args.limit,
+                                   prefetch_depth=prefetch_depth_from_args(args))
+        return 0 if not df.empty else 1
+
+    if args.command == "pipeline":
+        from .links import run_full_extraction_process
+        from .details import run_scrape_from_links
+        # --limit counts scraped places, as in `details`: the links stage collects spare links so failed pages
+        # are backfilled, and with --polygon it collects them all, since the area filter has to come before any cut
+        card_predicate = card_predicate_from_args(args)
+        collect_count = None
+        if args.limit:
+            collect_count = None if args.polygon else args.limit * pipeline_limit_headroom
+            if card_predicate is None:
+                card_predicate = lambda card: True # Limit mode keeps the links in feed order
+        links = run_full_extraction_process(query=args.query, csv_filename=args.links_output, card_data={},
+                                            target_count=collect_count, card_predicate=card_predicate)
+        links = filter_links_by_args(links, args)
+        if not links:
+            return 1
+        df = run_scrape_from_links(links, csv_filename=args.output, use_watchdog=not args.no_watchdog,
+                                   watchdog=build_watchdog(args), snapshot_dir=args.snapshot_dir,
+                                   normalize=args.normalize, target_count=args.limit,
+                                   prefetch_depth=prefetch_depth_from_args(args))
+        return 0 if not df.empty else 1
+
+    if args.command == "refresh":
+        from .refresh import run_refresh_from_previous
+        card_data = read_links_file(args.links_csv)[1] if args.links_csv else None
+        df = run_refresh_from_previous(args.previous, card_data=card_data, refresh_budget=args.budget,
+                                       max_age_days=args.max_age_days, csv_filename=args.output)
+        return 0 if not df.empty else 1
+
+    if args.command == "queue":
+        return run_queue_command(args, argv)
+
+    if args.command == "reextract":
+        from .archive import reextract_archive
+        df = reextract_archive(args.archive, csv_filename=args.output, processes=args.processes,
+                               selector_overrides=args.selectors)
+        return 0 if not df.empty else 1
+
+    if args.command == "geo":
+        return run_geo_command(args)
+
+    if args.command == "normalize":
+        from .normalize import normalize_results_file
+        df = normalize_results_file(args.input, csv_filename=args.output, default_country_code=args.country_code)
+        return 0 if not df.empty else 1
+
+    if args.command == "dedupe":
+        from .dedupe import dedupe_results_file
+        df = dedupe_results_file(args.input, csv_filename=args.output, match_threshold=args.threshold,
+                                 max_block_size=args.max_block_size, collapse=args.collapse)
+        return 0 if not df.empty else 1
+
+    if args.command == "autotune":
+        return run_autotune_command(args)
+
+    if args.command == "standin":
+        return run_standin_command(args)
+
+    if args.command == "warm-profile":
+        from .driver import warm_profile
+        return 0 if warm_profile(args.directory, query=args.query) else 1
+
+    if args.command == "reviews":
+        from .reviews import run_review_harvest
+        links, _ = read_links_file(args.input)
+        total_reviews = run_review_harvest(links, csv_filename=args.output, max_reviews_per_place=args.max_reviews,
+                                           since=args.since, batch_size=args.batch_size,
+                                           use_watchdog=not args.no_watchdog, watchdog=build_watchdog(args))
+        return 0 if total_reviews else 1
+
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,335 @@
+# --- Fuzzy Duplicate Detection Across the Scraped Catalogue ---
+# The same business often shows up under several place links (relocations,
+# duplicate listings). Comparing every pair of rows is quadratic, so rows are
+# only compared inside blocks that share a cheap key:
+#   p:<phone digits>                 same phone number
+#   g:<geohash-7 cell>, h:<...>      within ~150 m (two grids offset by half a
+#                                    cell, so neighbours on a cell edge still meet)
+#   n:<geohash-5 cell>:<name token>  same rare name token within ~5 km
+# Every candidate pair is scored with numpy column operations (name and address
+# token Jaccard, phone match, distance) and pairs above match_threshold are
+# merged into clusters by vectorized label propagation. Blocks larger than
+# max_block_size (a chain's shared call-centre number, a mall) are skipped,
+# which keeps the pair count, and so the run time, close to linear in rows.
+
+import time
+
+name_stopwords = {'the', 'and', 'of', 'at', 'a', 'an', 'inc', 'llc', 'ltd', 'co', 'corp', 'company', 'nyc', 'ny'}
+address_stopwords = {'st', 'street', 'ave', 'avenue', 'rd', 'road', 'blvd', 'fl', 'floor', 'suite', 'ste', 'usa',
+                     'united', 'states'}
+
+cluster_id_column = 'Cluster ID'
+cluster_size_column = 'Cluster Size'
+
+# Score weights; a signal missing on either side of a pair (no phone, no coordinates) is left out
+# and the remaining weights are renormalized
+match_weights = {'name': 0.45, 'phone': 0.25, 'address': 0.15, 'distance': 0.15}
+default_match_threshold = 0.6
+distance_scale_m = 250.0 # Proximity score falls linearly from 1 at 0 m to 0 at this distance
+max_tokens_per_row = 8
+
+
+# --- Vectorized Normalization Helpers ---
+def phone_keys(phones):
+    # Digits only, last 10 (drops a +1 / 001 country prefix); '' when too short to be a number
+    digits = phones.fillna('').astype(str).str.replace(r"\D", "", regex=True).str[-10:]
+    return digits.where(digits.str.len() >= 7, '')
+
+
+def token_matrix(texts, stopwords):
+    # Returns (n x max_tokens_per_row matrix of token ids, -1 padded; token id -> document frequency)
+    import numpy as np
+    import pandas as pd
+
+    normalized = texts.fillna('').astype(str).str.lower().str.replace(r"[^0-9a-z]+", " ", regex=True)
+    tokens = normalized.str.split().explode().dropna()
+    tokens = tokens[(tokens.str.len() > 1) & ~tokens.isin(stopwords)]
+    positions = tokens.index.to_numpy()
+    token_ids, uniques = pd.factorize(tokens.to_numpy())
+    pairs = pd.DataFrame({'row': positions, 'token': token_ids}).drop_duplicates()
+    document_frequency = np.bincount(pairs['token'].to_numpy(), minlength=len(uniques))
+    pairs['slot'] = pairs.groupby('row').cumcount()
+    pairs = pairs[pairs['slot'] < max_tokens_per_row]
+
+    matrix = np.full((len(texts), max_tokens_per_row), -1, dtype=np.int32)
+    matrix[pairs['row'].to_numpy(), pairs['slot'].to_numpy()] = pairs['token'].to_numpy()
+    return matrix, document_frequency
+
+
+# Integer geohash (the 5 * precision interleaved lng/lat bits; equal codes mean the same geohash cell)
+def geohash_codes(latitudes, longitudes, precision=7):
+    import numpy as np
+
+    total_bits = 5 * precision
+    lng_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    lng_cells = np.clip(((longitudes + 180.0) / 360.0 * (1 << lng_bits)).astype(np.int64), 0, (1 << lng_bits) - 1)
+    lat_cells = np.clip(((latitudes + 90.0) / 180.0 * (1 << lat_bits)).astype(np.int64), 0, (1 << lat_bits) - 1)
+    codes = np.zeros(len(latitudes), dtype=np.int64)
+    # Geohash interleaving starts with a longitude bit
+    for bit in range(total_bits):
+        if bit % 2 == 0:
+            source, source_bit = lng_cells, lng_bits - 1 - bit // 2
+        else:
+            source, source_bit = lat_cells, lat_bits - 1 - bit // 2
+        codes = (codes << 1) | ((source >> source_bit) & 1)
+    return codes
+
+
+def geohash_cell_size(precision):
+    total_bits = 5 * precision
+    return 180.0 / (1 << (total_bits // 2)), 360.0 / (1 << ((total_bits + 1) // 2)) # (lat degrees, lng degrees)
+
+
+# --- Blocking ---
+def blocking_keys(phones, name_tokens, name_frequency, latitudes, longitudes, located):
+    # Returns a DataFrame of (row, key) pairs; a row appears once per key it emits
+    import numpy as np
+    import pandas as pd
+
+    rows = np.arange(len(phones))
+    frames = []
+
+    has_phone = phones != ''
+    frames.append(pd.DataFrame({'row': rows[has_phone], 'key': "p:" + phones[has_phone].astype(object)}))
+
+    if located.any():
+        lat, lng = latitudes[located], longitudes[located]
+        cell_lat, cell_lng = geohash_cell_size(7)
+        for prefix, lat_shift, lng_shift in [("g:", 0.0, 0.0), ("h:", cell_lat / 2, cell_lng / 2)]:
+            codes = geohash_codes(lat + lat_shift, lng + lng_shift, precision=7)
+            frames.append(pd.DataFrame({'row': rows[located], 'key': prefix + codes.astype(str).astype(object)}))
+
+        # The two rarest name tokens of each row, paired with a coarse area
+        area_codes = geohash_codes(lat, lng, precision=5)
+        tokens = name_tokens[located]
+        frequency = np.where(tokens >= 0, name_frequency[np.maximum(tokens, 0)], np.iinfo(np.int64).max)
+        rarest = np.argsort(frequency, axis=1, kind='stable')[:, :2]
+        for column in range(rarest.shape[1]):
+            token = tokens[np.arange(len(tokens)), rarest[:, column]]
+            has_token = token >= 0
+            frames.append(pd.DataFrame({
+                'row': rows[located][has_token],
+                'key': ("n:" + area_codes[has_token].astype(str).astype(object) + ":"
+                        + token[has_token].astype(str).astype(object)),
+            }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def candidate_pairs(keys, row_count, max_block_size):
+    # Returns (left rows, right rows, skipped oversized blocks) with left < right and every pair once
+    import numpy as np
+    import pandas as pd
+
+    block_ids = pd.factorize(keys['key'])[0]
+    block_sizes = np.bincount(block_ids)
+    size_of_row = block_sizes[block_ids]
+    usable = (size_of_row >= 2) & (size_of_row <= max_block_size)
+    skipped = int(np.count_nonzero(block_sizes > max_block_size))
+
+    member_rows = keys['row'].to_numpy()[usable]
+    member_blocks = block_ids[usable]
+    member_sizes = size_of_row[usable]
+    order = np.lexsort((member_rows, member_blocks))
+    member_rows, member_blocks, member_sizes = member_rows[order], member_blocks[order], member_sizes[order]
+
+    lefts, rights = [], []
+    # Blocks of the same size are laid out as one (blocks x size) matrix, so each size is one
+    # triu_indices gather instead of a Python loop over blocks
+    for size in np.unique(member_sizes):
+        block_rows = member_rows[member_sizes == size].reshape(-1, size)
+        upper_left, upper_right = np.triu_indices(size, k=1)
+        lefts.append(block_rows[:, upper_left].ravel())
+        rights.append(block_rows[:, upper_right].ravel())
+    if not lefts:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, skipped
+
+    left = np.concatenate(lefts).astype(np.int64)
+    right = np.concatenate(rights).astype(np.int64)
+    left, right = np.minimum(left, right), np.maximum(left, right)
+    # The same pair can share several blocks; sort + neighbour compare is much faster than np.unique here
+    pair_codes = np.sort(left * row_count + right)
+    pair_codes = pair_codes[np.r_[True, pair_codes[1:] != pair_codes[:-1]]]
+    return pair_codes // row_count, pair_codes % row_count, skipped
+
+
+# --- Vectorized Pair Scoring ---
+def token_jaccard(left_tokens, right_tokens):
+    import numpy as np
+
+    matches = (left_tokens[:, :, None] == right_tokens[:, None, :]) & (left_tokens[:, :, None] >= 0)
+    intersection = matches.any(axis=2).sum(axis=1)
+    union = (left_tokens >= 0).sum(axis=1) + (right_tokens >= 0).sum(axis=1) - intersection
+    return np.where(union > 0, intersection / np.maximum(union, 1), 0.0), union > 0
+
+
+def haversine_m_array(lat1, lng1, lat2, lng2):
+    import numpy as np
+
+    phi1, phi2 = np.radians(lat1), np.radians(lat2)
+    a = np.sin((phi2 - phi1) / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(np.radians(lng2 - lng1) / 2) ** 2
+    return 2 * 6371008.8 * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def score_pairs(left, right, features, weights=None):
+    import numpy as np
+
+    weights = weights or match_weights
+    name_score, name_known = token_jaccard(features['name_tokens'][left], features['name_tokens'][right])
+    address_score, _ = token_jaccard(features['address_tokens'][left], features['address_tokens'][right])
+    address_known = (features['address_tokens'][left, 0] >= 0) & (features['address_tokens'][right, 0] >= 0)
+
+    phone_ids = features['phone_ids']
+    phone_known = (phone_ids[left] >= 0) & (phone_ids[right] >= 0)
+    phone_score = (phone_ids[left] == phone_ids[right]).astype(float)
+
+    located = features['located']
+    distance_known = located[left] & located[right]
+    distance = haversine_m_array(features['latitudes'][left], features['longitudes'][left],
+                                 features['latitudes'][right], features['longitudes'][right])
+    distance_score = np.clip(1.0 - distance / distance_scale_m, 0.0, 1.0)
+
+    total = np.zeros(len(left))
+    weight_sum = np.zeros(len(left))
+    other_known = np.zeros(len(left), dtype=bool)
+    for signal, score, known in [('name', name_score, name_known), ('phone', phone_score, phone_known),
+                                 ('address', address_score, address_known),
+                                 ('distance', distance_score, distance_known)]:
+        known_weight = np.where(known, weights[signal], 0.0)
+        total += known_weight * np.nan_to_num(score)
+        weight_sum += known_weight
+        if signal != 'name':
+            other_known |= known
+    score = np.where(weight_sum > 0, total / np.maximum(weight_sum, 1e-9), 0.0)
+    # The name alone never decides: with nothing else to compare, the pair is not merged
+    return np.where(other_known, score, 0.0)
+
+
+# --- Clustering: Connected Components by Min-Label Propagation ---
+def connected_component_labels(row_count, left, right):
+    import numpy as np
+
+    labels = np.arange(row_count)
+    if not len(left):
+        return labels
+    while True:
+        pair_labels = np.minimum(labels[left], labels[right])
+        updated = labels.copy()
+        np.minimum.at(updated, left, pair_labels)
+        np.minimum.at(updated, right, pair_labels)
+        # Pointer jumping: follow labels to their root so long chains collapse in a few rounds
+        while True:
+            jumped = updated[updated]
+            if np.array_equal(jumped, updated):
+                break
+            updated = jumped
+        if np.array_equal(updated, labels):
+            return labels
+        labels = updated
+
+
+def build_features(df):
+    import numpy as np
+    import pandas as pd
+
+    def column(name):
+        return df[name] if name in df.columns else pd.Series(['N/A'] * len(df), index=df.index)
+
+    def known_text(name):
+        return column(name).where(column(name).astype(str) != 'N/A', '')
+
+    latitudes = pd.to_numeric(column('Latitude'), errors='coerce').to_numpy(dtype=float)
+    longitudes = pd.to_numeric(column('Longitude'), errors='coerce').to_numpy(dtype=float)
+    located = ~(np.isnan(latitudes) | np.isnan(longitudes))
+    phones = phone_keys(known_text('Phone').reset_index(drop=True)).to_numpy()
+    name_tokens, name_frequency = token_matrix(known_text('Name').reset_index(drop=True), name_stopwords)
+    address_tokens, _ = token_matrix(known_text('Address').reset_index(drop=True), address_stopwords)
+    return {
+        'phones': phones,
+        'phone_ids': np.where(phones != '', pd.factorize(phones)[0], -1), # Integer compares score much faster
+        'name_tokens': name_tokens,
+        'name_frequency': name_frequency,
+        'address_tokens': address_tokens,
+        'latitudes': np.nan_to_num(latitudes),
+        'longitudes': np.nan_to_num(longitudes),
+        'located': located,
+    }
+
+
+# --- Main Process: Assign Cluster IDs to a Results DataFrame ---
+# Takes the output of run_scrape_from_links (Name, Address, Phone, Latitude, Longitude) and
+# returns a copy with 'Cluster ID' (rows with the same ID are the same business) and
+# 'Cluster Size'. With collapse=True only the most complete row of each cluster is kept.
+def assign_duplicate_clusters(df, match_threshold=default_match_threshold, max_block_size=200, collapse=False,
+                              pair_chunk_size=1_000_000):
+    import numpy as np
+
+    start_time = time.time()
+    row_count = len(df)
+    result_df = df.copy()
+    if row_count == 0:
+        result_df[cluster_id_column] = []
+        result_df[cluster_size_column] = []
+        return result_df
+
+    features = build_features(df)
+    keys = blocking_keys(features['phones'], features['name_tokens'], features['name_frequency'],
+                         features['latitudes'], features['longitudes'], features['located'])
+    left, right, skipped_blocks = candidate_pairs(keys, row_count, max_block_size)
+
+    matched_left, matched_right = [], []
+    for chunk_start in range(0, len(left), pair_chunk_size):
+        chunk_left = left[chunk_start:chunk_start + pair_chunk_size]
+        chunk_right = right[chunk_start:chunk_start + pair_chunk_size]
+        matched = score_pairs(chunk_left, chunk_right, features) >= match_threshold
+        matched_left.append(chunk_left[matched])
+        matched_right.append(chunk_right[matched])
+    matched_left = np.concatenate(matched_left) if matched_left else left
+    matched_right = np.concatenate(matched_right) if matched_right else right
+
+    labels = connected_component_labels(row_count, matched_left, matched_right)
+    # A label is the first row of its cluster, so the dense numbering follows first-seen order
+    cluster_labels, cluster_ids = np.unique(labels, return_inverse=True)
+    result_df[cluster_id_column] = cluster_ids
+    result_df[cluster_size_column] = np.bincount(cluster_ids)[cluster_ids]
+
+    duplicate_rows = int(row_count - len(cluster_labels))
+    elapsed = time.time() - start_time
+    print(f"Dedupe: {row_count} rows, {len(keys)} block keys, {len(left)} candidate pairs, "
+          f"{len(matched_left)} matches -> {len(cluster_labels)} clusters ({duplicate_rows} duplicate rows) "
+          f"in {elapsed:.1f}s.")
+    if skipped_blocks:
+        print(f"Dedupe: skipped {skipped_blocks} block(s) larger than {max_block_size} rows.")
+
+    if collapse:
+        result_df = collapse_clusters(result_df)
+    return result_df
+
+
+# Keeps one row per cluster: a successful scrape with the most filled-in fields wins
+def collapse_clusters(clustered_df):
+    filled_fields = (clustered_df.astype(str) != 'N/A').sum(axis=1)
+    successful = clustered_df['Scrape Status'].astype(str) == 'Success' if 'Scrape Status' in clustered_df.columns else True
+    ranked = clustered_df.assign(_successful=successful, _filled=filled_fields)
+    ranked = ranked.sort_values(['_successful', '_filled'], ascending=False, kind='stable')
+    collapsed = ranked.drop_duplicates(subset=cluster_id_column, keep='first')
+    return collapsed.sort_index().drop(columns=['_successful', '_filled'])
+
+
+def dedupe_results_file(input_csv, csv_filename, match_threshold=default_match_threshold, max_block_size=200,
+                        collapse=False):
+    import pandas as pd
+
+    print(f"--- Starting Duplicate Detection on '{input_csv}' ---")
+    df = pd.read_csv(input_csv, dtype=str, keep_default_na=False)
+    result_df = assign_duplicate_clusters(df, match_threshold=match_threshold, max_block_size=max_block_size,
+                                          collapse=collapse)
+    if csv_filename:
+        try:
+            result_df.to_csv(csv_filename, index=False)
+            print(f"Data successfully saved to '{csv_filename}'")
+        except Exception as e:
+            print(f"--- ERROR: Failed to save deduplicated data to CSV ---")
+            print(f"Error details: {e}")
+    return result_df
@@ -0,0 +1,385 @@
+# --- Google Maps Business Detail Scraper ---
+# Visits pre-collected Google Maps place links and extracts the name, address,
+# category, phone and website of each business. Selenium and pandas are imported
+# inside the functions that need them so importing this module stays cheap.
+
+import time
+from collections import deque
+from itertools import islice
+
+from .driver import setup_driver, close_driver
+from .watchdog import create_driver_watchdog, watchdog_record_page, is_dead_driver_error, recycle_driver
+from .rate_limit import rate_limited, detect_block_signal, maps_place_target, rate_limiter_summary
+from .selector_registry import get_selector_registry, SelectorDriftError
+from .geo import coordinate_fields
+from .prefetch import TabPrefetcher
+from .records import PlaceRecord, RecordBuffer
+
+
+# Columns of the detail results, in output order
+detail_columns = ['Google Maps Link', 'Name', 'Address', 'Category', 'Phone', 'Website', 'Latitude', 'Longitude',
+                  'Scrape Status']
+
+# Example aria-labels: "Address: 6 E 36th St, New York, NY 10016 ", "Phone: (212) 696-5036 "
+def value_from_aria_label(aria_label, prefix):
+    if aria_label and prefix in aria_label:
+        return aria_label.replace(prefix, "", 1).strip()
+    return "N/A"
+
+
+# --- FUNCTION TO SCRAPE DATA FROM A SINGLE BUSINESS DETAIL PAGE ---
+# This function navigates to a given URL and scrapes specific information from the resulting detail page/panel.
+# proxy names the proxy this driver goes through, so its page loads also count against that proxy's limiter
+# (default: the proxy the driver was set up with, see configure_driver).
+# With snapshot_dir set, the place panel HTML is archived (see archive.py) and its hash kept in 'Snapshot'.
+# Selectors come from the selector registry (selector_registry.py): each field has a fallback chain, and
+# selectors that keep missing are skipped instantly. If every name selector is dead, SelectorDriftError
+# is raised so the caller can stop instead of timing out on every remaining page.
+# prefetched is a PrefetchedPage (prefetch.py) when the URL is already loading in the current tab.
+# on_loaded is called once the page load released its rate limiter slot, before the fields are read
+# (the prefetcher starts the next background loads there).
+# Returns a PlaceRecord (records.py), which reads and writes like a dict of the result columns.
+def scrape_detail_page_from_link(driver, detail_url, proxy=None, snapshot_dir=None, registry=None, prefetched=None,
+                                 on_loaded=None):
+    print(f"--> {'Reading prefetched' if prefetched else 'Navigating to'} business detail URL: {detail_url}")
+    registry = registry or get_selector_registry()
+    proxy = proxy or getattr(driver, 'proxy', None)
+    data_item = PlaceRecord({
+        'Google Maps Link': detail_url, # Store the URL we navigated to
+        'Name': 'N/A',
+        'Address': 'N/A', # Full address from detail page
+        'Category': 'N/A', # Subcategory
+        'Phone': 'N/A',
+        'Website': 'N/A',
+        **coordinate_fields(detail_url), # Parsed from the !3d<lat>!4d<lng> part of the link
+        'Scrape Status': 'Success' # Track if scraping for this URL was successful
+    })
+
+    try:
+        # --- Wait for a reliable element on the detail page/panel ---
+        # A good indicator is the main place name (<h1 class="DUwDvf lfPIob">...</h1>).
+
+        # The page load holds a slot of the shared 'maps-place' rate limiter; its latency
+        # (and any block page) adjusts how fast all drivers may load the next pages
+        if prefetched is None:
+            with rate_limited(maps_place_target, proxy=proxy) as load_outcome:
+                try:
+                    driver.get(detail_url)
+                    print("Waiting for detail page/panel to load...")
+
+                    # Wait for the Name element to appear, as it's a primary indicator the page loaded
+                    name_element = registry.find(driver, 'detail_name', timeout=20)
+                finally:
+                    load_outcome['blocked'] = detect_block_signal(driver)
+        else:
+            # Already loading (or loaded) in this background tab; its limiter slot was taken when it started
+            try:
+                name_element = registry.find(driver, 'detail_name', timeout=20)
+            finally:
+                prefetched.finish(driver, blocked=detect_block_signal(driver))
+        if on_loaded:
+            on_loaded()
+        if name_element is None:
+            raise Exception("Name element not found")
+        print("Detail page loaded and key element (Name) found.")
+        if data_item['Latitude'] == 'N/A':
+            # Short links carry no coordinates, but Google redirects them to the full place URL
+            try:
+                data_item.update(coordinate_fields(driver.current_url))
+            except Exception:
+                pass
+        # Small buffer for dynamic content (a prefetched page has been settling in the background already)
+        time.sleep(3 if prefetched is None else max(0.0, 3 - (time.monotonic() - prefetched.started)))
+
+        # --- Scrape data from the DETAIL PANEL ---
+        # Each scraping attempt is in a try/except to prevent one failure from stopping the rest.
+
+        # --- Scrape Name ---
+        try:
+            # Re-find after the buffer in case the panel re-rendered
+            name_element = registry.find(driver, 'detail_name', timeout=5) or name_element
+            data_item['Name'] = name_element.text.strip()
+            # print(f"Scraped Name: {data_item['Name']}")
+        except SelectorDriftError:
+            raise
+        except Exception as e:
+            data_item['Scrape Status'] = f"Name Failed: {e}"
+            print(f"Warning: Could not scrape Name for {detail_url}: {e}") # Log specific failure
+
+        # --- Scrape Category / Subcategory ---
+        try:
+            # e.g. <button class="DkEaL " jsaction="pane.wfvdle17.category">Spanish restaurant</button>
+            category_element = registry.find(driver, 'detail_category', timeout=5)
+            if category_element is not None:
+                data_item['Category'] = category_element.text.strip()
+            # Handle multiple categories separated by '·' if necessary
+        except Exception as e:
+             print(f"Warning: Could not scrape Category for {detail_url}: {e}") # Log specific failure
+
+        # --- Scrape Address and Phone ---
+        # Both are buttons (data-item-id="address" / data-item-id^="phone:") whose aria-label holds
+        # the value, e.g. "Address: 6 E 36th St, New York, NY 10016 ", with the same text in a nested div.
+        for field, registry_field, prefix in [('Address', 'detail_address', "Address:"), ('Phone', 'detail_phone', "Phone:")]:
+            try:
+                container_element = registry.find(driver, registry_field, timeout=10)
+                if container_element is None:
+                    continue
+                # Try getting the value from the aria-label of the button first
+                value_text = value_from_aria_label(container_element.get_attribute('aria-label'), prefix)
+
+                # If aria-label didn't contain the value, try the nested div text (searched *within* the button)
+                if value_text == "N/A":
+                    nested_element = registry.find(container_element, 'detail_nested_value')
+                    if nested_element is not None and nested_element.text.strip():
+                        value_text = nested_element.text.strip()
+
+                data_item[field] = value_text # Store the result (N/A or scraped text)
+            except Exception as e:
+                print(f"Warning: Could not scrape {field} container for {detail_url}: {e}")
+
+        # --- Scrape Website ---
+        try:
+            # e.g. <a class="CsEnBe" data-item-id="authority" href="...">...</a>
+            website_element = registry.find(driver, 'detail_website', timeout=5)
+            if website_element is not None:
+                data_item['Website'] = website_element.get_attribute('href') or 'N/A'
+        except Exception as e:
+            print(f"Warning: Could not scrape Website for {detail_url}: {e}") # Log specific failure
+
+
+        # --- Add other fields here if needed (Rating, Review Count, Hours, etc.) ---
+        # Add a fallback chain for them to the selector registry first
+
+
+        # If primary data (like Name) wasn't scraped, mark as a scrape failure for this item
+        if data_item['Name'] == 'N/A' and data_item['Scrape Status'] == 'Success':
+             data_item['Scrape Status'] = f"Major Failure: Name Not Found"
+
+        if snapshot_dir:
+            from .archive import capture_snapshot, snapshot_column
+            data_item[snapshot_column] = capture_snapshot(driver, snapshot_dir, detail_url) or 'N/A'
+
+        # print("--> Finished scraping detail page.")
+        return data_item
+
+    except SelectorDriftError:
+        raise
+    except Exception as e:
+        # Catching errors during navigation or the initial wait for the Name element
+        data_item['Scrape Status'] = f"Navigation/Load Failed: {e}"
+        print(f"--> ERROR navigating or loading page {detail_url}: {e}")
+        if snapshot_dir:
+            # Archive the failed page too: if a selector broke, the fix can be re-extracted offline
+            from .archive import capture_snapshot, snapshot_column
+            data_item[snapshot_column] = capture_snapshot(driver, snapshot_dir, detail_url) or 'N/A'
+        return data_item # Return data_item with failure status
+
+
+# --- Main Process: Scrape Details from Pre-collected Links ---
+# This function orchestrates the process of scraping details from a provided list of URLs.
+# A driver memory watchdog recycles the browser when it bloats or slows down (pass use_watchdog=False
+# to disable, or a dict from create_driver_watchdog() to change the thresholds).
+# Pass snapshot_dir to archive every detail panel for offline re-extraction.
+# With normalize=True the E.164 phone, address parts and website domain columns (normalize.py) are added.
+# target_count stops the run once that many places were scraped successfully (limit mode).
+# prefetch_depth > 0 keeps that many background tabs loading the next URLs while the current one is read.
+def run_scrape_from_links(business_urls, csv_filename="Maps_scraped_details_from_links.csv",
+                          use_watchdog=True, watchdog=None, max_requeues=2, snapshot_dir=None, normalize=False,
+                          target_count=None, prefetch_depth=0):
+    print("--- Step 0: Starting Detailed Scraper from Links Process ---")
+    get_selector_registry().reset() # Circuits from an earlier run in this process do not carry over
+    import pandas as pd
+
+    # Call the setup function
+    driver, display = setup_driver()
+
+    # Check if driver setup was successful
+    if not driver:
+        print("--- Process Aborted: Driver setup failed. ---")
+        if display:
+            try:
+                display.stop()
+            except: pass
+        return pd.DataFrame() # Return empty DataFrame on failure
+
+    result_columns = detail_columns + (['Snapshot'] if snapshot_dir else [])
+    # Column buffers for the extracted records (records.py); the final DataFrame is built from them once
+    scraped_data = RecordBuffer(result_columns)
+    # DataFrame to store the final results
+    df = pd.DataFrame()
+
+    try: # Use a try block for the main process to ensure cleanup happens
+        # --- Step 5: Iterate Through Provided URLs and Scrape ---
+        print(f"\n--- Step 5: Starting Scraping from Provided URLs ({len(business_urls)} links) ---")
+
+        if business_urls:
+            if use_watchdog and watchdog is None:
+                watchdog = create_driver_watchdog()
+            # Work queue of (index, url, attempt) so an in-flight URL can be requeued after a recycle
+            pending_urls = deque((i, url, 0) for i, url in enumerate(business_urls))
+            prefetcher = TabPrefetcher(driver, depth=prefetch_depth) if prefetch_depth > 0 else None
+            while pending_urls:
+                # Limit mode: stop once target_count places were scraped successfully
+                if target_count and scraped_data.successes >= target_count:
+                    print(f"Reached the target of {target_count} scraped places; {len(pending_urls)} links left unfetched.")
+                    break
+                i, url, attempt = pending_urls.popleft()
+                # Skip invalid or empty URLs
+                if not url or url == 'N/A':
+                    print(f"Skipping invalid URL at index {i}: {url}")
+                    scraped_data.append({'Google Maps Link': url, 'Scrape Status': 'Skipped (Invalid URL)'})
+                    continue
+
+                print(f"\nProcessing URL {i+1}/{len(business_urls)}")
+                # Call the function to scrape data from the detail page
+                page_start_time = time.time()
+                prefetched = None
+                fill_prefetch = None
+                if prefetcher:
+                    # Switch to this URL's tab if it was prefetched; the next URLs start loading in the
+                    # background as soon as this page's limiter slot is free (filling earlier could take
+                    # the only slot this page's own load is waiting for)
+                    prefetched = prefetcher.take(url)
+                    upcoming_urls = [pending_url for _, pending_url, _ in islice(pending_urls, prefetch_depth)]
+                    fill_prefetch = lambda: prefetcher.fill(upcoming_urls)
+                try:
+                    business_detail_data = scrape_detail_page_from_link(driver, url, snapshot_dir=snapshot_dir,
+                                                                        prefetched=prefetched, on_loaded=fill_prefetch)
+                except SelectorDriftError as drift_e:
+                    # Every remaining page would fail the same way; stop now instead of timing out on each
+                    print(f"--- Stopping: {drift_e} ---")
+                    scraped_data.append({'Google Maps Link': url, 'Scrape Status': 'Not Attempted (Selector Drift)'})
+                    for _, remaining_url, _ in pending_urls:
+                        scraped_data.append({'Google Maps Link': remaining_url, 'Scrape Status': 'Not Attempted (Selector Drift)'})
+                    pending_urls.clear()
+                    break
+                page_seconds = time.time() - page_start_time
+
+                if use_watchdog:
+                    page_failed = str(business_detail_data.get('Scrape Status', '')).startswith('Navigation/Load Failed')
+                    if page_failed and is_dead_driver_error(business_detail_data['Scrape Status']):
+                        recycle_reason = "browser session died"
+                    else:
+                        recycle_reason = watchdog_record_page(watchdog, driver, page_seconds,
+                                                              prefetched=prefetched is not None)
+
+                    if recycle_reason:
+                        if prefetcher:
+                            prefetcher.close(close_tabs=False)
+                        driver, display = recycle_driver(driver, display, watchdog, recycle_reason)
+                        if prefetcher and driver:
+                            prefetcher = TabPrefetcher(driver, depth=prefetch_depth)
+                        if page_failed and attempt < max_requeues:
+                            # Requeue the in-flight URL at the front so it is retried on the fresh browser
+                            print(f"Requeuing URL {i+1} (attempt {attempt + 2}) on the new browser.")
+                            pending_urls.appendleft((i, url, attempt + 1))
+                        else:
+                            scraped_data.append(business_detail_data)
+                        if not driver:
+                            print("--- Watchdog: Driver recycle failed. Stopping with the remaining URLs unscraped. ---")
+                            for _, remaining_url, _ in pending_urls:
+                                scraped_data.append({'Google Maps Link': remaining_url, 'Scrape Status': 'Not Attempted (Driver Recycle Failed)'})
+                            pending_urls.clear()
+                        continue
+
+                # Pacing between pages comes from the shared rate limiter inside scrape_detail_page_from_link
+                scraped_data.append(business_detail_data)
+
+            if prefetcher:
+                print(f"Prefetch: {prefetcher.summary()}")
+                prefetcher.close(close_tabs=driver is not None)
+            if use_watchdog:
+                print(f"Watchdog: {watchdog['recycles']} browser recycle(s), last sampled RSS {watchdog['last_rss_mb']:.0f}MB.")
+            for limiter_state in rate_limiter_summary():
+                print(f"Rate limiter: {limiter_state}")
+            get_selector_registry().print_health_report()
+
+        else:
+            print("No URLs provided in the input list. Skipping scraping.")
+
+
+        # --- Step 6: Creating Final DataFrame ---
+        print(f"\n--- Step 6: Creating Final DataFrame ---")
+        if len(scraped_data):
+            df = scraped_data.to_dataframe()
+            print(f"DataFrame created with {len(df)} rows and {len(df.columns)} columns.")
+        else:
+            print("No data was scraped, creating empty DataFrame.")
+            # Create DataFrame with expected columns even if empty
+            df = pd.DataFrame(columns=result_columns)
+
+        if normalize and not df.empty:
+            print(f"\n--- Step 6b: Normalizing Phone, Address and Website Columns ---")
+            from .normalize import normalize_fields
+            df = normalize_fields(df)
+
+
+        # --- Step 7: Exporting Data to CSV ---
+        print(f"\n--- Step 7: Exporting Data to CSV ---")
+        if not df.empty and csv_filename:
+            try:
+                csv_filename = csv_filename # Use the filename passed to the function
+                df.to_csv(csv_filename, index=False)
+                print(f"Data successfully saved to '{csv_filename}'")
+
+            except Exception as e:
+                print(f"--- ERROR during Step 7: Failed to save data to CSV ---")
+                print(f"Error details: {e}")
+        else:
+            print("No data to export. CSV file not created.")
+
+
+        # --- Step 8: Reporting and Displaying Final Extracted Data ---
+        print(f"\n--- Step 8: Reporting and Displaying Final Extracted Data ---")
+        print(f"Total records extracted and included in Final DataFrame: {len(df)}")
+        if not df.empty:
+             print("\nFinal Extracted Data (All rows):")
+
+             # Ensure pandas options allow full display for this final print
+             pd.set_option('display.max_rows', None)
+             pd.set_option('display.max_columns', None)
+             # pd.set_option('display.width', None) # Optional
+
+             # Display the entire DataFrame
+             try:
+                  # Use to_markdown for cleaner text output in environments that support it
+                  print(df.to_markdown(index=False))
+                  # If markdown doesn't look right, use display(df)
+                  # display(df)
+             except ImportError:
+                   print(df) # Fallback print
+
+             # Report on scrape statuses
+             print("\nScrape Status Summary:")
+             print(df['Scrape Status'].value_counts())
+
+
+        else:
+            print("No data to display.")
+
+
+    except Exception as e:
+        # Catching unexpected exceptions during the process
+        print(f"\n--- UNEXPECTED ERROR during full scraping process ---")
+        print(f"Error details: {e}")
+        print("Attempting cleanup and returning any DataFrame created before the error.")
+        # Ensure df exists even on error
+        if 'df' not in locals():
+             df = pd.DataFrame() # Create empty DataFrame if it was not created
+        # Try creating final df from scraped_data if an error occurred before final df creation
+        # (the buffer is emptied by the hand-off, so a DataFrame is never built from it twice)
+        elif len(scraped_data) and df.empty:
+             try:
+                 df = scraped_data.to_dataframe()
+                 print("DataFrame created from scraped_data after unexpected error.")
+             except:
+                 df = pd.DataFrame(columns=result_columns) # Still fail if cannot create
+
+
+    finally: # This block always runs whether there was an error or not
+        print("\n--- Step 9: Cleaning up Selenium Driver and Virtual Display ---")
+        close_driver(driver, display, step_label="Step 9")
+
+    # Return the DataFrame containing the extracted data (might be empty or partial)
+    return df
+
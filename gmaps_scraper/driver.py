@@ -0,0 +1,410 @@
+# --- Selenium Driver Setup ---
+# Shared by the link collector and the detail scraper. Selenium, webdriver-manager
+# and pyvirtualdisplay are imported inside setup_driver() so that importing this
+# module (e.g. in a queue worker) stays cheap. By default Chrome runs in new
+# headless mode, so no Xvfb server is started per worker (see setup_driver).
+#
+# Cold start: the chromedriver path is resolved once per installed Chrome version
+# and cached (driver_cache_path), so later setups neither run webdriver-manager's
+# network version lookup nor even start Chrome to ask its version. Optionally the
+# browser runs on a persistent user-data-dir, or on a copy-on-write clone of a
+# warmed template profile (see warm_profile), so the Maps assets come from the
+# HTTP cache and the consent cookies are already set.
+
+import json
+import os
+import re
+import shutil
+import socket
+import subprocess
+import tempfile
+
+chrome_binary_location = "/usr/bin/google-chrome"
+fallback_chromedriver_path = "/usr/local/bin/chromedriver" # Common fallback path
+browser_user_agent = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
+browser_window_size = (1280, 720) # Xvfb screen and Chrome window size in every display mode
+display_modes = ['auto', 'headless', 'xvfb']
+
+driver_cache_path = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")),
+    "gmaps_scraper", "chromedriver.json")
+# Where webdriver-manager and Selenium Manager keep the drivers they downloaded
+local_chromedriver_roots = [
+    os.path.join(os.path.expanduser("~"), ".wdm", "drivers", "chromedriver"),
+    os.path.join(os.path.expanduser("~"), ".cache", "selenium", "chromedriver"),
+]
+# Chrome's lock files; a copied profile must not carry them over
+profile_lock_names = ['SingletonLock', 'SingletonSocket', 'SingletonCookie']
+
+# Process-wide browser profile settings (see configure_driver). Workers run one per process,
+# so every setup_driver() call of a worker, including watchdog recycles, uses the same profile.
+driver_settings = {
+    'profile_dir': None, # Persistent user-data-dir, reused across runs and recycles
+    'profile_template': None, # Warmed profile; every browser gets its own copy-on-write clone
+    'display_mode': 'auto', # See setup_driver
+    'proxy': None, # Every browser goes through it (--proxy-server); its page loads count against its rate limiter
+}
+
+
+def configure_driver(profile_dir=None, profile_template=None, display_mode="auto", proxy=None):
+    if display_mode not in display_modes:
+        raise ValueError(f"Unknown display mode '{display_mode}' (expected one of {', '.join(display_modes)})")
+    driver_settings['profile_dir'] = os.path.abspath(profile_dir) if profile_dir else None
+    driver_settings['profile_template'] = os.path.abspath(profile_template) if profile_template else None
+    driver_settings['display_mode'] = display_mode
+    driver_settings['proxy'] = proxy or None
+    return driver_settings
+
+
+# --- Cached Chromedriver Resolution ---
+# Size and mtime of the Chrome binary: changes whenever Chrome is updated
+def chrome_binary_marker():
+    try:
+        chrome_stat = os.stat(chrome_binary_location)
+        return f"{chrome_stat.st_size}:{int(chrome_stat.st_mtime)}"
+    except OSError:
+        return "missing"
+
+
+def load_driver_cache():
+    try:
+        with open(driver_cache_path) as cache_file:
+            return json.load(cache_file)
+    except Exception:
+        return {}
+
+
+def save_driver_cache(cache):
+    try:
+        os.makedirs(os.path.dirname(driver_cache_path), exist_ok=True)
+        with open(driver_cache_path, "w") as cache_file:
+            json.dump(cache, cache_file)
+    except Exception as e:
+        print(f"Warning: Could not cache the chromedriver path: {e}")
+
+
+def version_tuple(version):
+    return tuple(int(part) for part in version.split('.'))
+
+
+# Looks for an already downloaded chromedriver for this Chrome version (no network).
+# An exact version match wins, otherwise the newest driver of the same major version.
+def find_local_chromedriver(chrome_version):
+    major = chrome_version.split('.')[0]
+    candidates = []
+    for root in local_chromedriver_roots:
+        for directory, _, files in os.walk(root):
+            if 'chromedriver' not in files:
+                continue
+            driver_path = os.path.join(directory, 'chromedriver')
+            if not os.access(driver_path, os.X_OK):
+                continue
+            versions = [part for part in directory.split(os.sep) if re.fullmatch(r"\d+(?:\.\d+){1,3}", part)]
+            if versions and versions[-1].split('.')[0] == major:
+                candidates.append((versions[-1] == chrome_version, version_tuple(versions[-1]), driver_path))
+    return max(candidates)[2] if candidates else None
+
+
+# Returns a chromedriver path for the installed Chrome, or None. Order: the cached path for this
+# Chrome binary, a local driver of the same version, webdriver-manager (network), the static fallback.
+def resolve_chromedriver_path(refresh=False):
+    cache = load_driver_cache()
+    marker = chrome_binary_marker()
+    drivers = cache.get('drivers', {})
+    if not refresh and cache.get('chrome_marker') == marker:
+        cached_path = drivers.get(cache.get('chrome_version') or '')
+        if cached_path and os.access(cached_path, os.X_OK):
+            print(f"Using cached chromedriver for Chrome {cache['chrome_version']}: {cached_path}")
+            return cached_path
+
+    from .env import get_chrome_version
+    version_match = re.search(r"\d+(?:\.\d+){1,3}", get_chrome_version() or '')
+    chrome_version = version_match.group(0) if version_match else None
+
+    driver_path = None
+    if chrome_version and not refresh:
+        cached_path = drivers.get(chrome_version)
+        driver_path = cached_path if cached_path and os.access(cached_path, os.X_OK) else None
+        driver_path = driver_path or find_local_chromedriver(chrome_version)
+        if driver_path:
+            print(f"Found a local chromedriver for Chrome {chrome_version}: {driver_path}")
+    if not driver_path:
+        try:
+            # Use ChromeDriverManager to get the correct driver version (resolves it over the network)
+            from webdriver_manager.chrome import ChromeDriverManager
+            driver_path = ChromeDriverManager().install()
+        except Exception as driver_e:
+            print(f"--- ERROR: Chrome Driver Manager failed: {driver_e} ---")
+    if not driver_path and os.access(fallback_chromedriver_path, os.X_OK):
+        print("Using the static chromedriver path fallback...")
+        driver_path = fallback_chromedriver_path
+
+    if driver_path and chrome_version:
+        drivers[chrome_version] = driver_path
+        save_driver_cache({'chrome_marker': marker, 'chrome_version': chrome_version, 'drivers': drivers})
+    return driver_path
+
+
+# --- Browser Profiles ---
+# True when another live Chrome on this host holds the profile (SingletonLock -> "<host>-<pid>")
+def profile_in_use(profile_dir):
+    try:
+        lock_target = os.readlink(os.path.join(profile_dir, 'SingletonLock'))
+    except OSError:
+        return False
+    host, _, pid = lock_target.rpartition('-')
+    if host != socket.gethostname() or not pid.isdigit():
+        return False
+    try:
+        os.kill(int(pid), 0)
+        return True
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+
+
+# Copies a profile into target_dir: copy-on-write where the filesystem supports reflinks
+# (btrfs, XFS), a plain copy otherwise
+def clone_profile(source_dir, target_dir):
+    try:
+        subprocess.run(["cp", "-a", "--reflink=auto", os.path.join(source_dir, "."), target_dir],
+                       check=True, capture_output=True, timeout=300)
+    except Exception:
+        shutil.copytree(source_dir, target_dir, dirs_exist_ok=True, symlinks=True,
+                        ignore=shutil.ignore_patterns(*profile_lock_names))
+    for lock_name in profile_lock_names:
+        lock_path = os.path.join(target_dir, lock_name)
+        if os.path.lexists(lock_path):
+            os.remove(lock_path)
+
+
+# Returns (user_data_dir, clone_dir) for the next browser; clone_dir is removed when the browser closes
+def prepare_profile_dir():
+    profile_dir = driver_settings['profile_dir']
+    template_dir = driver_settings['profile_template']
+    if profile_dir and profile_in_use(profile_dir):
+        # Another worker on this host has it open: run on a clone of it instead of failing to start
+        print(f"Profile '{profile_dir}' is in use by another browser; using a clone of it.")
+        template_dir = profile_dir
+    elif profile_dir:
+        os.makedirs(profile_dir, exist_ok=True)
+        return profile_dir, None
+    if template_dir and os.path.isdir(template_dir):
+        clone_dir = tempfile.mkdtemp(prefix="gmaps-profile-")
+        clone_profile(template_dir, clone_dir)
+        return clone_dir, clone_dir
+    if template_dir:
+        print(f"Warning: Profile template '{template_dir}' does not exist; using a throwaway profile.")
+    return None, None
+
+
+def discard_profile_clone(driver):
+    clone_dir = getattr(driver, 'profile_clone_dir', None)
+    if clone_dir:
+        shutil.rmtree(clone_dir, ignore_errors=True)
+
+
+# Chrome options shared by both display modes; the same window size and fingerprint
+# settings in each, so pages render (and look to Google) the same way
+def build_chrome_options(headless, user_data_dir=None, proxy=None):
+    from selenium.webdriver.chrome.options import Options
+
+    chrome_options = Options()
+    if headless:
+        # New headless is the full browser without a window (the old one was a separate, more detectable build)
+        chrome_options.add_argument("--headless=new")
+    chrome_options.add_argument(f"--window-size={browser_window_size[0]},{browser_window_size[1]}")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    # Use a common user agent string to appear more like a real browser
+    # (in headless mode this also hides the "HeadlessChrome" token of the default one)
+    chrome_options.add_argument(f"user-agent={browser_user_agent}")
+    # Optional: Arguments to reduce detection risks
+    chrome_options.add_argument("--disable-blink-features=AutomationControlled")
+    chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    chrome_options.add_experimental_option('useAutomationExtension', False)
+    chrome_options.add_argument("--disable-extensions")
+    # Point binary location (essential for some environments like Colab)
+    chrome_options.binary_location = chrome_binary_location
+     # Add argument to allow remote origin - sometimes necessary in Colab/headless
+    chrome_options.add_argument("--remote-allow-origins=*")
+     # Add argument to ignore certificate errors if needed (use with caution)
+    # chrome_options.add_argument('--ignore-certificate-errors')
+    # Added arguments for stability in headless mode - attempt to fix crash
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--no-zygote")
+    # Prefetch tabs (prefetch.py) load in the background; keep Chrome from throttling them
+    chrome_options.add_argument("--disable-background-timer-throttling")
+    chrome_options.add_argument("--disable-renderer-backgrounding")
+    chrome_options.add_argument("--disable-backgrounding-occluded-windows")
+    # Persistent or cloned profile (configure_driver); None keeps Chrome's throwaway profile
+    if user_data_dir:
+        chrome_options.add_argument(f"--user-data-dir={user_data_dir}")
+    if proxy:
+        chrome_options.add_argument(f"--proxy-server={proxy}")
+    return chrome_options
+
+
+# Starts Chrome with the resolved chromedriver; returns the driver or None.
+# retry_resolution=False skips the fresh (network) chromedriver lookup after a failure, for a
+# start that may have failed because of the display mode rather than a stale driver path.
+def start_chrome(chrome_options, retry_resolution=True):
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+
+    print("Locating chrome driver executable and initializing Selenium...")
+    driver_path = resolve_chromedriver_path()
+    try:
+        service = Service(driver_path) if driver_path else Service()
+        return webdriver.Chrome(service=service, options=chrome_options)
+    except Exception as driver_e:
+        print(f"--- ERROR: Could not start Chrome with driver '{driver_path}': {driver_e} ---")
+    if driver_path and retry_resolution:
+        # A stale cached path (e.g. a driver deleted by a cache cleanup): resolve again once
+        print("Resolving the chrome driver again...")
+        try:
+            service = Service(resolve_chromedriver_path(refresh=True))
+            return webdriver.Chrome(service=service, options=chrome_options)
+        except Exception as retry_e:
+            print(f"--- ERROR: Freshly resolved driver also failed: {retry_e} ---")
+    return None
+
+
+def start_virtual_display():
+    from pyvirtualdisplay import Display
+
+    print("Starting virtual display...")
+    # Using a common screen size, visible=0 for headless
+    display = Display(visible=0, size=browser_window_size)
+    display.start()
+    print("Virtual display started.")
+    return display
+
+
+# Function to set up the Chrome driver. display_mode (configure_driver) picks how it is displayed:
+#   'auto'     - new headless Chrome, falling back to Xvfb only if Chrome does not start that way
+#   'headless' - new headless Chrome only: no X server process per worker
+#   'xvfb'     - a regular Chrome window on a pyvirtualdisplay (Xvfb) display, the original setup
+# Returns (driver, display); display is None unless Xvfb is used.
+def setup_driver():
+    display_mode = driver_settings['display_mode']
+    print(f"\n--- Step 4: Setting up Selenium Driver ({display_mode} display mode) ---")
+    display = None
+    driver = None
+    clone_dir = None
+    try:
+        user_data_dir, clone_dir = prepare_profile_dir()
+        if user_data_dir:
+            print(f"Using browser profile: {user_data_dir}")
+
+        if display_mode in ['auto', 'headless']:
+            # In auto mode the driver path is only re-resolved if the Xvfb fallback fails too
+            driver = start_chrome(build_chrome_options(headless=True, user_data_dir=user_data_dir,
+                                                       proxy=driver_settings['proxy']),
+                                  retry_resolution=display_mode == 'headless')
+            if not driver and display_mode == 'auto':
+                print("New headless Chrome did not start; falling back to a virtual display.")
+        if not driver and display_mode in ['auto', 'xvfb']:
+            display = start_virtual_display()
+            driver = start_chrome(build_chrome_options(headless=False, user_data_dir=user_data_dir,
+                                                       proxy=driver_settings['proxy']))
+
+
+        if driver:
+            print("Step 4: Driver setup successful.")
+            # Optional: Set implicit wait (can be combined with explicit waits)
+            driver.implicit_wait = 5 # Wait up to 5 seconds for elements if not found immediately
+            driver.profile_clone_dir = clone_dir
+            driver.proxy = driver_settings['proxy'] # Rate limited per proxy too (rate_limit.rate_limited)
+        else:
+            print("Step 4: Driver setup failed.")
+            if display:
+                try:
+                    display.stop()
+                except:
+                    pass
+                display = None # Callers only clean up after a driver that started
+            if clone_dir:
+                shutil.rmtree(clone_dir, ignore_errors=True)
+
+
+        return driver, display
+
+    except Exception as e:
+        print(f"--- ERROR during Step 4: Driver or Virtual Display Setup Failed ---")
+        print(f"Error details: {e}")
+        print("This could be due to Chrome installation issues, incompatible driver versions, or environment problems.")
+        if driver:
+            try:
+                driver.quit()
+            except:
+                pass
+        if display:
+            try:
+                display.stop()
+            except:
+                pass
+        if clone_dir:
+            shutil.rmtree(clone_dir, ignore_errors=True)
+        return None, None
+
+
+# Quits the driver and stops the virtual display, logging (not raising) any errors
+def close_driver(driver, display, step_label="Cleanup"):
+    if driver:
+        try:
+            driver.quit()
+            print("Selenium driver closed.")
+        except Exception as e:
+            print(f"--- ERROR during {step_label}: Error closing driver ---")
+            print(f"Error details: {e}")
+        discard_profile_clone(driver)
+
+    if display:
+        try:
+            display.stop()
+            print("Virtual display stopped.")
+        except Exception as e:
+            print(f"--- ERROR during {step_label}: Error stopping virtual display ---")
+            print(f"Error details: {e}")
+
+
+# --- Warm Profile ---
+# Opens Google Maps once on profile_dir (accepting the consent page if it shows up) and runs a
+# search, so the profile holds the consent cookies and a warm HTTP cache. Use the result as
+# --profile-template (cloned per browser) or --profile-dir.
+def warm_profile(profile_dir, query="restaurants", settle_seconds=5):
+    import time
+    from .selector_registry import get_selector_registry
+
+    previous_settings = dict(driver_settings)
+    driver_settings.update(profile_dir=os.path.abspath(profile_dir), profile_template=None)
+    driver, display = setup_driver()
+    try:
+        if not driver:
+            print("--- Profile warm-up aborted: Driver setup failed. ---")
+            return False
+        registry = get_selector_registry()
+        driver.get("https://www.google.com/maps")
+        consent_button = registry.find(driver, 'consent_accept', timeout=5)
+        if consent_button is not None:
+            print("Accepting the consent page...")
+            consent_button.click()
+        search_input = registry.find(driver, 'search_input', timeout=20)
+        if search_input is not None:
+            search_input.send_keys(query)
+            search_button = registry.find(driver, 'search_button', timeout=10)
+            if search_button is not None:
+                search_button.click()
+            registry.find(driver, 'feed_container', timeout=20)
+        time.sleep(settle_seconds) # Let the cache writes land
+        print(f"Profile warmed: {driver_settings['profile_dir']}")
+        return True
+    except Exception as e:
+        print(f"--- ERROR during profile warm-up ---")
+        print(f"Error details: {e}")
+        return False
+    finally:
+        close_driver(driver, display, step_label="Profile warm-up")
+        driver_settings.update(previous_settings)
@@ -0,0 +1,124 @@
+# --- Environment Checks (done once and cached) ---
+# The notebook versions ran apt-get / wget / pip on every run. Here the checks
+# are only repeated when the Python interpreter or the Chrome binary changed,
+# or when explicitly asked; installation only happens with install_missing=True.
+
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+
+from .driver import chrome_binary_location, chrome_binary_marker
+
+environment_cache_path = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")),
+    "gmaps_scraper", "environment.json")
+
+# Import name -> pip package name
+required_python_packages = {
+    'selenium': 'selenium',
+    'pandas': 'pandas',
+    'webdriver_manager': 'webdriver-manager',
+    'pyvirtualdisplay': 'pyvirtualdisplay',
+}
+
+chrome_deb_url = "https://dl.google.com/linux/direct/google-chrome-stable_current_amd64.deb"
+
+
+# Anything that, if changed, invalidates the cached check result
+def environment_fingerprint():
+    return f"{sys.executable}|{sys.version.split()[0]}|{chrome_binary_marker()}"
+
+
+def get_chrome_version():
+    try:
+        result = subprocess.run([chrome_binary_location, "--version"], capture_output=True, text=True, timeout=30)
+        version_text = result.stdout.strip()
+        return version_text if "Chrome" in version_text else None
+    except Exception:
+        return None
+
+
+def check_environment():
+    # find_spec only locates the packages, it does not import them
+    missing_packages = [pip_name for import_name, pip_name in required_python_packages.items()
+                        if importlib.util.find_spec(import_name) is None]
+    chrome_version = get_chrome_version()
+    return {
+        'fingerprint': environment_fingerprint(),
+        'chrome_version': chrome_version,
+        'missing_packages': missing_packages,
+        'ok': bool(chrome_version) and not missing_packages,
+    }
+
+
+def load_cached_environment():
+    try:
+        with open(environment_cache_path) as cache_file:
+            return json.load(cache_file)
+    except Exception:
+        return None
+
+
+def save_cached_environment(environment):
+    try:
+        os.makedirs(os.path.dirname(environment_cache_path), exist_ok=True)
+        with open(environment_cache_path, "w") as cache_file:
+            json.dump(environment, cache_file)
+    except Exception as e:
+        print(f"Warning: Could not cache environment check result: {e}")
+
+
+def install_system_dependencies():
+    print("\n--- Installing System Dependencies (wget, xvfb, Google Chrome) ---")
+    try:
+        subprocess.run(["apt-get", "update"], check=False)
+        subprocess.run(["apt-get", "install", "-y", "wget", "xvfb"], check=False)
+        if not get_chrome_version():
+            print("Google Chrome not detected. Downloading and installing...")
+            subprocess.run(["wget", chrome_deb_url, "-O", "google-chrome-stable_current_amd64.deb"], check=False)
+            subprocess.run(["dpkg", "-i", "google-chrome-stable_current_amd64.deb"], check=False)
+            # Fix broken dependencies - crucial for Chrome installation to complete
+            subprocess.run(["apt-get", "install", "-f", "-y"], check=False)
+        print("System dependency installation attempted.")
+    except Exception as e:
+        print(f"--- ERROR: System Dependency or Chrome Installation Failed ---")
+        print(f"Error details: {e}")
+
+
+def install_python_packages(packages):
+    print(f"\n--- Installing Python Packages ({', '.join(packages)}) ---")
+    try:
+        subprocess.run([sys.executable, "-m", "pip", "install"] + list(packages), check=False)
+    except Exception as e:
+        print(f"--- ERROR: Python Package Installation Failed ---")
+        print(f"Error details: {e}")
+
+
+# Returns the environment check result, using the cached one when it is still valid.
+# Only successful checks are cached, so a broken environment is re-checked every run.
+def ensure_environment(install_missing=False, recheck=False):
+    if not recheck:
+        cached = load_cached_environment()
+        if cached and cached.get('ok') and cached.get('fingerprint') == environment_fingerprint():
+            return cached
+
+    environment = check_environment()
+    if not environment['ok'] and install_missing:
+        if not environment['chrome_version']:
+            install_system_dependencies()
+        if environment['missing_packages']:
+            install_python_packages(environment['missing_packages'])
+        environment = check_environment()
+
+    if environment['ok']:
+        save_cached_environment(environment)
+    else:
+        print("--- WARNING: Environment check failed ---")
+        if not environment['chrome_version']:
+            print(f"Google Chrome was not found at '{chrome_binary_location}'.")
+        if environment['missing_packages']:
+            print(f"Missing Python packages: {', '.join(environment['missing_packages'])}")
+        print("Re-run with --install-missing to install them.")
+    return environment
@@ -0,0 +1,255 @@
+# --- Place Coordinates, Spatial Index and Polygon Filter ---
+# Every place link in the results feed already carries the place's position:
+#   https://www.google.com/maps/place/Banter/data=!4m7!3m6!1s0x...!8m2!3d40.7489!4d-73.9833!16s...
+# (!3d<latitude>!4d<longitude>), so coordinates cost no page load at all.
+# GridIndex buckets points into fixed-size lat/lng cells for radius, bounding-box
+# and nearest-neighbour queries over stored results, and the polygon helpers drop
+# links outside a target area before any detail page is fetched.
+# Polygons are read from GeoJSON (Polygon, MultiPolygon, Feature or
+# FeatureCollection; [lng, lat] order as per the spec) or from a text file with
+# one "lat,lng" vertex per line.
+
+import json
+import math
+import re
+
+coordinate_pattern = re.compile(r"!3d(-?\d+(?:\.\d+)?)!4d(-?\d+(?:\.\d+)?)")
+latitude_column = 'Latitude'
+longitude_column = 'Longitude'
+coordinate_columns = [latitude_column, longitude_column]
+link_columns = ['Google Maps Link', 'Business Link']
+
+earth_radius_m = 6371008.8
+meters_per_degree = math.pi * earth_radius_m / 180.0
+
+
+# Returns (lat, lng) from a place URL, or None if the URL has no place coordinates.
+# The last match wins: search URLs can carry several !3d/!4d pairs and the place's own comes last.
+def coordinates_from_url(url):
+    if not url:
+        return None
+    matches = coordinate_pattern.findall(url)
+    if not matches:
+        return None
+    lat, lng = float(matches[-1][0]), float(matches[-1][1])
+    if not (-90.0 <= lat <= 90.0 and -180.0 <= lng <= 180.0):
+        return None
+    return lat, lng
+
+
+# {'Latitude': ..., 'Longitude': ...} for a result row, with 'N/A' when the URL has none
+def coordinate_fields(url):
+    coordinates = coordinates_from_url(url)
+    if coordinates is None:
+        return {latitude_column: 'N/A', longitude_column: 'N/A'}
+    return {latitude_column: coordinates[0], longitude_column: coordinates[1]}
+
+
+def haversine_m(lat1, lng1, lat2, lng2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * earth_radius_m * math.asin(min(1.0, math.sqrt(a)))
+
+
+# --- Grid Spatial Index ---
+# Points go into cell_degrees x cell_degrees cells (0.01 deg is about 1.1 km of latitude,
+# roughly a few city blocks to a ZIP code), so a query only looks at the cells it overlaps.
+class GridIndex:
+    def __init__(self, cell_degrees=0.01):
+        self.cell_degrees = cell_degrees
+        self.cells = {}
+        self.count = 0
+        self.bounds = None # (min_row, min_col, max_row, max_col) of the occupied cells
+
+    def _cell(self, lat, lng):
+        return int(math.floor(lat / self.cell_degrees)), int(math.floor(lng / self.cell_degrees))
+
+    def insert(self, lat, lng, item):
+        row, col = self._cell(lat, lng)
+        self.cells.setdefault((row, col), []).append((lat, lng, item))
+        self.count += 1
+        if self.bounds is None:
+            self.bounds = (row, col, row, col)
+        else:
+            min_row, min_col, max_row, max_col = self.bounds
+            self.bounds = (min(min_row, row), min(min_col, col), max(max_row, row), max(max_col, col))
+
+    def __len__(self):
+        return self.count
+
+    # [(lat, lng, item)] inside the box (edges included)
+    def within_bbox(self, south, west, north, east):
+        if self.bounds is None:
+            return []
+        # Only the part of the box that overlaps occupied cells is scanned
+        min_row, min_col = self._cell(south, west)
+        max_row, max_col = self._cell(north, east)
+        min_row, min_col = max(min_row, self.bounds[0]), max(min_col, self.bounds[1])
+        max_row, max_col = min(max_row, self.bounds[2]), min(max_col, self.bounds[3])
+        if min_row > max_row or min_col > max_col:
+            return []
+        if (max_row - min_row + 1) * (max_col - min_col + 1) > len(self.cells):
+            # Huge box over a sparse grid: walking the occupied cells is cheaper
+            cell_keys = [(row, col) for row, col in self.cells
+                         if min_row <= row <= max_row and min_col <= col <= max_col]
+        else:
+            cell_keys = [(row, col) for row in range(min_row, max_row + 1) for col in range(min_col, max_col + 1)]
+        found = []
+        for cell_key in cell_keys:
+            for lat, lng, item in self.cells.get(cell_key, ()):
+                if south <= lat <= north and west <= lng <= east:
+                    found.append((lat, lng, item))
+        return found
+
+    # [(distance_m, lat, lng, item)] within radius_m, nearest first
+    def within_radius(self, lat, lng, radius_m):
+        lat_span = radius_m / meters_per_degree
+        # Longitude degrees shrink towards the poles; clamp so the box stays finite near them
+        lng_span = radius_m / (meters_per_degree * max(math.cos(math.radians(min(abs(lat) + lat_span, 89.9))), 1e-6))
+        found = []
+        for point_lat, point_lng, item in self.within_bbox(lat - lat_span, lng - lng_span, lat + lat_span, lng + lng_span):
+            distance = haversine_m(lat, lng, point_lat, point_lng)
+            if distance <= radius_m:
+                found.append((distance, point_lat, point_lng, item))
+        found.sort(key=lambda hit: hit[0])
+        return found
+
+    # [(distance_m, lat, lng, item)] for the k nearest points, nearest first
+    def nearest(self, lat, lng, k=1):
+        if not self.count or k <= 0:
+            return []
+        # Grow a ring of cells until it holds k candidates; the k-th candidate's distance then
+        # bounds the answer, and one radius query with it returns the exact k nearest
+        center_row, center_col = self._cell(lat, lng)
+        min_row, min_col, max_row, max_col = self.bounds
+        # Rings closer than the occupied area are empty, and cells outside it are never visited
+        ring = max(min_row - center_row, center_row - max_row, min_col - center_col, center_col - max_col, 0)
+        max_ring = max(abs(center_row - min_row), abs(center_row - max_row),
+                       abs(center_col - min_col), abs(center_col - max_col))
+        candidates = []
+        while len(candidates) < k and ring <= max_ring:
+            for row in range(max(center_row - ring, min_row), min(center_row + ring, max_row) + 1):
+                if abs(row - center_row) == ring:
+                    cols = range(max(center_col - ring, min_col), min(center_col + ring, max_col) + 1)
+                else:
+                    cols = [col for col in (center_col - ring, center_col + ring) if min_col <= col <= max_col]
+                for col in cols:
+                    for point_lat, point_lng, item in self.cells.get((row, col), ()):
+                        candidates.append(haversine_m(lat, lng, point_lat, point_lng))
+            ring += 1
+        candidates.sort()
+        bound_m = candidates[min(k, len(candidates)) - 1]
+        return self.within_radius(lat, lng, bound_m * (1 + 1e-9) + 1e-6)[:k]
+
+
+# Builds a GridIndex over result rows (dicts or a DataFrame). Coordinates come from the
+# Latitude/Longitude columns when present, otherwise from the link. Rows without any are skipped.
+def build_spatial_index(rows, cell_degrees=0.01):
+    if hasattr(rows, 'to_dict'):
+        rows = rows.to_dict('records')
+    index = GridIndex(cell_degrees=cell_degrees)
+    for row in rows:
+        coordinates = row_coordinates(row)
+        if coordinates is not None:
+            index.insert(coordinates[0], coordinates[1], row)
+    return index
+
+
+def row_coordinates(row):
+    try:
+        lat, lng = float(row[latitude_column]), float(row[longitude_column])
+        if not (math.isnan(lat) or math.isnan(lng)):
+            return lat, lng
+    except (KeyError, TypeError, ValueError):
+        pass
+    for column in link_columns:
+        coordinates = coordinates_from_url(row.get(column)) if isinstance(row.get(column), str) else None
+        if coordinates is not None:
+            return coordinates
+    return None
+
+
+# --- Polygon Filter ---
+# A polygon is a list of rings of (lat, lng) vertices: the outer ring first, then holes.
+# An area is a list of polygons (a MultiPolygon).
+def load_polygon(path):
+    with open(path, encoding='utf-8') as polygon_file:
+        text = polygon_file.read()
+    if text.lstrip().startswith('{'):
+        return polygons_from_geojson(json.loads(text))
+    ring = []
+    for line in text.splitlines():
+        line = line.split('#', 1)[0].strip()
+        if line:
+            lat, lng = (float(value) for value in line.replace(';', ',').split(',')[:2])
+            ring.append((lat, lng))
+    if len(ring) < 3:
+        raise ValueError(f"Polygon file '{path}' needs at least 3 'lat,lng' vertices")
+    return [[ring]]
+
+
+def polygons_from_geojson(geojson):
+    geometry_type = geojson.get('type')
+    if geometry_type == 'FeatureCollection':
+        return [polygon for feature in geojson.get('features', []) for polygon in polygons_from_geojson(feature)]
+    if geometry_type == 'Feature':
+        return polygons_from_geojson(geojson.get('geometry') or {})
+    if geometry_type == 'Polygon':
+        return [[[(lat, lng) for lng, lat, *_ in ring] for ring in geojson['coordinates']]]
+    if geometry_type == 'MultiPolygon':
+        return [[[(lat, lng) for lng, lat, *_ in ring] for ring in polygon] for polygon in geojson['coordinates']]
+    raise ValueError(f"Unsupported GeoJSON type for a polygon filter: {geometry_type}")
+
+
+# Even-odd ray casting in plain lat/lng (fine at city scale, not across the antimeridian)
+def point_in_ring(lat, lng, ring):
+    inside = False
+    previous_lat, previous_lng = ring[-1]
+    for vertex_lat, vertex_lng in ring:
+        if (vertex_lat > lat) != (previous_lat > lat):
+            crossing_lng = vertex_lng + (lat - vertex_lat) * (previous_lng - vertex_lng) / (previous_lat - vertex_lat)
+            if lng < crossing_lng:
+                inside = not inside
+        previous_lat, previous_lng = vertex_lat, vertex_lng
+    return inside
+
+
+def point_in_area(lat, lng, area):
+    for rings in area:
+        if point_in_ring(lat, lng, rings[0]) and not any(point_in_ring(lat, lng, hole) for hole in rings[1:]):
+            return True
+    return False
+
+
+def area_bbox(area):
+    vertices = [vertex for rings in area for vertex in rings[0]]
+    return (min(lat for lat, _ in vertices), min(lng for _, lng in vertices),
+            max(lat for lat, _ in vertices), max(lng for _, lng in vertices))
+
+
+# Keeps the links whose coordinates fall inside the area. Links without coordinates are
+# dropped unless keep_unlocated is set. Returns the kept links in their original order.
+def filter_links_to_polygon(links, area, keep_unlocated=False):
+    south, west, north, east = area_bbox(area)
+    kept = []
+    outside = 0
+    unlocated = 0
+    for link in links:
+        coordinates = coordinates_from_url(link)
+        if coordinates is None:
+            unlocated += 1
+            if keep_unlocated:
+                kept.append(link)
+            continue
+        lat, lng = coordinates
+        # Cheap bounding-box rejection before the ray casting
+        if south <= lat <= north and west <= lng <= east and point_in_area(lat, lng, area):
+            kept.append(link)
+        else:
+            outside += 1
+    print(f"Polygon filter: kept {len(kept)} of {len(links)} links "
+          f"({outside} outside the area, {unlocated} without coordinates"
+          f"{', kept' if keep_unlocated else ', dropped'}).")
+    return kept
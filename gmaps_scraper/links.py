@@ -0,0 +1,494 @@
+# --- Google Maps Business Link Collector ---
+# Navigates to Google Maps, runs a search, scrolls the results feed and collects
+# the detail page link of every result. Selenium and pandas are imported inside
+# the functions that need them so importing this module stays cheap.
+
+import time
+import re
+import hashlib
+
+from .driver import setup_driver, close_driver
+from .rate_limit import rate_limited, detect_block_signal, maps_search_target
+from .selector_registry import get_selector_registry, SelectorDriftError
+from .geo import coordinate_fields, coordinate_columns
+
+# The Google Maps base URL (the autotuner points this at a local stand-in server, see standin.py)
+maps_base_url = "https://www.google.com/maps"
+
+
+# --- CARD DATA: Cheap Per-Result Fields Read From the Feed While Scrolling ---
+# Every result card in the feed already shows the name, rating, review count and
+# category. Reading them costs one JS call per scroll step (no detail page load),
+# and a fingerprint of them lets a refresh run detect places that likely changed.
+# Returns [href, aria-label, card text] for every result link in the list container.
+card_data_script = """
+var rows = [];
+arguments[0].querySelectorAll(arguments[1]).forEach(function(a) {
+    var card = a.parentElement;
+    rows.push([a.href, a.getAttribute('aria-label') || '', card ? card.innerText : '']);
+});
+return rows;
+"""
+
+# Example card text: "Banter NYC\n4.5(1,234)\nCafe · $$ · 6 E 36th St\nOpen ⋅ Closes 10 PM"
+card_rating_pattern = re.compile(r"\b([1-5][.,]\d)\s*\(([\d.,\s]+)\)")
+
+
+def parse_card_text(card_name, card_text):
+    card = {
+        'Card Name': (card_name or '').strip() or 'N/A',
+        'Card Rating': 'N/A',
+        'Card Reviews': 'N/A',
+        'Card Category': 'N/A',
+    }
+    lines = [line.strip() for line in (card_text or '').split('\n') if line.strip()]
+    for line_index, line in enumerate(lines):
+        rating_match = card_rating_pattern.search(line)
+        if rating_match:
+            card['Card Rating'] = rating_match.group(1).replace(',', '.')
+            card['Card Reviews'] = re.sub(r"[^\d]", "", rating_match.group(2)) or 'N/A'
+            # The category is the first '·'-separated part of the line after the rating
+            if line_index + 1 < len(lines):
+                card['Card Category'] = lines[line_index + 1].split('·')[0].strip() or 'N/A'
+            break
+    card['Card Fingerprint'] = card_fingerprint(card)
+    return card
+
+
+# Fingerprint of the card fields that indicate a real change to the place.
+# The review count is left out on purpose: it moves for every new review and
+# would mark almost every popular place as changed on every sweep.
+def card_fingerprint(card):
+    fingerprint_source = "|".join([
+        card.get('Card Name', 'N/A'),
+        card.get('Card Rating', 'N/A'),
+        card.get('Card Category', 'N/A'),
+    ])
+    return hashlib.sha1(fingerprint_source.encode('utf-8')).hexdigest()[:16]
+
+
+# --- LIMIT / TOP-K MODE: Card Predicates ---
+# A card predicate decides from the feed card alone (no detail page) whether a place counts
+# towards a target count. Returns None when no condition is set, i.e. every place qualifies.
+# categories match case-insensitively as substrings of 'Card Category' ("pizza" matches "Pizza restaurant").
+def build_card_predicate(min_rating=None, categories=None):
+    if min_rating is None and not categories:
+        return None
+    category_terms = [category.strip().lower() for category in categories or [] if category.strip()]
+
+    def card_predicate(card):
+        if min_rating is not None:
+            try:
+                if float(card.get('Card Rating', 'N/A')) < min_rating:
+                    return False
+            except (TypeError, ValueError):
+                return False # Unrated places never meet a rating floor
+        if category_terms:
+            card_category = str(card.get('Card Category', '')).lower()
+            if not any(term in card_category for term in category_terms):
+                return False
+        return True
+
+    return card_predicate
+
+
+# Links (in the given order) whose card passes the predicate, at most target_count of them.
+# Links without card data only qualify when there is no predicate.
+def select_top_links(links, card_data=None, target_count=None, card_predicate=None):
+    selected = []
+    for link in links:
+        if target_count and len(selected) >= target_count:
+            break
+        if card_predicate is not None:
+            card = (card_data or {}).get(link)
+            if card is None or not card_predicate(card):
+                continue
+        selected.append(link)
+    return selected
+
+
+# The search went straight to one place's panel (the query matched a single place):
+# that place is the whole result. Returns [its link], or [] if the card predicate rejects it.
+def single_place_result(driver, registry, card_data=None, card_predicate=None):
+    place_link = driver.current_url
+    print(f"Search opened a single place instead of a results list: {place_link}")
+    name_element = registry.find(driver, 'detail_name', timeout=5)
+    card = parse_card_text(name_element.text if name_element is not None else '', '')
+    category_element = registry.find(driver, 'detail_category', timeout=2)
+    if category_element is not None and category_element.text.strip():
+        card['Card Category'] = category_element.text.strip()
+        card['Card Fingerprint'] = card_fingerprint(card)
+    if card_data is not None:
+        card_data[place_link] = card
+    if card_predicate is not None and not card_predicate(card):
+        print("The single place does not match the card filters.")
+        return []
+    return [place_link]
+
+
+# --- FUNCTION TO NAVIGATE, SEARCH, SCROLL, AND COLLECT ALL ITEM LINKS ---
+# This function navigates, searches, finds the list container,
+# scrolls through the list to load all items, and collects their detail page links.
+# Uses robust scrolling, end detection, and retries on no new links based on provided HTML structure.
+# If a card_data dict is passed in, it is filled with {link: card fields} read from the feed cards.
+# Selectors come from the selector registry (selector_registry.py); SelectorDriftError is raised when the
+# search box can no longer be found with any of them.
+# Limit mode: with target_count and/or card_predicate (see build_card_predicate) only qualifying links are
+# returned, in feed order, and scrolling stops as soon as target_count of them have been seen.
+def navigate_search_and_collect_all_item_links(driver, query="hotels in ny 10016", card_data=None, registry=None,
+                                               target_count=None, card_predicate=None, base_url=None):
+    if not driver:
+        print("--- Skipping process: Driver is not available. ---")
+        return [] # Indicate failure by returning empty list
+
+    registry = registry or get_selector_registry()
+
+    # Define the Google Maps base URL
+    search_url = base_url or maps_base_url
+    # Registry fields used below (see selector_registry.py for the fallback chains):
+    #   search_input / search_button  - #searchboxinput / #searchbox-searchbutton
+    #   feed_container                - div[role="feed"], the scrollable results list
+    #   feed_item_link                - a.hfpxzc, one clickable link per result
+    #   feed_end_of_list              - div.m6QErb.XiKgde.tLjsW.eKbjU, the "End of list" message
+    # All item link fallbacks at once, for the card data JS
+    business_item_link_selector = ", ".join(registry.selectors('feed_item_link'))
+
+
+    # --- Step 5-8: Navigate, Search Input, and Submission ---
+    print(f"\n--- Steps 5-8: Navigating to Google Maps and Performing Search ---")
+    try:
+        print(f"Navigating to URL: {search_url}")
+        with rate_limited(maps_search_target, proxy=getattr(driver, 'proxy', None)) as load_outcome:
+            driver.get(search_url)
+            load_outcome['blocked'] = detect_block_signal(driver)
+        print("Navigation command sent. Waiting for page load...")
+
+        # Wait for and find the search input field
+        print("Waiting for search input element...")
+        search_input_element = registry.find(driver, 'search_input', timeout=20)
+        if search_input_element is None:
+            raise Exception("Search input not found")
+        print("Search input field found.")
+
+        # Enter the search query
+        print(f"Entering query: '{query}'")
+        search_input_element.clear() # Clear any existing text
+        search_input_element.send_keys(query)
+        print("Query entered.")
+
+        # Wait for and find the search button, then click
+        print("Waiting for search button...")
+        search_button_element = registry.find(driver, 'search_button', timeout=10)
+        if search_button_element is None:
+            raise Exception("Search button not found")
+        print("Search button found. Clicking...")
+        search_button_element.click()
+        print("Search button clicked.")
+
+        # Wait for the search results list panel to load after clicking search.
+        # A query that matches a single place opens that place's panel instead of a list.
+        print("Waiting for search results list container to appear...")
+        landed_on = registry.wait_for_any(driver, ['feed_container', 'detail_name'], timeout=30) # Increased wait for initial results
+        if landed_on == 'detail_name':
+            return single_place_result(driver, registry, card_data, card_predicate)
+        business_list_element = registry.find(driver, 'feed_container', timeout=10)
+        if business_list_element is None:
+            raise Exception("Search results list container not found")
+        print("Business list container found.")
+        time.sleep(3) # Small buffer after list appears
+
+
+    except SelectorDriftError:
+         raise
+    except Exception as e:
+         print(f"--- ERROR during Steps 5-8: An error occurred during initial navigation or waiting for elements ---")
+         print(f"Error details: {e}")
+         return [] # Stop here if initial steps failed
+
+
+    # --- Step 9 & 10: Scrolling and Collecting ALL Item Links ---
+    print(f"\n--- Step 9 & 10: Starting Robust Scrolling and Collecting ALL Item Links ---")
+
+    collected_links_set = set() # Use a set to store unique links
+    # --- Limit mode state ---
+    limit_mode = bool(target_count) or card_predicate is not None
+    qualifying_links = [] # Qualifying links in the order the feed showed them
+    if card_predicate is not None and card_data is None:
+        card_data = {} # The predicate needs the card fields even when the caller does not keep them
+    scroll_pause_time = 2 # Longest wait for new items after each scroll (returns early once they appear)
+    scroll_poll_interval = 0.25
+    scroll_attempts = 0
+    max_scroll_attempts = 1000 # Safety break
+    # --- ADDED for retry logic ---
+    consecutive_no_new_links = 0
+    max_consecutive_no_new_links = 3 # Stop after 3 scrolls yield no *new unique* links (initial check + 2 retries)
+    # --- END ADDED ---
+
+
+    print("Starting scrolling process...")
+    try:
+        # Ensure the list container element is valid before starting the loop
+        # Re-find the list element to avoid StaleElementReferenceException
+        business_list_element = registry.find(driver, 'feed_container', timeout=10)
+        if business_list_element is None:
+            raise Exception("Search results list container not found")
+        print("Ready to begin scrolling loop.")
+
+        while True:
+            # --- Re-find elements and collect links in the loop ---
+            # Re-find the list element each iteration
+            try:
+                 business_list_element = registry.find(driver, 'feed_container', timeout=10)
+                 if business_list_element is None:
+                     raise Exception("list container not found")
+                 # Wait until at least one link element is present within the list
+                 # Use a shorter wait here as we are mid-scroll
+                 if registry.find(business_list_element, 'feed_item_link', timeout=5) is None:
+                     raise Exception("no link elements in the list")
+            except Exception as e:
+                 print(f"Warning: Could not re-find list container or find any link elements in scroll loop: {e}. This might indicate the list disappeared or is empty.")
+                 break # Exit loop if list element or links within are not found/stale
+
+            # Store the number of links before collecting in this iteration
+            previous_total_unique_links = len(collected_links_set)
+
+            # Find all current item link elements visible in the list container
+            item_link_elements = registry.find(business_list_element, 'feed_item_link', many=True)
+            # print(f"Found {len(item_link_elements)} links on current view.")
+
+            # Collect hrefs of link elements currently in view and add to set
+            if card_data is not None:
+                # One JS call returns every link together with its card fields
+                try:
+                    card_rows = driver.execute_script(card_data_script, business_list_element, business_item_link_selector)
+                    for link_href, card_name, card_text in card_rows or []:
+                        if link_href:
+                            is_new_link = link_href not in collected_links_set
+                            collected_links_set.add(link_href)
+                            card_data[link_href] = parse_card_text(card_name, card_text)
+                            if limit_mode and is_new_link and (card_predicate is None or card_predicate(card_data[link_href])):
+                                qualifying_links.append(link_href)
+                except Exception as e:
+                    print(f"Warning: Could not read card data in this scroll step: {e}")
+            else:
+                for element in item_link_elements:
+                    try:
+                        link_href = element.get_attribute('href')
+                        if link_href:
+                            if limit_mode and link_href not in collected_links_set:
+                                qualifying_links.append(link_href)
+                            collected_links_set.add(link_href)
+                    except Exception as e:
+                        # Handle potential stale element reference or other issues
+                        pass # Silently skip problematic elements
+
+            current_total_unique_links = len(collected_links_set)
+            print(f"Scroll attempt {scroll_attempts + 1}: Total unique links found so far: {current_total_unique_links}")
+            if limit_mode:
+                print(f"Qualifying links so far: {len(qualifying_links)}" + (f"/{target_count}" if target_count else ""))
+
+            # *** Limit Mode Stop Condition: Enough Qualifying Places ***
+            if target_count and len(qualifying_links) >= target_count:
+                print(f"Reached the target of {target_count} qualifying links. Stopping scroll.")
+                break # Exit the while loop
+
+
+            # *** Primary Stop Condition: Check for End of List Message ***
+            try:
+                # Use find_elements to avoid exception if not present
+                end_element = registry.find(driver, 'feed_end_of_list')
+                if end_element:
+                    print("Detected 'End of list' element. Stopping scroll.")
+                    break # Exit the while loop
+            except Exception as e:
+                # This catch is less likely with find_elements but good practice
+                print(f"Error checking for end element: {e}")
+                pass
+
+
+            # *** Secondary Stop Condition: Check for Progress ***
+            # If no new unique links were added in this iteration
+            if current_total_unique_links == previous_total_unique_links:
+                 consecutive_no_new_links += 1
+                 print(f"No new unique links found in this scroll step. Consecutive attempts with no new links: {consecutive_no_new_links}/{max_consecutive_no_new_links}")
+            else:
+                 # Progress was made, reset the counter
+                 consecutive_no_new_links = 0
+
+            # If we've had too many consecutive scrolls with no new links, assume we're at the end or stuck
+            if consecutive_no_new_links >= max_consecutive_no_new_links:
+                print(f"Reached {max_consecutive_no_new_links} consecutive attempts with no new links. Assuming end of list or stuck. Stopping scroll.")
+                break # Exit loop
+
+
+            # Safety break for infinite loops (based on total scroll attempts)
+            if scroll_attempts >= max_scroll_attempts:
+                print(f"Warning: Reached maximum scroll attempts ({max_scroll_attempts}). Stopping scroll.")
+                break # Exit loop
+
+            scroll_attempts += 1 # Increment scroll attempt counter
+
+            # *** Scroll Method ***
+            # Each scroll holds a slot of the shared 'maps-search' rate limiter, which paces the
+            # scrolls and learns from how quickly the feed answers (and from block pages)
+            with rate_limited(maps_search_target, proxy=getattr(driver, 'proxy', None)) as scroll_outcome:
+                # Scroll the list container by scrolling the last found element into view
+                try:
+                    print(f"Scrolling last element into view (Attempt {scroll_attempts})...")
+                    item_link_elements = registry.find(business_list_element, 'feed_item_link', many=True)
+                    items_before_scroll = len(item_link_elements)
+                    if item_link_elements: # Ensure there's at least one element to scroll to
+                         last_item = item_link_elements[-1] # Get the last element found
+                         driver.execute_script("arguments[0].scrollIntoView(true);", last_item)
+                    else:
+                         # Fallback if no items found, try scrolling the container itself a bit
+                         driver.execute_script("arguments[0].scrollTop += arguments[0].clientHeight * 0.8;", business_list_element) # Scroll by 80% of viewable height
+
+
+                except Exception as scroll_e:
+                     print(f"--- ERROR during scroll attempt {scroll_attempts}: {scroll_e}. Cannot scroll.")
+                     break # Exit loop if scrolling fails
+
+
+                # Wait for new items to load after scrolling: stop as soon as more items are in the
+                # list (or the end marker shows up), at most scroll_pause_time seconds
+                wait_deadline = time.time() + scroll_pause_time
+                while time.time() < wait_deadline:
+                    time.sleep(scroll_poll_interval)
+                    try:
+                        if len(registry.find(business_list_element, 'feed_item_link', many=True)) > items_before_scroll:
+                            break
+                        if registry.find(driver, 'feed_end_of_list') is not None:
+                            break
+                    except Exception:
+                        break # Stale list element: the next loop iteration re-finds it
+                scroll_outcome['blocked'] = detect_block_signal(driver)
+
+
+    except Exception as e:
+        # This catches unexpected errors in the main scrolling loop body
+        print(f"--- UNEXPECTED ERROR during Step 9 & 10: An error occurred during scrolling and collection ---")
+        print(f"Error details: {e}")
+        print("Attempting to stop scrolling and continue with links collected so far.")
+
+
+    print(f"\n--- Finished Robust Scrolling and Collecting Item Links ---")
+    print(f"Final number of unique item links collected: {len(collected_links_set)}")
+
+    if limit_mode:
+        qualifying_links = qualifying_links[:target_count] if target_count else qualifying_links
+        print(f"Returning {len(qualifying_links)} qualifying links (limit mode).")
+        return qualifying_links
+
+    # Return the list of unique collected links
+    return list(collected_links_set) # Convert set back to list for processing
+
+
+# --- Main Process: Navigate, Search, Scroll, Collect Links Only, Export ---
+# This function orchestrates the process of collecting all business links via scrolling.
+# Returns the list of links.
+# Pass a card_data dict to also collect the feed card fields (used by the refresh mode in refresh.py);
+# they are then exported as extra CSV columns next to each link.
+# target_count / card_predicate turn on limit mode (see navigate_search_and_collect_all_item_links).
+def run_full_extraction_process(query="hotels in ny 10016", csv_filename="Maps_business_links.csv", card_data=None,
+                                target_count=None, card_predicate=None):
+    print("--- Step 0: Starting Full Link Extraction Process ---")
+    get_selector_registry().reset() # Circuits from an earlier run in this process do not carry over
+    import pandas as pd
+
+    # Call the setup function
+    driver, display = setup_driver()
+
+    # Check if driver setup was successful
+    if not driver:
+        print("--- Process Aborted: Driver setup failed. ---")
+        if display:
+            try:
+                display.stop()
+            except: pass
+        return [] # Return empty list on failure
+
+    # List to store unique collected detail page links
+    collected_links = []
+    df = pd.DataFrame(columns=['Business Link']) # Initialize empty DataFrame outside try
+
+    try: # Use a try block for the main process to ensure cleanup happens
+        # --- Steps 5-10: Navigate, Search, Robust Scroll, and Collect ALL Item Links ---
+        collected_links = navigate_search_and_collect_all_item_links(driver, query=query, card_data=card_data,
+                                                                     target_count=target_count,
+                                                                     card_predicate=card_predicate)
+
+        # --- Step 11: Creating DataFrame from Links (Inside the function now) ---
+        print(f"\n--- Step 11: Creating DataFrame from Collected Links ---")
+        if collected_links:
+            # Create a DataFrame with a single column for the links
+            df = pd.DataFrame(collected_links, columns=['Business Link'])
+            # Coordinates come straight from the link (!3d<lat>!4d<lng>), no page load needed
+            coordinates = [coordinate_fields(link) for link in collected_links]
+            for column in coordinate_columns:
+                df[column] = [fields[column] for fields in coordinates]
+            if card_data:
+                card_columns = ['Card Name', 'Card Rating', 'Card Reviews', 'Card Category', 'Card Fingerprint']
+                for column in card_columns:
+                    df[column] = [card_data.get(link, {}).get(column, 'N/A') for link in collected_links]
+            print(f"DataFrame created with {len(df)} links.")
+        else:
+            print("No links were collected, creating empty DataFrame.")
+            # df is already initialized as empty DataFrame with column
+
+        # --- Step 12: Exporting Data to CSV (Inside the function now) ---
+        print(f"\n--- Step 12: Exporting Data to CSV ---")
+        # Export only if DataFrame is not empty
+        if not df.empty and csv_filename:
+            try:
+                csv_filename = csv_filename # Use the filename passed to the function
+                df.to_csv(csv_filename, index=False)
+                print(f"Data successfully saved to '{csv_filename}'")
+
+            except Exception as e:
+                print(f"--- ERROR during Step 12: Failed to save data to CSV ---")
+                print(f"Error details: {e}")
+        else:
+            print("DataFrame is empty. Skipping CSV export.")
+
+
+        # --- Step 13: Reporting and Displaying Final Collected Links (Inside the function now) ---
+        print(f"\n--- Step 13: Reporting and Displaying Final Collected Links ---")
+        print(f"Total links collected: {len(collected_links)}") # Report based on the list itself
+        if not df.empty: # Check if DataFrame is not empty
+             print("\nCollected Links (All rows):")
+
+             # Ensure pandas options allow full display for this final print
+             pd.set_option('display.max_rows', None)
+             pd.set_option('display.max_columns', None)
+             # pd.set_option('display.width', None) # Optional
+
+             try:
+                 print(df.to_markdown(index=False))
+             except ImportError:
+                  print(df)
+
+             # Optional: Reset display options afterwards if needed
+             # pd.reset_option('display.max_rows')
+             # pd.reset_option('display.max_columns')
+             # pd.reset_option('display.width')
+
+        else:
+            print("No links to display.")
+
+
+    except Exception as e:
+        # Catching unexpected exceptions during the process
+        print(f"\n--- UNEXPECTED ERROR during full extraction process ---")
+        print(f"Error details: {e}")
+        print("Attempting cleanup and returning collected links so far.")
+        # df will already be initialized or populated, no need to recreate here.
+
+
+    finally: # This block always runs whether there was an error or not
+        print("\n--- Step 14: Cleaning up Selenium Driver and Virtual Display ---")
+        close_driver(driver, display, step_label="Step 14")
+
+    # Return the list of collected links
+    return collected_links
+
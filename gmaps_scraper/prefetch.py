@@ -0,0 +1,151 @@
+# --- Background-Tab Prefetching for Detail Pages ---
+# Without prefetching the browser idles while Python reads the fields of page i,
+# and Python idles while page i+1 loads. TabPrefetcher keeps up to `depth` extra
+# tabs of the same Chrome loading the next URLs (window.open from the current
+# tab, so the current tab never has a navigation in flight) while the current
+# page is being read. When the scraper reaches a prefetched URL it switches to
+# that tab and closes the one it just finished, so the browser holds at most
+# depth + 1 tabs. A prefetched page was read, not loaded, in the time the caller
+# measures for it, so that time is kept out of the watchdog's latency statistics.
+# Every prefetched load takes a 'maps-place' rate limiter slot, but only when one
+# is free right now (try_reserve): prefetching never waits for the limiter and
+# never exceeds the concurrency the limiter has learned to be safe.
+
+import time
+
+from .rate_limit import try_reserve, release_reservation, maps_place_target
+
+# Navigation Timing of the current document, in seconds (0 while it is still loading)
+navigation_duration_script = """
+var entries = performance.getEntriesByType('navigation');
+return entries.length ? entries[0].duration / 1000 : 0;
+"""
+
+
+class PrefetchedPage:
+    def __init__(self, url, handle, reservation):
+        self.url = url
+        self.handle = handle
+        self.reservation = reservation
+        self.started = time.monotonic()
+
+    # Reports the page load to the rate limiters. The latency is the page's own load time
+    # (Navigation Timing), not the time it then sat waiting in the background.
+    def finish(self, driver, blocked=False):
+        if self.reservation is None:
+            return
+        elapsed = time.monotonic() - self.started
+        try:
+            load_seconds = float(driver.execute_script(navigation_duration_script) or 0)
+        except Exception:
+            load_seconds = 0
+        latency = min(elapsed, load_seconds) if load_seconds > 0 else elapsed
+        release_reservation(self.reservation, blocked=blocked, latency=latency)
+        self.reservation = None
+
+    def abandon(self):
+        if self.reservation is not None:
+            release_reservation(self.reservation, abandon=True)
+            self.reservation = None
+
+
+class TabPrefetcher:
+    def __init__(self, driver, depth=1, proxy=None, handle_wait_seconds=2):
+        self.driver = driver
+        self.depth = depth
+        self.proxy = proxy or getattr(driver, 'proxy', None)
+        self.handle_wait_seconds = handle_wait_seconds
+        self.pages = {} # url -> PrefetchedPage, in the order they were started
+        self.stats = {'prefetched': 0, 'used': 0, 'skipped_by_limiter': 0}
+
+    # Starts background loads for the first `depth` upcoming URLs that are not loading yet
+    def fill(self, upcoming_urls):
+        for url in upcoming_urls:
+            if len(self.pages) >= self.depth:
+                break
+            if not url or url == 'N/A' or url in self.pages:
+                continue
+            reservation = try_reserve(maps_place_target, proxy=self.proxy)
+            if reservation is None:
+                self.stats['skipped_by_limiter'] += 1
+                break # The limiter is at its concurrency; the page loads on demand later
+            handle = self._open_tab(url)
+            if handle is None:
+                release_reservation(reservation, abandon=True)
+                break
+            self.pages[url] = PrefetchedPage(url, handle, reservation)
+            self.stats['prefetched'] += 1
+
+    def _open_tab(self, url):
+        try:
+            known_handles = set(self.driver.window_handles)
+            self.driver.execute_script("window.open(arguments[0], '_blank');", url)
+            deadline = time.time() + self.handle_wait_seconds
+            while True:
+                new_handles = [handle for handle in self.driver.window_handles if handle not in known_handles]
+                if new_handles:
+                    return new_handles[0]
+                if time.time() >= deadline:
+                    print(f"Warning: Prefetch tab for {url} did not open.")
+                    return None
+                time.sleep(0.05)
+        except Exception as e:
+            print(f"Warning: Could not open a prefetch tab: {e}")
+            return None
+
+    # If url was prefetched: switches to the prefetched tab, closes the one just finished and returns
+    # its PrefetchedPage (call finish() once the page was checked). Otherwise returns None, and the
+    # caller loads the URL in the current tab.
+    def take(self, url):
+        page = self.pages.pop(url, None)
+        if page is None:
+            return None
+        try:
+            finished_handle = self.driver.current_window_handle
+            self.driver.switch_to.window(page.handle)
+        except Exception as e:
+            # The prefetched tab is gone (e.g. crashed); the current tab is still there to load the URL in
+            print(f"Warning: Could not switch to the prefetched tab of {url}: {e}")
+            page.abandon()
+            return None
+        try:
+            self.driver.switch_to.window(finished_handle)
+            self.driver.close()
+        except Exception as e:
+            print(f"Warning: Could not close the finished tab: {e}")
+        try:
+            self.driver.switch_to.window(page.handle)
+        except Exception as e:
+            print(f"Warning: Could not return to the prefetched tab of {url}: {e}")
+            page.abandon()
+            return None
+        self.stats['used'] += 1
+        return page
+
+    # Drops the prefetch of a URL that will not be read after all (e.g. its task went to another worker)
+    def discard(self, url):
+        page = self.pages.pop(url, None)
+        if page is not None:
+            self._close_page(page)
+
+    def _close_page(self, page, close_tab=True):
+        page.abandon()
+        if not close_tab:
+            return
+        try:
+            current_handle = self.driver.current_window_handle
+            self.driver.switch_to.window(page.handle)
+            self.driver.close()
+            self.driver.switch_to.window(current_handle)
+        except Exception:
+            pass # The browser may already be gone (recycle, crash)
+
+    # Releases the limiter slots of unused prefetches and closes their tabs
+    # (close_tabs=False when the browser is about to be quit anyway)
+    def close(self, close_tabs=True):
+        for page in self.pages.values():
+            self._close_page(page, close_tab=close_tabs)
+        self.pages.clear()
+
+    def summary(self):
+        return dict(self.stats, depth=self.depth)
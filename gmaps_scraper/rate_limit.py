@@ -0,0 +1,322 @@
+# --- Shared Rate Limiting: Token Buckets + AIMD Adaptive Concurrency ---
+# Replaces the fixed time.sleep(2) between detail pages and the fixed feed
+# scroll pause. Every driver acquires a slot before loading a page (or
+# scrolling the feed) and reports back how long it took and whether Google
+# answered with a block page. Each limiter then adapts AIMD-style:
+#   - a fast, unblocked response adds increase_step to the rate and, once per
+#     "window" of successes, one more concurrent slot (additive increase);
+#   - a slow response trims the rate, a block signal halves both the rate and
+#     the concurrency and pauses the limiter for block_cooldown seconds
+#     (multiplicative decrease).
+# Limiters are kept per target ('maps-place', 'maps-search', 'maps-reviews') and per proxy,
+# and shared by every driver in the process (threads included).
+# Across processes and nodes: queue workers call use_shared_rate_store(broker), and
+# then the token buckets live in the work queue broker (SQLite row / Redis hash,
+# updated atomically), so the rate is one budget for the whole sweep no matter how
+# many workers run. Concurrency slots stay per process (one browser each).
+# Without a shared store (plain links/details runs) the buckets are per process.
+
+import threading
+import time
+from contextlib import contextmanager
+
+maps_place_target = "maps-place"
+maps_search_target = "maps-search"
+maps_reviews_target = "maps-reviews"
+
+# Starting points roughly match the old fixed pauses; the limiters move from there
+default_limiter_settings = {
+    maps_place_target: {'initial_rate': 0.5, 'target_latency': 8.0},
+    maps_search_target: {'initial_rate': 1.0, 'target_latency': 3.0},
+    maps_reviews_target: {'initial_rate': 1.0, 'target_latency': 3.0},
+}
+
+block_url_markers = ['/sorry/', 'google.com/sorry']
+block_title_markers = ['unusual traffic']
+
+
+class TokenBucket:
+    def __init__(self, rate, burst=1.0):
+        self.rate = rate # Tokens per second
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    # Returns 0 if a token was taken, otherwise the seconds to wait before trying again
+    def try_take(self):
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if self.tokens >= 1.0:
+                self.tokens -= 1.0
+                return 0.0
+            return (1.0 - self.tokens) / self.rate
+
+    def take(self):
+        while True:
+            wait_seconds = self.try_take()
+            if wait_seconds <= 0:
+                return
+            time.sleep(wait_seconds)
+
+    def set_rate(self, rate):
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = rate
+
+    # rate = clamp(rate * multiplier + step), in one step; returns the new rate
+    def adjust_rate(self, multiplier=1.0, step=0.0, min_rate=0.0, max_rate=float('inf')):
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = min(max_rate, max(min_rate, self.rate * multiplier + step))
+            return self.rate
+
+
+# Same interface as TokenBucket, but the bucket state lives in a store shared by
+# processes and nodes (a work queue broker, see work_queue.py), keyed by limiter name.
+class SharedTokenBucket:
+    def __init__(self, store, key, rate, burst=1.0):
+        self.store = store
+        self.key = key
+        self.initial_rate = rate
+        self.burst = burst
+
+    @property
+    def rate(self):
+        return self.store.rate_bucket_rate(self.key, self.initial_rate, self.burst)
+
+    def try_take(self):
+        return self.store.rate_bucket_take(self.key, self.initial_rate, self.burst)
+
+    def take(self):
+        while True:
+            wait_seconds = self.try_take()
+            if wait_seconds <= 0:
+                return
+            time.sleep(wait_seconds)
+
+    def set_rate(self, rate):
+        self.adjust_rate(multiplier=0.0, step=rate)
+
+    def adjust_rate(self, multiplier=1.0, step=0.0, min_rate=0.0, max_rate=float('inf')):
+        return self.store.rate_bucket_adjust(self.key, self.initial_rate, self.burst, multiplier, step,
+                                             min_rate, max_rate)
+
+
+class AdaptiveRateLimiter:
+    # store: shared bucket storage (see SharedTokenBucket); None keeps the bucket in this process
+    def __init__(self, name, initial_rate=0.5, min_rate=0.05, max_rate=5.0, burst=1.0,
+                 initial_concurrency=1, max_concurrency=8, target_latency=8.0,
+                 increase_step=0.05, slow_decrease_factor=0.8, block_decrease_factor=0.5, block_cooldown=60.0,
+                 store=None):
+        self.name = name
+        if store is not None:
+            self.bucket = SharedTokenBucket(store, name, initial_rate, burst=burst)
+        else:
+            self.bucket = TokenBucket(initial_rate, burst=burst)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.concurrency = initial_concurrency
+        self.max_concurrency = max_concurrency
+        self.target_latency = target_latency
+        self.increase_step = increase_step
+        self.slow_decrease_factor = slow_decrease_factor
+        self.block_decrease_factor = block_decrease_factor
+        self.block_cooldown = block_cooldown
+        self.in_flight = 0
+        self.successes_in_window = 0
+        self.paused_until = 0.0
+        self.stats = {'acquired': 0, 'blocked': 0, 'slow': 0, 'failed': 0}
+        self._condition = threading.Condition()
+
+    # Blocks until a concurrency slot and a token are available; returns the start time for release()
+    def acquire(self):
+        with self._condition:
+            while self.in_flight >= self.concurrency:
+                self._condition.wait()
+            self.in_flight += 1
+            pause_seconds = self.paused_until - time.monotonic()
+        try:
+            if pause_seconds > 0:
+                time.sleep(pause_seconds)
+            self.bucket.take()
+        except BaseException:
+            self._release_slot()
+            raise
+        with self._condition:
+            self.stats['acquired'] += 1
+        return time.monotonic()
+
+    # Non-blocking acquire for optional work (tab prefetching): returns the start time, or None
+    # when no slot or token is free right now
+    def try_acquire(self):
+        with self._condition:
+            if self.in_flight >= self.concurrency or self.paused_until > time.monotonic():
+                return None
+            if self.bucket.try_take() > 0:
+                return None
+            self.in_flight += 1
+            self.stats['acquired'] += 1
+        return time.monotonic()
+
+    def _release_slot(self):
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    # Gives a slot back without counting it as a response (e.g. a prefetch that was never used)
+    def abandon(self):
+        self._release_slot()
+
+    # latency overrides the time since acquire(), for pages that were loaded in the background
+    # and sat idle for a while before being looked at.
+    # failed: the request never went out properly (e.g. acquiring a second limiter failed), so it
+    # frees the slot and is counted, but neither speeds the limiter up nor slows it down.
+    def release(self, started, blocked=False, latency=None, failed=False):
+        latency = time.monotonic() - started if latency is None else latency
+        with self._condition:
+            multiplier, step = 1.0, 0.0
+            if failed:
+                self.stats['failed'] += 1
+                self.successes_in_window = 0
+            elif blocked:
+                self.stats['blocked'] += 1
+                multiplier = self.block_decrease_factor
+                self.concurrency = max(1, self.concurrency // 2)
+                self.successes_in_window = 0
+                self.paused_until = time.monotonic() + self.block_cooldown
+            elif latency > self.target_latency:
+                self.stats['slow'] += 1
+                multiplier = self.slow_decrease_factor
+                self.successes_in_window = 0
+            else:
+                step = self.increase_step
+                self.successes_in_window += 1
+                # One extra slot per window of successes as wide as the current concurrency
+                if self.successes_in_window >= self.concurrency and self.concurrency < self.max_concurrency:
+                    self.concurrency += 1
+                    self.successes_in_window = 0
+            if not failed:
+                # One atomic update, so limiters in other processes sharing the bucket do not lose steps
+                rate = self.bucket.adjust_rate(multiplier, step, self.min_rate, self.max_rate)
+                if blocked:
+                    print(f"Rate limiter '{self.name}': block signal, backing off to {rate:.2f}/s "
+                          f"x{self.concurrency} for {self.block_cooldown:.0f}s")
+            self.in_flight -= 1
+            self._condition.notify_all()
+        return latency
+
+    def snapshot(self):
+        return {'name': self.name, 'rate': round(self.bucket.rate, 3), 'concurrency': self.concurrency,
+                'in_flight': self.in_flight, **self.stats}
+
+
+rate_limiters = {}
+rate_limiters_lock = threading.Lock()
+shared_rate_store = None
+rate_limit_overrides = {} # target -> settings applied over default_limiter_settings
+
+
+# Keeps the token buckets of all limiters created from now on in store (a work queue broker),
+# shared with every other process using the same broker. Existing limiters are dropped.
+def use_shared_rate_store(store):
+    global shared_rate_store
+    with rate_limiters_lock:
+        shared_rate_store = store
+        rate_limiters.clear()
+    return store
+
+
+# Replaces the per-target settings of all limiters created from now on, e.g. {maps_place_target:
+# {'initial_rate': 4.0, 'max_rate': 4.0}}. Existing limiters are dropped.
+def configure_rate_limits(overrides):
+    global rate_limit_overrides
+    with rate_limiters_lock:
+        rate_limit_overrides = {target: dict(settings) for target, settings in (overrides or {}).items()}
+        rate_limiters.clear()
+
+
+def get_rate_limiter(key, **settings):
+    with rate_limiters_lock:
+        limiter = rate_limiters.get(key)
+        if limiter is None:
+            target = key.split(":", 1)[1] if ":" in key else key
+            limiter_settings = dict(default_limiter_settings.get(target, {}))
+            limiter_settings.update(rate_limit_overrides.get(target, {}))
+            limiter_settings.update(settings)
+            limiter_settings.setdefault('store', shared_rate_store)
+            limiter = AdaptiveRateLimiter(key, **limiter_settings)
+            rate_limiters[key] = limiter
+        return limiter
+
+
+# Usage:
+#   with rate_limited(maps_place_target) as outcome:
+#       driver.get(url)
+#       outcome['blocked'] = detect_block_signal(driver)
+# Acquires the target limiter and, if given, the proxy limiter (always in that order).
+@contextmanager
+def rate_limited(target, proxy=None):
+    limiters = [get_rate_limiter(f"target:{target}")]
+    if proxy:
+        limiters.append(get_rate_limiter(f"proxy:{proxy}"))
+    started = []
+    outcome = {'blocked': False, 'latency': None}
+    acquired_all = False
+    try:
+        for limiter in limiters:
+            started.append(limiter.acquire())
+        acquired_all = True
+        yield outcome
+    finally:
+        # If a later limiter could not be acquired, the earlier ones record a failure, not a response
+        for limiter, limiter_started in zip(limiters, started):
+            outcome['latency'] = limiter.release(limiter_started, blocked=outcome['blocked'],
+                                                 failed=not acquired_all)
+
+
+# Non-blocking variant of rate_limited() for optional page loads: returns a reservation
+# (list of (limiter, started)) when the target and proxy limiters both have a free slot,
+# otherwise None. Pass it to release_reservation() once the page was looked at.
+def try_reserve(target, proxy=None):
+    limiters = [get_rate_limiter(f"target:{target}")]
+    if proxy:
+        limiters.append(get_rate_limiter(f"proxy:{proxy}"))
+    reservation = []
+    for limiter in limiters:
+        started = limiter.try_acquire()
+        if started is None:
+            for reserved_limiter, _ in reservation:
+                reserved_limiter.abandon()
+            return None
+        reservation.append((limiter, started))
+    return reservation
+
+
+def release_reservation(reservation, blocked=False, latency=None, abandon=False):
+    for limiter, started in reservation:
+        if abandon:
+            limiter.abandon()
+        else:
+            limiter.release(started, blocked=blocked, latency=latency)
+
+
+def detect_block_signal(driver):
+    try:
+        current_url = driver.current_url or ""
+        if any(marker in current_url for marker in block_url_markers):
+            return True
+        title = (driver.title or "").lower()
+        return any(marker in title for marker in block_title_markers)
+    except Exception:
+        return False
+
+
+def rate_limiter_summary():
+    with rate_limiters_lock:
+        return [limiter.snapshot() for limiter in rate_limiters.values()]
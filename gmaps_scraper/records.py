@@ -0,0 +1,126 @@
+# --- Compact Result Records ---
+# A detail result used to be a fresh dict per place, kept in a list until the
+# end of the run and then copied into a DataFrame (and, on the error path,
+# possibly a second time). At 100k+ places the dicts alone cost more than the
+# data they hold. Instead:
+#   PlaceRecord   one place, with a __slots__ field per result column (no per-row
+#                 dict). It reads and writes like the old dict (record['Name'],
+#                 .get, .update, dict(record)), so callers did not have to change.
+#   RecordBuffer  the run's results as one list per column. A record is split into
+#                 the columns when it is appended and then dropped, so a row costs
+#                 one pointer per column. to_dataframe() turns each column into a
+#                 typed array (float64 coordinates, NaN for missing values, the same
+#                 result as building the DataFrame from row dicts) and frees each
+#                 column list as soon as its array exists, so the rows are never held
+#                 as dicts, lists and DataFrame at the same time.
+# 'Scrape Status' and 'Category' repeat across thousands of places ('Success',
+# 'Restaurant', ...) and are interned, so every row shares one string object.
+
+import sys
+
+# Result column -> slot name
+record_slots = {
+    'Google Maps Link': 'link',
+    'Name': 'name',
+    'Address': 'address',
+    'Category': 'category',
+    'Phone': 'phone',
+    'Website': 'website',
+    'Latitude': 'latitude',
+    'Longitude': 'longitude',
+    'Scrape Status': 'status',
+    'Snapshot': 'snapshot',
+}
+interned_columns = ['Scrape Status', 'Category']
+
+
+def compact_value(column, value):
+    if column in interned_columns and type(value) is str:
+        return sys.intern(value)
+    return value
+
+
+class PlaceRecord:
+    __slots__ = tuple(record_slots.values())
+
+    # fields is an optional dict of result columns; columns never set read as missing (like a dict)
+    def __init__(self, fields=None):
+        for slot in self.__slots__:
+            setattr(self, slot, None)
+        if fields:
+            self.update(fields)
+
+    def __getitem__(self, column):
+        value = getattr(self, record_slots[column]) if column in record_slots else None
+        if value is None:
+            raise KeyError(column)
+        return value
+
+    def __setitem__(self, column, value):
+        if column not in record_slots:
+            raise KeyError(f"'{column}' is not a result column")
+        setattr(self, record_slots[column], compact_value(column, value))
+
+    def __contains__(self, column):
+        return self.get(column) is not None
+
+    def get(self, column, default=None):
+        value = getattr(self, record_slots[column]) if column in record_slots else None
+        return default if value is None else value
+
+    def update(self, fields):
+        for column, value in fields.items():
+            self[column] = value
+
+    def keys(self):
+        return [column for column, slot in record_slots.items() if getattr(self, slot) is not None]
+
+    def items(self):
+        return [(column, self[column]) for column in self.keys()]
+
+    def __repr__(self):
+        return f"PlaceRecord({dict(self.items())!r})"
+
+
+# One column as an array: float64 when every present value is a float (coordinates of a run
+# where every link had them), object otherwise. Missing values become NaN.
+def column_array(values):
+    import numpy as np
+
+    present = [value is not None for value in values]
+    if any(present) and all(type(value) is float for value in values if value is not None):
+        return np.fromiter((np.nan if value is None else value for value in values), dtype=float, count=len(values))
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    array[~np.fromiter(present, dtype=bool, count=len(values))] = np.nan
+    return array
+
+
+class RecordBuffer:
+    def __init__(self, columns):
+        self.columns = list(columns)
+        self._columns = {column: [] for column in self.columns}
+        self.successes = 0 # Rows with 'Scrape Status' == 'Success' (limit mode)
+
+    def __len__(self):
+        return len(self._columns[self.columns[0]]) if self.columns else 0
+
+    # Takes a PlaceRecord or a plain dict (placeholder rows); columns it lacks are left empty
+    def append(self, record):
+        for column, values in self._columns.items():
+            values.append(compact_value(column, record.get(column)))
+        if record.get('Scrape Status') == 'Success':
+            self.successes += 1
+
+    # Builds the DataFrame from the column arrays and empties the buffer (it can only be handed off once)
+    def to_dataframe(self):
+        import pandas as pd
+
+        arrays = {}
+        for column in self.columns:
+            values = self._columns[column]
+            self._columns[column] = []
+            arrays[column] = column_array(values)
+            del values # Free the column list before the next column is converted
+        self.successes = 0
+        return pd.DataFrame(arrays, columns=self.columns, copy=False)
@@ -0,0 +1,191 @@
+# --- Incremental Refresh: Re-scrape Only Stale or Changed Places ---
+# A full re-run spends almost all of its time re-confirming unchanged data.
+# The refresh mode takes the previous results and re-fetches only a budgeted,
+# prioritized subset, so its cost follows churn instead of catalog size:
+#   1. Places whose feed card (name/rating/category fingerprint collected by
+#      links.py) differs from the stored one, and places never scraped. A row
+#      without a stored fingerprint (e.g. from a plain results CSV) takes the
+#      card's as is and is left to the scoring below.
+#   2. The rest, ordered by age x past change rate, plus a bonus for the last
+#      scrape having failed (the bonus shrinks with every consecutive failure
+#      so dead URLs stop eating the budget).
+# Refresh bookkeeping is kept in extra columns next to the normal result columns.
+
+from datetime import datetime, timezone
+
+from .details import detail_columns, run_scrape_from_links
+
+refresh_columns = ['Last Scraped', 'Scrape Count', 'Change Count', 'Failure Count', 'Card Fingerprint']
+compared_fields = ['Name', 'Address', 'Category', 'Phone', 'Website']
+
+
+def prepare_refresh_state(previous_df):
+    # Fill in refresh bookkeeping for results that came from a plain (non-refresh) run
+    import pandas as pd
+
+    state_df = previous_df.copy()
+    for column in detail_columns:
+        if column not in state_df.columns:
+            state_df[column] = 'N/A'
+    if 'Last Scraped' not in state_df.columns:
+        state_df['Last Scraped'] = ''
+    # A plain results CSV already holds one scrape per row: a successful row counts as scraped once
+    # (so the first refresh counts real field changes) and a failed row as one failure
+    status = state_df['Scrape Status'].fillna('').astype(str)
+    not_attempted = status.isin(['', 'N/A']) | status.str.startswith('Not Attempted') | status.str.startswith('Skipped')
+    migrated_counts = {
+        'Scrape Count': (status == 'Success').astype(int),
+        'Change Count': 0,
+        'Failure Count': ((status != 'Success') & ~not_attempted).astype(int),
+    }
+    for column in ['Scrape Count', 'Change Count', 'Failure Count']:
+        if column not in state_df.columns:
+            state_df[column] = migrated_counts[column]
+        state_df[column] = pd.to_numeric(state_df[column], errors='coerce').fillna(0).astype(int)
+    if 'Card Fingerprint' not in state_df.columns:
+        state_df['Card Fingerprint'] = ''
+    state_df['Last Scraped'] = state_df['Last Scraped'].fillna('').astype(str)
+    state_df['Card Fingerprint'] = state_df['Card Fingerprint'].fillna('').astype(str)
+    state_df = state_df.drop_duplicates(subset='Google Maps Link', keep='last')
+    return state_df.set_index('Google Maps Link', drop=False)
+
+
+def score_refresh_priority(state_df, now, max_age_days=30, failure_retry_weight=10.0):
+    import pandas as pd
+
+    # Age in days since the last scrape; rows never stamped count as max_age_days old
+    last_scraped = pd.to_datetime(state_df['Last Scraped'], errors='coerce', utc=True)
+    age_days = ((now - last_scraped).dt.total_seconds() / 86400.0).fillna(max_age_days).clip(lower=0)
+    # Laplace-smoothed change rate so places with no history still get a fair share
+    change_rate = (state_df['Change Count'] + 1) / (state_df['Scrape Count'] + 2)
+    score = age_days * change_rate
+    last_failed = state_df['Scrape Status'].astype(str) != 'Success'
+    failure_bonus = failure_retry_weight / state_df['Failure Count'].clip(lower=1)
+    return score + failure_bonus.where(last_failed, 0.0)
+
+
+def select_refresh_urls(previous_df, card_data=None, refresh_budget=None, max_age_days=30):
+    # Returns (urls to re-fetch in priority order, refresh state DataFrame)
+    import pandas as pd
+
+    state_df = prepare_refresh_state(previous_df)
+    now = pd.Timestamp(datetime.now(timezone.utc))
+    card_data = card_data or {}
+
+    # Places seen in the feed but missing from the previous results must be scraped
+    new_urls = [url for url in card_data if url not in state_df.index]
+    # Places whose feed card no longer matches the fingerprint stored at the last scrape
+    changed_urls = []
+    seeded_count = 0
+    for url, card in card_data.items():
+        if url not in state_df.index:
+            continue
+        stored_fingerprint = state_df.at[url, 'Card Fingerprint']
+        card_fingerprint = card.get('Card Fingerprint', '')
+        if not stored_fingerprint:
+            # Unknown, not changed: later refreshes compare against this card
+            state_df.at[url, 'Card Fingerprint'] = card_fingerprint
+            seeded_count += 1
+        elif card_fingerprint and stored_fingerprint != card_fingerprint:
+            changed_urls.append(url)
+    print(f"Refresh candidates from card data: {len(new_urls)} new, {len(changed_urls)} changed "
+          f"({seeded_count} fingerprints seeded).")
+
+    priority = score_refresh_priority(state_df, now, max_age_days=max_age_days)
+    priority = priority.drop(index=changed_urls, errors='ignore').sort_values(ascending=False)
+
+    if refresh_budget is None:
+        # Without an explicit budget, only places past max_age_days are added on top of the card changes
+        last_scraped = pd.to_datetime(state_df['Last Scraped'], errors='coerce', utc=True)
+        stale = last_scraped.isna() | ((now - last_scraped).dt.total_seconds() > max_age_days * 86400)
+        stale_urls = [url for url in priority.index if stale.get(url, False)]
+        selected_urls = new_urls + changed_urls + stale_urls
+    else:
+        selected_urls = (new_urls + changed_urls + list(priority.index))[:max(0, int(refresh_budget))]
+
+    print(f"Selected {len(selected_urls)} of {len(state_df) + len(new_urls)} places for refresh.")
+    return selected_urls, state_df
+
+
+def merge_refresh_results(state_df, refreshed_df, card_data=None, scraped_at=None):
+    import pandas as pd
+
+    card_data = card_data or {}
+    scraped_at = scraped_at or datetime.now(timezone.utc).isoformat(timespec='seconds')
+    rows = state_df.to_dict('index')
+    changed_count = 0
+    for record in refreshed_df.to_dict('records'):
+        url = record.get('Google Maps Link')
+        if not url or url == 'N/A':
+            continue
+        previous = rows.get(url)
+        if previous is None:
+            previous = {column: 'N/A' for column in detail_columns}
+            previous.update({'Google Maps Link': url, 'Last Scraped': '', 'Scrape Count': 0,
+                             'Change Count': 0, 'Failure Count': 0, 'Card Fingerprint': ''})
+        merged = dict(previous)
+        merged['Last Scraped'] = scraped_at
+        merged['Scrape Count'] = int(previous['Scrape Count']) + 1
+        merged['Scrape Status'] = record.get('Scrape Status', 'N/A')
+        if merged['Scrape Status'] == 'Success':
+            merged['Failure Count'] = 0
+            # compared_fields decide whether the place changed; every result column is taken from the new scrape
+            if any(record.get(field, 'N/A') != previous.get(field, 'N/A') for field in compared_fields):
+                if previous.get('Scrape Count', 0):
+                    merged['Change Count'] = int(previous['Change Count']) + 1
+                    changed_count += 1
+            for column in detail_columns:
+                value = record.get(column, 'N/A')
+                merged[column] = 'N/A' if pd.isna(value) else value
+            # The fields now match this card; after a failure the old fingerprint stays, so a changed
+            # card is picked up again by the next refresh
+            if url in card_data:
+                merged['Card Fingerprint'] = card_data[url].get('Card Fingerprint', '')
+        else:
+            # Keep the last good field values, only record the failure
+            merged['Failure Count'] = int(previous['Failure Count']) + 1
+        rows[url] = merged
+    print(f"Refresh merged {len(refreshed_df)} re-fetched places, {changed_count} changed.")
+    merged_df = pd.DataFrame(list(rows.values()), columns=detail_columns + refresh_columns)
+    return merged_df
+
+
+# --- Main Process: Incremental Refresh of Previously Scraped Results ---
+# previous_results can be a DataFrame or the path to a CSV written by run_scrape_from_links
+# (or by an earlier refresh). card_data is the {link: card fields} dict filled by the link collector.
+def run_refresh_from_previous(previous_results, card_data=None, refresh_budget=None, max_age_days=30,
+                              csv_filename="Maps_scraped_details_refreshed.csv"):
+    print("--- Step 0: Starting Incremental Refresh Process ---")
+    import pandas as pd
+
+    if isinstance(previous_results, str):
+        try:
+            previous_df = pd.read_csv(previous_results, dtype=str, keep_default_na=False)
+            print(f"Loaded {len(previous_df)} previous records from '{previous_results}'")
+        except Exception as e:
+            print(f"--- ERROR: Could not read previous results '{previous_results}' ---")
+            print(f"Error details: {e}")
+            previous_df = pd.DataFrame(columns=detail_columns)
+    else:
+        previous_df = previous_results if previous_results is not None else pd.DataFrame(columns=detail_columns)
+
+    selected_urls, state_df = select_refresh_urls(previous_df, card_data=card_data,
+                                                  refresh_budget=refresh_budget, max_age_days=max_age_days)
+    if selected_urls:
+        refreshed_df = run_scrape_from_links(selected_urls, csv_filename=None)
+    else:
+        print("Nothing to refresh. Previous results are up to date.")
+        refreshed_df = pd.DataFrame(columns=detail_columns)
+
+    merged_df = merge_refresh_results(state_df, refreshed_df, card_data=card_data)
+
+    if csv_filename and not merged_df.empty:
+        try:
+            merged_df.to_csv(csv_filename, index=False)
+            print(f"Refreshed data successfully saved to '{csv_filename}'")
+        except Exception as e:
+            print(f"--- ERROR: Failed to save refreshed data to CSV ---")
+            print(f"Error details: {e}")
+    return merged_df
+
+
@@ -0,0 +1,293 @@
+# --- Streaming Review Harvester ---
+# Opens a place's Reviews tab and scrolls the reviews pane the same way the
+# feed loop in links.py scrolls the results list, but yields the reviews as a
+# stream instead of collecting them. Each step is one JS call that expands the
+# "More" links of up to batch_size unread review cards, reads their fields and
+# removes the cards from the DOM, so Chrome holds at most a batch or two of
+# reviews no matter how many the place has. Rows are written to the CSV batch by
+# batch, so the Python side stays flat too (only the review IDs are kept, to
+# skip cards Google re-renders).
+# A place stops at max_reviews, at a run of reviews older than the since cutoff
+# (the pane is switched to "Newest" first), or when scrolling brings nothing new.
+# Google only shows relative dates ("3 months ago"); 'Review Date' is estimated from them.
+
+import csv
+import os
+import re
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+
+from .driver import setup_driver, close_driver
+from .watchdog import create_driver_watchdog, watchdog_record_page, is_dead_driver_error, recycle_driver
+from .rate_limit import (rate_limited, detect_block_signal, maps_place_target, maps_reviews_target,
+                         rate_limiter_summary)
+from .selector_registry import get_selector_registry, SelectorDriftError
+
+review_columns = ['Google Maps Link', 'Review ID', 'Author', 'Rating', 'Relative Date', 'Review Date', 'Text']
+
+# Reads (and then removes) up to arguments[3] review cards from the pane.
+# arguments: pane, review card selector, {field: selector} for the fields inside a card, batch size
+review_batch_script = """
+var pane = arguments[0], fields = arguments[2], limit = arguments[3];
+var cards = pane.querySelectorAll(arguments[1]);
+var rows = [];
+function text(card, selector) {
+    var element = selector ? card.querySelector(selector) : null;
+    return element ? element.innerText : '';
+}
+for (var i = 0; i < cards.length && rows.length < limit; i++) {
+    var card = cards[i];
+    var more = fields.more ? card.querySelector(fields.more) : null;
+    if (more) { try { more.click(); } catch (e) {} }
+    var rating = fields.rating ? card.querySelector(fields.rating) : null;
+    rows.push([
+        card.getAttribute('data-review-id') || '',
+        card.getAttribute('aria-label') || text(card, fields.author),
+        rating ? (rating.getAttribute('aria-label') || rating.innerText) : '',
+        text(card, fields.date),
+        text(card, fields.text)
+    ]);
+    card.remove();
+}
+return [rows, pane.querySelectorAll(arguments[1]).length];
+"""
+
+relative_date_pattern = re.compile(r"\b(a|an|one|\d+)\s+(second|minute|hour|day|week|month|year)s?\s+ago\b")
+relative_date_units = {'second': 1 / 86400, 'minute': 1 / 1440, 'hour': 1 / 24, 'day': 1, 'week': 7, 'month': 30,
+                       'year': 365}
+
+
+# "3 months ago" / "Edited a year ago" -> estimated date (YYYY-MM-DD), or 'N/A'
+def estimate_review_date(relative_date, now=None):
+    match = relative_date_pattern.search((relative_date or '').lower())
+    if not match:
+        return 'N/A'
+    count = 1 if match.group(1) in ['a', 'an', 'one'] else int(match.group(1))
+    now = now or datetime.now(timezone.utc)
+    return (now - timedelta(days=count * relative_date_units[match.group(2)])).strftime("%Y-%m-%d")
+
+
+def rating_from_label(label):
+    # "5 stars" / "4 stars" / "5/5"
+    match = re.search(r"\d+(?:[.,]\d)?", label or '')
+    return match.group(0).replace(',', '.') if match else 'N/A'
+
+
+# Switches the pane to newest-first so a date cutoff can stop the scroll. Returns True on success.
+def sort_reviews_newest(driver, registry):
+    try:
+        sort_button = registry.find(driver, 'reviews_sort_button', timeout=5)
+        if sort_button is None:
+            return False
+        sort_button.click()
+        newest_option = registry.find(driver, 'reviews_sort_newest', timeout=5)
+        if newest_option is None:
+            return False
+        newest_option.click()
+        time.sleep(2) # The pane re-renders with the new order
+        return True
+    except Exception as e:
+        print(f"Warning: Could not sort reviews by newest: {e}")
+        return False
+
+
+# --- GENERATOR: Stream the Reviews of One Place ---
+# Yields one dict per review (review_columns). since is a date/datetime; reviews estimated older than it
+# are skipped, and once stale_streak of them come in a row (newest-first order) the place is done.
+def iter_place_reviews(driver, place_url, max_reviews=None, since=None, batch_size=50, stale_streak=5,
+                       registry=None, proxy=None):
+    registry = registry or get_selector_registry()
+    proxy = proxy or getattr(driver, 'proxy', None)
+    if since is not None and not isinstance(since, datetime):
+        since = datetime(since.year, since.month, since.day)
+    cutoff = since.strftime("%Y-%m-%d") if since is not None else None
+
+    print(f"--> Opening reviews for: {place_url}")
+    with rate_limited(maps_place_target, proxy=proxy) as load_outcome:
+        try:
+            driver.get(place_url)
+            name_element = registry.find(driver, 'detail_name', timeout=20)
+        finally:
+            load_outcome['blocked'] = detect_block_signal(driver)
+    if name_element is None:
+        print(f"--> Place page did not load for {place_url}; no reviews read.")
+        return
+
+    reviews_tab = registry.find(driver, 'reviews_tab', timeout=10)
+    if reviews_tab is None:
+        print("--> No Reviews tab on this place.")
+        return
+    reviews_tab.click()
+    pane = registry.find(driver, 'reviews_container', timeout=10)
+    if pane is None or registry.find(pane, 'review_item', timeout=10) is None:
+        print("--> Reviews pane is empty.")
+        return
+    sorted_newest = sort_reviews_newest(driver, registry) if since is not None else False
+    if since is not None and not sorted_newest:
+        print("Warning: Reviews are not sorted by date; older reviews are filtered but the scroll cannot stop early.")
+    pane = registry.find(driver, 'reviews_container', timeout=10) or pane
+
+    item_selector = ", ".join(registry.selectors('review_item'))
+    field_selectors = {
+        'author': ", ".join(registry.selectors('review_author')),
+        'rating': ", ".join(registry.selectors('review_rating')),
+        'date': ", ".join(registry.selectors('review_date')),
+        'text': ", ".join(registry.selectors('review_text')),
+        'more': ", ".join(registry.selectors('review_more_button')),
+    }
+
+    seen_review_ids = set()
+    yielded = 0
+    stale_in_a_row = 0
+    no_new_reviews = 0
+    max_no_new_reviews = 3 # Same stop rule as the feed loop
+    scroll_pause_time = 2
+    scroll_poll_interval = 0.25
+    now = datetime.now(timezone.utc)
+
+    while True:
+        try:
+            rows, remaining_cards = driver.execute_script(review_batch_script, pane, item_selector, field_selectors,
+                                                          batch_size)
+        except Exception as e:
+            print(f"Warning: Review batch extraction failed: {e}")
+            break
+
+        new_reviews = 0
+        for review_id, author, rating_label, relative_date, review_text in rows:
+            if review_id and review_id in seen_review_ids:
+                continue
+            if review_id:
+                seen_review_ids.add(review_id)
+            new_reviews += 1
+            review_date = estimate_review_date(relative_date, now)
+            if cutoff and review_date != 'N/A' and review_date < cutoff:
+                stale_in_a_row += 1
+                continue
+            stale_in_a_row = 0
+            yield {
+                'Google Maps Link': place_url,
+                'Review ID': review_id or 'N/A',
+                'Author': (author or '').strip() or 'N/A',
+                'Rating': rating_from_label(rating_label),
+                'Relative Date': (relative_date or '').strip() or 'N/A',
+                'Review Date': review_date,
+                'Text': (review_text or '').strip() or 'N/A',
+            }
+            yielded += 1
+            if max_reviews and yielded >= max_reviews:
+                print(f"--> Reached the limit of {max_reviews} reviews.")
+                return
+
+        if sorted_newest and stale_in_a_row >= stale_streak:
+            print(f"--> Reached reviews older than {cutoff}. Stopping.")
+            return
+        if remaining_cards:
+            continue # More loaded cards to read before scrolling again
+
+        no_new_reviews = 0 if new_reviews else no_new_reviews + 1
+        if no_new_reviews >= max_no_new_reviews:
+            print(f"--> No new reviews after {max_no_new_reviews} scrolls. {yielded} reviews read.")
+            return
+
+        # Scroll the (now almost empty) pane to the bottom so Google loads the next page of reviews
+        with rate_limited(maps_reviews_target, proxy=proxy) as scroll_outcome:
+            try:
+                driver.execute_script("arguments[0].scrollTop = arguments[0].scrollHeight;", pane)
+            except Exception as e:
+                print(f"Warning: Could not scroll the reviews pane: {e}")
+                return
+            wait_deadline = time.time() + scroll_pause_time
+            while time.time() < wait_deadline:
+                time.sleep(scroll_poll_interval)
+                try:
+                    if pane.find_elements("css selector", item_selector):
+                        break
+                except Exception:
+                    break
+            scroll_outcome['blocked'] = detect_block_signal(driver)
+
+
+# --- Main Process: Harvest Reviews for a List of Places, Streaming to CSV ---
+# Rows are appended to csv_filename after every batch; returns the number of reviews written.
+# A place whose browser died is retried on a fresh one (up to max_requeues times) if none of its
+# reviews were written yet.
+def run_review_harvest(business_urls, csv_filename="Maps_reviews.csv", max_reviews_per_place=None, since=None,
+                       batch_size=50, use_watchdog=True, watchdog=None, max_requeues=2):
+    print("--- Step 0: Starting Review Harvest ---")
+    get_selector_registry().reset() # Circuits from an earlier run in this process do not carry over
+    driver, display = setup_driver()
+    if not driver:
+        print("--- Process Aborted: Driver setup failed. ---")
+        return 0
+
+    if use_watchdog and watchdog is None:
+        watchdog = create_driver_watchdog()
+    total_reviews = 0
+    places_done = 0
+    write_header = not os.path.exists(csv_filename) or os.path.getsize(csv_filename) == 0
+    try:
+        with open(csv_filename, "a", newline='', encoding='utf-8') as reviews_file:
+            writer = csv.DictWriter(reviews_file, fieldnames=review_columns)
+            if write_header:
+                writer.writeheader()
+
+            # (index, url, attempt), so a place can be requeued after a browser recycle
+            pending_places = deque((i, url, 0) for i, url in enumerate(business_urls))
+            while pending_places:
+                i, url, attempt = pending_places.popleft()
+                if not url or url == 'N/A':
+                    continue
+                print(f"\nProcessing place {i+1}/{len(business_urls)}")
+                place_start_time = time.time()
+                place_reviews = 0
+                place_error = None
+                pending_rows = []
+                try:
+                    for review in iter_place_reviews(driver, url, max_reviews=max_reviews_per_place, since=since,
+                                                     batch_size=batch_size):
+                        pending_rows.append(review)
+                        if len(pending_rows) >= batch_size:
+                            writer.writerows(pending_rows)
+                            reviews_file.flush()
+                            place_reviews += len(pending_rows)
+                            pending_rows = []
+                except SelectorDriftError as drift_e:
+                    print(f"--- Stopping: {drift_e} ---")
+                    break
+                except Exception as e:
+                    place_error = e
+                    print(f"--> ERROR harvesting reviews for {url}: {e}")
+                finally:
+                    writer.writerows(pending_rows)
+                    reviews_file.flush()
+                    place_reviews += len(pending_rows)
+                total_reviews += place_reviews
+                places_done += 1
+                print(f"--> {place_reviews} reviews written for this place ({total_reviews} total).")
+
+                if use_watchdog:
+                    # A dead browser fails fast, so latency and RSS would never catch it
+                    browser_died = place_error is not None and is_dead_driver_error(place_error)
+                    if browser_died:
+                        recycle_reason = "browser session died"
+                    else:
+                        recycle_reason = watchdog_record_page(watchdog, driver, time.time() - place_start_time)
+                    if recycle_reason:
+                        driver, display = recycle_driver(driver, display, watchdog, recycle_reason)
+                        if browser_died and place_reviews == 0 and attempt < max_requeues:
+                            print(f"Requeuing place {i+1} (attempt {attempt + 2}) on the new browser.")
+                            pending_places.appendleft((i, url, attempt + 1))
+                            places_done -= 1 # Counted when the retry finishes
+                        if not driver:
+                            print("--- Watchdog: Driver recycle failed. Stopping. ---")
+                            break
+    finally:
+        print("\n--- Cleaning up Selenium Driver and Virtual Display ---")
+        close_driver(driver, display, step_label="Review harvest cleanup")
+
+    for limiter_state in rate_limiter_summary():
+        print(f"Rate limiter: {limiter_state}")
+    print(f"--- Review harvest finished: {total_reviews} reviews from {places_done} places in '{csv_filename}' ---")
+    return total_reviews
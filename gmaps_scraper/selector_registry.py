@@ -0,0 +1,268 @@
+# --- Selector Registry: Versioned Fallback Chains and Drift Detection ---
+# All CSS selectors used on Google Maps live here, one ordered fallback chain
+# per field. Every lookup records a hit or miss per selector. After
+# max_consecutive_misses misses in a row a selector's circuit opens: later
+# pages no longer wait for it (it is only probed once, instantly, so it can
+# close again if the miss streak was a run of places that really lack the
+# field). A selector that misses while a fallback behind it matches is clear
+# drift and opens after required_field_misses. Only the first closed selector
+# of a chain gets the full wait. When every selector of a field is open, the
+# first one still gets a half-open probe with the full wait; only if that misses
+# too is an alert printed, and for required fields a SelectorDriftError stops
+# the run instead of burning a timeout on every remaining page.
+# Misses on a page that is not the page the selectors are for (a /sorry/ block
+# page, a Chrome error page, a dead browser) are not recorded: a throttling
+# episode is not drift. Neither are misses of 'polled' fields, markers checked
+# over and over until they show up (the feed's "End of list"). Call reset() at
+# the start of a run so one run's circuits do not carry over to the next.
+#
+# The chains can be replaced without a code change by a JSON overrides file:
+#   {"version": "2024-07-02-hotfix", "fields": {"detail_name": ["h1.NEWCLASS", "h1"]}}
+
+import json
+import threading
+
+from .rate_limit import detect_block_signal
+
+selector_registry_version = "2024-06-01"
+
+# field -> {'selectors': ordered fallbacks, 'required': missing means the page/selector is broken,
+#           'max_consecutive_misses': circuit threshold, 'polled': only hits are recorded}
+# Optional fields are legitimately missing on many places (no website, no phone),
+# so their circuits need a much longer miss streak before opening.
+default_selector_fields = {
+    'search_input': {'selectors': ["#searchboxinput", "input[name='q']"], 'required': True},
+    'search_button': {'selectors': ["#searchbox-searchbutton", "button[aria-label='Search']"], 'required': True},
+    'consent_accept': {'selectors': ["button[aria-label='Accept all']", "form[action*='consent'] button"],
+                       'required': False}, # Only shown to fresh profiles in some regions
+    'feed_container': {'selectors': ["div[role='feed']"], 'required': True},
+    'feed_item_link': {'selectors': ["a.hfpxzc", "div[role='feed'] a[href*='/maps/place/']"], 'required': True},
+    'feed_end_of_list': {'selectors': ["div.m6QErb.XiKgde.tLjsW.eKbjU", "span.HlvSq"], 'required': False,
+                         'polled': True}, # Checked on every scroll poll, missing until the feed ends
+    # Links to removed places or redirects to a result list miss every selector without any drift,
+    # so only a long streak of total misses counts; renamed classes still open after
+    # required_field_misses because the generic fallback matches behind them
+    'detail_name': {'selectors': ["h1.DUwDvf.lfPIob", "h1.DUwDvf", "div[role='main'] h1"], 'required': True,
+                    'max_consecutive_misses': 25},
+    'detail_category': {'selectors': ["button.DkEaL[jsaction*='category']", "button[jsaction*='category']"],
+                        'required': False},
+    'detail_address': {'selectors': ["button[data-item-id='address']", "[data-item-id='address']"], 'required': False},
+    'detail_website': {'selectors': ["a.CsEnBe[data-item-id='authority']", "a[data-item-id='authority']"],
+                       'required': False},
+    'detail_phone': {'selectors': ["button.CsEnBe[data-item-id^='phone:']", "[data-item-id^='phone:']"],
+                     'required': False},
+    # Text div *inside* the address / phone buttons
+    'detail_nested_value': {'selectors': ["div.Io6YTe", "div.fontBodyMedium"], 'required': False},
+    # Reviews pane (reviews.py). The review_* fields are read inside each review card by one JS call.
+    'reviews_tab': {'selectors': ["button[role='tab'][aria-label^='Reviews']", "button[jsaction*='reviewChart']",
+                                  "button[aria-label*='reviews']"], 'required': False},
+    'reviews_sort_button': {'selectors': ["button[aria-label='Sort reviews']", "button[data-value='Sort']"],
+                            'required': False},
+    'reviews_sort_newest': {'selectors': ["div[role='menuitemradio'][data-index='1']", "li[data-index='1']"],
+                            'required': False},
+    'reviews_container': {'selectors': ["div.m6QErb.DxyBCb.kA9KIf.dS8AEf", "div.m6QErb.DxyBCb"], 'required': False},
+    'review_item': {'selectors': ["div.jftiEf[data-review-id]", "div[data-review-id][aria-label]"], 'required': False,
+                    'max_consecutive_misses': 50}, # Places with no reviews are common
+    'review_author': {'selectors': ["div.d4r55", "button[data-href*='/contrib/'] div"], 'required': False},
+    'review_rating': {'selectors': ["span.kvMYJc[aria-label]", "span[role='img'][aria-label*='star']"],
+                      'required': False},
+    'review_date': {'selectors': ["span.rsqaWe", "span.xRkPPb"], 'required': False},
+    'review_text': {'selectors': ["span.wiI7pd", "div.MyEned span"], 'required': False},
+    'review_more_button': {'selectors': ["button.w8nwRe", "button[aria-label='See more']"], 'required': False},
+}
+
+required_field_misses = 3
+optional_field_misses = 25
+
+# URLs of pages that never loaded (navigation failed or is still pending)
+unloaded_url_prefixes = ('chrome-error://', 'about:blank', 'data:,')
+
+
+# True when the context's page cannot tell anything about the selectors: it did not load,
+# Google served a block page, or the browser is gone. context is the driver or an element.
+def page_unavailable(context):
+    driver = getattr(context, 'parent', context) # A WebElement's parent is its driver
+    try:
+        current_url = driver.current_url or ""
+    except Exception:
+        return True
+    return current_url.startswith(unloaded_url_prefixes) or detect_block_signal(driver)
+
+
+class SelectorDriftError(Exception):
+    pass
+
+
+class SelectorRegistry:
+    def __init__(self, fields=None, version=selector_registry_version, on_alert=None):
+        self.version = version
+        self.fields = {name: dict(spec) for name, spec in (fields or default_selector_fields).items()}
+        self.on_alert = on_alert
+        self.stats = {}
+        self.alerted_fields = set()
+        self._lock = threading.Lock()
+
+    # Forgets all hit/miss statistics and closes every circuit (start of a run)
+    def reset(self):
+        with self._lock:
+            self.stats = {}
+            self.alerted_fields = set()
+
+    def selectors(self, field):
+        return self.fields[field]['selectors']
+
+    def _stat(self, field, selector):
+        return self.stats.setdefault((field, selector), {'hits': 0, 'misses': 0, 'consecutive_misses': 0,
+                                                         'open': False})
+
+    def _threshold(self, field):
+        spec = self.fields[field]
+        default = required_field_misses if spec.get('required') else optional_field_misses
+        return spec.get('max_consecutive_misses', default)
+
+    # [(selector, circuit open?)] in registry order
+    def selector_states(self, field):
+        with self._lock:
+            return [(selector, self._stat(field, selector)['open']) for selector in self.fields[field]['selectors']]
+
+    # superseded: the selector missed but a fallback behind it matched on the same page
+    def record(self, field, selector, hit, superseded=False):
+        with self._lock:
+            stat = self._stat(field, selector)
+            if hit:
+                stat['hits'] += 1
+                stat['consecutive_misses'] = 0
+                if stat['open']:
+                    print(f"Selector registry: '{selector}' for {field} matches again, closing its circuit.")
+                stat['open'] = False
+                self.alerted_fields.discard(field)
+            else:
+                stat['misses'] += 1
+                stat['consecutive_misses'] += 1
+                threshold = self._threshold(field)
+                if superseded:
+                    threshold = min(threshold, required_field_misses)
+                if not stat['open'] and stat['consecutive_misses'] >= threshold:
+                    stat['open'] = True
+                    print(f"Selector registry: '{selector}' for {field} missed {stat['consecutive_misses']} "
+                          f"times in a row, no longer waiting for it.")
+
+    def field_is_dead(self, field):
+        with self._lock:
+            return all(self._stat(field, selector)['open'] for selector in self.fields[field]['selectors'])
+
+    def alert_if_dead(self, field):
+        if not self.field_is_dead(field):
+            return
+        message = (f"Selector drift: every selector for '{field}' stopped matching "
+                   f"(registry version {self.version}: {self.fields[field]['selectors']}). "
+                   f"Update the selector registry or pass an overrides file.")
+        if field not in self.alerted_fields:
+            self.alerted_fields.add(field)
+            print(f"\n--- ALERT: {message} ---")
+            if self.on_alert:
+                self.on_alert(field, message)
+        if self.fields[field].get('required'):
+            raise SelectorDriftError(message)
+
+    # Returns the first matching element for the field (or None). context is the driver or an element.
+    def find(self, context, field, timeout=0, many=False):
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        states = self.selector_states(field)
+        # Every circuit open: half-open probe, the first selector gets the wait as if it were closed
+        half_open = all(is_open for _, is_open in states)
+        waited = False
+        missed = []
+        for selector, is_open in states:
+            try:
+                if timeout and (not is_open or half_open) and not waited:
+                    # Only the first closed selector pays the wait; the rest are probed immediately
+                    waited = True
+                    WebDriverWait(context, timeout).until(
+                        lambda ctx: ctx.find_elements(By.CSS_SELECTOR, selector))
+                elements = context.find_elements(By.CSS_SELECTOR, selector)
+            except Exception:
+                elements = []
+            if elements:
+                for missed_selector in missed:
+                    self.record(field, missed_selector, False, superseded=True)
+                self.record(field, selector, True)
+                return elements if many else elements[0]
+            missed.append(selector)
+
+        if self.fields[field].get('polled') or page_unavailable(context):
+            return [] if many else None # Says nothing about the selectors
+        for missed_selector in missed:
+            self.record(field, missed_selector, False)
+        self.alert_if_dead(field)
+        return [] if many else None
+
+    # Waits until one of the fields has a matching element and returns that field's name (or None),
+    # without recording hits or misses. For pages that may legitimately show one of several layouts.
+    def wait_for_any(self, context, fields, timeout=0):
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        def matching_field(ctx):
+            for field in fields:
+                for selector in self.fields[field]['selectors']:
+                    if ctx.find_elements(By.CSS_SELECTOR, selector):
+                        return field
+            return None
+
+        try:
+            if timeout:
+                return WebDriverWait(context, timeout).until(matching_field)
+            return matching_field(context)
+        except Exception:
+            return None
+
+    # Offline variant for lxml documents (archive re-extraction): plain fallback order, no circuits
+    def find_in_document(self, document, field, compile_selector):
+        for selector in self.fields[field]['selectors']:
+            matches = compile_selector(selector)(document)
+            if matches:
+                return matches[0]
+        return None
+
+    def health_report(self):
+        with self._lock:
+            report = []
+            for (field, selector), stat in sorted(self.stats.items()):
+                lookups = stat['hits'] + stat['misses']
+                hit_rate = stat['hits'] / lookups if lookups else 0.0
+                report.append({'field': field, 'selector': selector, 'hits': stat['hits'], 'misses': stat['misses'],
+                               'hit_rate': round(hit_rate, 3), 'open': stat['open']})
+            return report
+
+    def print_health_report(self):
+        print(f"\nSelector registry {self.version} hit rates:")
+        for row in self.health_report():
+            state = "OPEN" if row['open'] else "ok"
+            print(f"  {row['field']:<22} {row['hit_rate']:>6.1%}  ({row['hits']}/{row['hits'] + row['misses']})  "
+                  f"{state:<4} {row['selector']}")
+
+
+def load_selector_overrides(path):
+    with open(path, encoding='utf-8') as overrides_file:
+        overrides = json.load(overrides_file)
+    fields = {name: dict(spec) for name, spec in default_selector_fields.items()}
+    for field, selectors in overrides.get('fields', {}).items():
+        fields.setdefault(field, {'required': False})['selectors'] = list(selectors)
+    return SelectorRegistry(fields=fields, version=overrides.get('version', f"{selector_registry_version}+overrides"))
+
+
+# Process-wide registry shared by every driver, so one page's misses spare the next pages
+default_registry = SelectorRegistry()
+
+
+def get_selector_registry():
+    return default_registry
+
+
+def use_selector_registry(registry):
+    global default_registry
+    default_registry = registry
+    return registry
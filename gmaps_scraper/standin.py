@@ -0,0 +1,204 @@
+# --- Local Google Maps Stand-in Server ---
+# A small HTTP server that serves pages shaped like Google Maps (the same
+# selectors as the registry's first choices), so the real link collector and
+# detail scraper can run against it offline: for the autotuner (autotune.py),
+# for benchmarks and for trying changes without touching Google.
+#   /maps                       search box; searching fills a role='feed' list that
+#                               loads feed_batch more cards per scroll, up to feed_total,
+#                               then shows the "End of list" marker
+#   /maps/place/<name>/data=... a place panel whose content renders render_delay_ms
+#                               after the page loads (like the real single-page app)
+#   /sorry/index                the block page (title "unusual traffic")
+# Every response is delayed by latency_ms. With max_place_rps set, place loads above
+# that rate (over a 1 s window, all clients together) are redirected to /sorry/, the
+# way Google throttles a scraper that runs too many browsers.
+
+import threading
+import time
+from collections import deque
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote_plus
+
+standin_categories = ['Restaurant', 'Cafe', 'Pizza restaurant', 'Hotel', 'Dentist', 'Bakery']
+standin_center = (40.7489, -73.9833)
+
+search_page_template = """<!DOCTYPE html>
+<html><head><title>Google Maps</title><style>
+div[role='feed'] {{ height: 600px; overflow-y: auto; }}
+.Nv2PK {{ height: 90px; position: relative; }}
+</style></head><body>
+<input id="searchboxinput" name="q">
+<button id="searchbox-searchbutton" aria-label="Search" onclick="startSearch()">Search</button>
+<div id="results"></div>
+<script>
+var feedTotal = {feed_total}, feedBatch = {feed_batch}, scrollDelay = {scroll_delay_ms};
+var categories = {categories};
+var shown = 0, loading = false, feed = null;
+function card(i) {{
+    var lat = ({lat} + (i % 37) * 0.0007).toFixed(6), lng = ({lng} - Math.floor(i / 37) * 0.0009).toFixed(6);
+    var name = 'Stand-in Place ' + i;
+    var href = '/maps/place/' + encodeURIComponent(name).replace(/%20/g, '+') +
+               '/data=!4m7!3m6!1s0x0:0x' + i.toString(16) + '!8m2!3d' + lat + '!4d' + lng + '!16s';
+    return '<div class="Nv2PK"><a class="hfpxzc" aria-label="' + name + '" href="' + href + '"></a>' +
+           '<div>' + name + '</div><div>' + (3 + (i % 20) / 10).toFixed(1) + '(' + (10 + i * 7) + ')</div>' +
+           '<div>' + categories[i % categories.length] + ' \\u00b7 $$ \\u00b7 ' + (i + 1) + ' Stand-in St</div></div>';
+}}
+function loadMore() {{
+    var html = '';
+    for (var n = 0; n < feedBatch && shown < feedTotal; n++) {{ html += card(shown++); }}
+    feed.insertAdjacentHTML('beforeend', html);
+    if (shown >= feedTotal) {{
+        feed.insertAdjacentHTML('beforeend', '<div class="m6QErb XiKgde tLjsW eKbjU">You\\'ve reached the end of the list.</div>');
+    }}
+    loading = false;
+}}
+function startSearch() {{
+    document.getElementById('results').innerHTML = '<div role="feed"></div>';
+    feed = document.querySelector("div[role='feed']");
+    feed.addEventListener('scroll', function() {{
+        if (!loading && shown < feedTotal && feed.scrollTop + feed.clientHeight >= feed.scrollHeight - 100) {{
+            loading = true;
+            setTimeout(loadMore, scrollDelay);
+        }}
+    }});
+    loadMore();
+}}
+</script></body></html>"""
+
+place_page_template = """<!DOCTYPE html>
+<html><head><title>{name} - Google Maps</title></head><body>
+<div role="main" id="panel"></div>
+<div style="display:none">{padding}</div>
+<script>
+setTimeout(function() {{
+    document.getElementById('panel').innerHTML =
+        '<h1 class="DUwDvf lfPIob">{name}</h1>' +
+        '<button class="DkEaL" jsaction="pane.rating.category">{category}</button>' +
+        '<button class="CsEnBe" data-item-id="address" aria-label="Address: {address} ">' +
+            '<div class="Io6YTe">{address}</div></button>' +
+        '<button class="CsEnBe" data-item-id="phone:tel:+1212555{number:04d}" aria-label="Phone: (212) 555-{number:04d} ">' +
+            '<div class="Io6YTe">(212) 555-{number:04d}</div></button>' +
+        '<a class="CsEnBe" data-item-id="authority" href="https://place{number}.example.com/">place{number}.example.com</a>';
+}}, {render_delay_ms});
+</script></body></html>"""
+
+block_page = """<!DOCTYPE html>
+<html><head><title>Sorry... unusual traffic</title></head><body>
+Our systems have detected unusual traffic from your computer network.
+</body></html>"""
+
+
+class StandInServer:
+    def __init__(self, host="127.0.0.1", port=0, latency_ms=150, render_delay_ms=300, scroll_delay_ms=300,
+                 feed_total=60, feed_batch=10, max_place_rps=None, page_padding_kb=200):
+        self.host = host
+        self.port = port
+        self.latency_ms = latency_ms
+        self.render_delay_ms = render_delay_ms
+        self.scroll_delay_ms = scroll_delay_ms
+        self.feed_total = feed_total
+        self.feed_batch = feed_batch
+        self.max_place_rps = max_place_rps
+        self.page_padding = "x" * (page_padding_kb * 1024) # Stands in for the weight of a real Maps page
+        self.stats = {'search': 0, 'place': 0, 'blocked': 0}
+        self._recent_place_loads = deque()
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def maps_url(self):
+        return f"{self.base_url}/maps"
+
+    # Place URLs in the same shape as the feed cards link to (with !3d/!4d coordinates)
+    def place_urls(self, count, start=0):
+        urls = []
+        for i in range(start, start + count):
+            lat = standin_center[0] + (i % 37) * 0.0007
+            lng = standin_center[1] - (i // 37) * 0.0009
+            urls.append(f"{self.base_url}/maps/place/Stand-in+Place+{i}/data=!4m7!3m6!1s0x0:0x{i:x}"
+                        f"!8m2!3d{lat:.6f}!4d{lng:.6f}!16s")
+        return urls
+
+    # True when this place load goes over max_place_rps (sliding 1 s window)
+    def _over_rate(self):
+        if not self.max_place_rps:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            while self._recent_place_loads and now - self._recent_place_loads[0] > 1.0:
+                self._recent_place_loads.popleft()
+            if len(self._recent_place_loads) >= self.max_place_rps:
+                return True
+            self._recent_place_loads.append(now)
+            return False
+
+    def render(self, path):
+        # Returns (status, headers, body)
+        if path.startswith('/sorry/'):
+            return 200, {}, block_page
+        if path.startswith('/maps/place/'):
+            self.stats['place'] += 1
+            if self._over_rate():
+                self.stats['blocked'] += 1
+                return 302, {'Location': f"/sorry/index?continue={path}"}, ''
+            name = unquote_plus(path[len('/maps/place/'):].split('/', 1)[0]) or 'Stand-in Place'
+            number = sum(ord(character) for character in name) % 10000
+            category = standin_categories[number % len(standin_categories)]
+            body = place_page_template.format(
+                name=escape(name, quote=True).replace("'", "&#x27;"), category=category, number=number,
+                address=f"{number + 1} Stand-in St, New York, NY 10016", render_delay_ms=self.render_delay_ms,
+                padding=self.page_padding)
+            return 200, {}, body
+        if path == '/maps' or path.startswith('/maps?') or path == '/':
+            self.stats['search'] += 1
+            body = search_page_template.format(
+                feed_total=self.feed_total, feed_batch=self.feed_batch, scroll_delay_ms=self.scroll_delay_ms,
+                categories=str(standin_categories), lat=standin_center[0], lng=standin_center[1])
+            return 200, {}, body
+        return 404, {}, 'Not found'
+
+    def start(self):
+        standin = self
+
+        class StandInHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if standin.latency_ms:
+                    time.sleep(standin.latency_ms / 1000)
+                status, headers, body = standin.render(self.path)
+                payload = body.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(payload)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass # Quiet: the scrapers already log every page
+
+        self._server = ThreadingHTTPServer((self.host, self.port), StandInHandler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        print(f"Stand-in Maps server listening on {self.base_url}")
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
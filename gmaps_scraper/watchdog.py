@@ -0,0 +1,147 @@
+# --- Driver Memory Watchdog: Sample Browser RSS / Page Latency and Recycle the Driver ---
+# One Chrome visiting hundreds of heavy Maps pages keeps growing until the
+# container OOMs or every page slows to a crawl. The watchdog sums the RSS of
+# the chromedriver process and all of its children (the Chrome processes) and
+# tracks page-load latency. When RSS passes max_rss_mb, or the rolling median
+# latency grows past latency_factor x the fresh-browser baseline, the driver is
+# quit and a new one is created with setup_driver().
+
+import os
+from collections import deque
+
+from .driver import setup_driver, discard_profile_clone
+
+try:
+    import psutil # Optional: used for RSS sampling, falls back to /proc
+except ImportError:
+    psutil = None
+
+
+# Watchdog state for one driver; thresholds as described above
+def create_driver_watchdog(max_rss_mb=2500, latency_factor=3.0, latency_window=15, baseline_pages=10,
+                           check_every=5, max_pages_per_driver=None):
+    return {
+        'max_rss_mb': max_rss_mb,
+        'latency_factor': latency_factor,
+        'latencies': deque(maxlen=latency_window),
+        'baseline_pages': baseline_pages,
+        'baseline_latency': None,
+        'check_every': check_every, # Sample RSS every N pages (walking the process tree is not free)
+        'max_pages_per_driver': max_pages_per_driver, # Optional hard cap, None = no cap
+        'pages_since_recycle': 0,
+        'last_rss_mb': 0.0,
+        'recycles': 0,
+    }
+
+
+def get_process_tree_rss_mb(root_pid):
+    # Total resident memory (MB) of root_pid and all of its descendants
+    if psutil is not None:
+        try:
+            root = psutil.Process(root_pid)
+            processes = [root] + root.children(recursive=True)
+            total_bytes = 0
+            for process in processes:
+                try:
+                    total_bytes += process.memory_info().rss
+                except Exception:
+                    pass # Process exited while walking the tree
+            return total_bytes / (1024 * 1024)
+        except Exception:
+            return 0.0
+
+    # Fallback without psutil: build the parent map from /proc (Linux only)
+    try:
+        children_by_parent = {}
+        for entry in os.listdir('/proc'):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f'/proc/{entry}/stat') as stat_file:
+                    # The command name may contain spaces, the parent pid follows the closing ')'
+                    parent_pid = int(stat_file.read().rsplit(')', 1)[1].split()[1])
+                children_by_parent.setdefault(parent_pid, []).append(int(entry))
+            except Exception:
+                pass
+        page_size = os.sysconf('SC_PAGE_SIZE')
+        total_bytes = 0
+        pending = [root_pid]
+        while pending:
+            pid = pending.pop()
+            pending.extend(children_by_parent.get(pid, []))
+            try:
+                with open(f'/proc/{pid}/statm') as statm_file:
+                    total_bytes += int(statm_file.read().split()[1]) * page_size
+            except Exception:
+                pass
+        return total_bytes / (1024 * 1024)
+    except Exception:
+        return 0.0
+
+
+def get_driver_rss_mb(driver):
+    try:
+        return get_process_tree_rss_mb(driver.service.process.pid)
+    except Exception:
+        return 0.0
+
+
+# Records one page load and returns the reason the driver should be recycled, or None.
+# prefetched: the page had loaded in a background tab (prefetch.py), so page_seconds is not a
+# load time and stays out of the baseline and the rolling latency; the page still counts for RSS.
+def watchdog_record_page(watchdog, driver, page_seconds, prefetched=False):
+    watchdog['pages_since_recycle'] += 1
+
+    if not prefetched and watchdog['baseline_latency'] is None:
+        watchdog['latencies'].append(page_seconds)
+        if len(watchdog['latencies']) >= watchdog['baseline_pages']:
+            # Baseline = median latency of the first pages of a fresh browser
+            watchdog['baseline_latency'] = sorted(watchdog['latencies'])[len(watchdog['latencies']) // 2]
+            watchdog['latencies'].clear()
+            print(f"Watchdog: baseline page latency {watchdog['baseline_latency']:.2f}s")
+    elif not prefetched:
+        watchdog['latencies'].append(page_seconds)
+        if len(watchdog['latencies']) == watchdog['latencies'].maxlen:
+            recent_latency = sorted(watchdog['latencies'])[len(watchdog['latencies']) // 2]
+            if recent_latency > watchdog['baseline_latency'] * watchdog['latency_factor']:
+                return f"page latency {recent_latency:.2f}s > {watchdog['latency_factor']}x baseline {watchdog['baseline_latency']:.2f}s"
+
+    if watchdog['max_pages_per_driver'] and watchdog['pages_since_recycle'] >= watchdog['max_pages_per_driver']:
+        return f"reached {watchdog['max_pages_per_driver']} pages on this driver"
+
+    if watchdog['pages_since_recycle'] % watchdog['check_every'] == 0:
+        watchdog['last_rss_mb'] = get_driver_rss_mb(driver)
+        if watchdog['last_rss_mb'] > watchdog['max_rss_mb']:
+            return f"browser RSS {watchdog['last_rss_mb']:.0f}MB > {watchdog['max_rss_mb']}MB"
+
+    return None
+
+
+# Errors that mean the browser itself is gone, so the page must be retried on a new driver
+dead_driver_markers = ['invalid session id', 'chrome not reachable', 'disconnected', 'tab crashed',
+                       'session deleted', 'no such window', 'connection refused', 'max retries exceeded']
+
+
+def is_dead_driver_error(status_text):
+    status_text = str(status_text).lower()
+    return any(marker in status_text for marker in dead_driver_markers)
+
+
+def recycle_driver(driver, display, watchdog, reason):
+    print(f"\n--- Watchdog: Recycling browser ({reason}) ---")
+    try:
+        driver.quit()
+    except Exception as e:
+        print(f"Warning: Error closing old driver during recycle: {e}")
+    discard_profile_clone(driver)
+    if display:
+        try:
+            display.stop()
+        except Exception as e:
+            print(f"Warning: Error stopping old virtual display during recycle: {e}")
+    watchdog['recycles'] += 1
+    watchdog['pages_since_recycle'] = 0
+    watchdog['latencies'].clear()
+    return setup_driver()
+
+
@@ -0,0 +1,678 @@
+# --- Distributed Work Queue: Many Nodes Sharing One Sweep ---
+# Search queries (or map tiles expressed as queries) and place links are put
+# on a shared queue. Any number of stateless workers lease tasks, keep the
+# lease alive with heartbeats while a browser works on them, and acknowledge
+# the result. If a node dies its leases expire and the tasks are handed to the
+# next worker that asks, up to max_attempts times.
+#
+# Brokers:
+#   sqlite:///path/to/sweep.db  - a local file, shared by processes on one host
+#                                 (or over a network filesystem with working locks)
+#   redis://host:6379/0         - any Redis-compatible server, needs the redis package
+#
+# Queue names are the stage names: "links" tasks carry {'query': ...} and their
+# workers enqueue the collected place links as "details" tasks {'url': ...}.
+#
+# Both brokers also store the token buckets of the rate limiters
+# (rate_limit.use_shared_rate_store), so all workers of a sweep share one rate.
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+from .driver import setup_driver, close_driver
+
+links_queue = "links"
+details_queue = "details"
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+
+# Every task is identified inside its queue by a key, so enqueueing the same query
+# or link twice (e.g. from two overlapping sweeps) does not create duplicate work.
+def task_key_for(queue, payload):
+    if queue == links_queue:
+        return payload['query']
+    if queue == details_queue:
+        return payload['url']
+    return json.dumps(payload, sort_keys=True)
+
+
+class SQLiteTaskBroker:
+    # A new connection is opened per call, so one broker object can be shared
+    # between a worker and its heartbeat thread.
+    def __init__(self, path, lease_seconds=300, max_attempts=3):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        with self._connect() as connection:
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS tasks (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    queue TEXT NOT NULL,
+                    task_key TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    lease_owner TEXT,
+                    lease_expires REAL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    result TEXT,
+                    error TEXT,
+                    updated REAL,
+                    UNIQUE (queue, task_key)
+                )""")
+            connection.execute("CREATE INDEX IF NOT EXISTS tasks_by_status ON tasks (queue, status, lease_expires)")
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS rate_buckets (
+                    key TEXT PRIMARY KEY,
+                    rate REAL NOT NULL,
+                    tokens REAL NOT NULL,
+                    updated REAL NOT NULL
+                )""")
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        return connection
+
+    def enqueue(self, queue, payloads):
+        now = time.time()
+        rows = [(queue, task_key_for(queue, payload), json.dumps(payload), now) for payload in payloads]
+        with self._connect() as connection:
+            before = connection.total_changes
+            connection.executemany(
+                "INSERT OR IGNORE INTO tasks (queue, task_key, payload, updated) VALUES (?, ?, ?, ?)", rows)
+            return connection.total_changes - before
+
+    def lease(self, queue, worker_id, count=1):
+        now = time.time()
+        connection = self._connect()
+        try:
+            # BEGIN IMMEDIATE takes the write lock, so two workers never lease the same task
+            connection.execute("BEGIN IMMEDIATE")
+            # Expired leases of dead workers that already used up their attempts are given up on
+            connection.execute(
+                "UPDATE tasks SET status = 'failed', error = 'lease expired too many times', updated = ? "
+                "WHERE queue = ? AND status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, queue, now, self.max_attempts))
+            rows = connection.execute(
+                "SELECT id, payload, attempts FROM tasks WHERE queue = ? AND "
+                "(status = 'pending' OR (status = 'leased' AND lease_expires < ?)) ORDER BY id LIMIT ?",
+                (queue, now, count)).fetchall()
+            for task_id, _, _ in rows:
+                connection.execute(
+                    "UPDATE tasks SET status = 'leased', lease_owner = ?, lease_expires = ?, "
+                    "attempts = attempts + 1, updated = ? WHERE id = ?",
+                    (worker_id, now + self.lease_seconds, now, task_id))
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        finally:
+            connection.close()
+        return [{'id': task_id, 'payload': json.loads(payload), 'attempt': attempts + 1}
+                for task_id, payload, attempts in rows]
+
+    # Extends the leases this worker still holds; returns the ids it lost (e.g. after a long stall)
+    def heartbeat(self, task_ids, worker_id):
+        now = time.time()
+        lost_task_ids = []
+        with self._connect() as connection:
+            for task_id in task_ids:
+                cursor = connection.execute(
+                    "UPDATE tasks SET lease_expires = ?, updated = ? "
+                    "WHERE id = ? AND lease_owner = ? AND status = 'leased'",
+                    (now + self.lease_seconds, now, task_id, worker_id))
+                if cursor.rowcount == 0:
+                    lost_task_ids.append(task_id)
+        return lost_task_ids
+
+    def ack(self, task_id, worker_id, result):
+        with self._connect() as connection:
+            cursor = connection.execute(
+                "UPDATE tasks SET status = 'done', result = ?, lease_expires = NULL, updated = ? "
+                "WHERE id = ? AND lease_owner = ? AND status = 'leased'",
+                (json.dumps(result), time.time(), task_id, worker_id))
+            return cursor.rowcount == 1
+
+    # Gives the task back: pending again while attempts remain, otherwise failed
+    def nack(self, task_id, worker_id, error):
+        with self._connect() as connection:
+            cursor = connection.execute(
+                "UPDATE tasks SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "error = ?, lease_owner = NULL, lease_expires = NULL, updated = ? "
+                "WHERE id = ? AND lease_owner = ? AND status = 'leased'",
+                (self.max_attempts, str(error), time.time(), task_id, worker_id))
+            return cursor.rowcount == 1
+
+    def results(self, queue):
+        with self._connect() as connection:
+            for (result,) in connection.execute(
+                    "SELECT result FROM tasks WHERE queue = ? AND status = 'done' ORDER BY id", (queue,)):
+                yield json.loads(result)
+
+    def stats(self, queue):
+        with self._connect() as connection:
+            counts = dict(connection.execute(
+                "SELECT status, COUNT(*) FROM tasks WHERE queue = ? GROUP BY status", (queue,)).fetchall())
+        return {status: counts.get(status, 0) for status in ['pending', 'leased', 'done', 'failed']}
+
+    # --- Shared token buckets (rate_limit.SharedTokenBucket) ---
+    # update(rate, tokens) -> (rate, tokens, answer) runs on the refilled bucket inside one write transaction
+    def _update_rate_bucket(self, key, initial_rate, burst, update):
+        now = time.time()
+        connection = self._connect()
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            row = connection.execute("SELECT rate, tokens, updated FROM rate_buckets WHERE key = ?", (key,)).fetchone()
+            rate, tokens, updated = row if row else (initial_rate, burst, now)
+            tokens = min(burst, tokens + max(0.0, now - updated) * rate)
+            rate, tokens, answer = update(rate, tokens)
+            connection.execute("INSERT OR REPLACE INTO rate_buckets (key, rate, tokens, updated) VALUES (?, ?, ?, ?)",
+                               (key, rate, tokens, now))
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        finally:
+            connection.close()
+        return answer
+
+    # Returns 0 if a token was taken, otherwise the seconds to wait before trying again
+    def rate_bucket_take(self, key, initial_rate, burst):
+        def take(rate, tokens):
+            if tokens >= 1.0:
+                return rate, tokens - 1.0, 0.0
+            return rate, tokens, (1.0 - tokens) / rate
+        return self._update_rate_bucket(key, initial_rate, burst, take)
+
+    def rate_bucket_adjust(self, key, initial_rate, burst, multiplier, step, min_rate, max_rate):
+        def adjust(rate, tokens):
+            rate = min(max_rate, max(min_rate, rate * multiplier + step))
+            return rate, tokens, rate
+        return self._update_rate_bucket(key, initial_rate, burst, adjust)
+
+    def rate_bucket_rate(self, key, initial_rate, burst):
+        with self._connect() as connection:
+            row = connection.execute("SELECT rate FROM rate_buckets WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else initial_rate
+
+
+# Every state change of a Redis task is one Lua script, so it is atomic: a worker that
+# dies mid-call either leased the task (and its lease will expire) or did not touch it,
+# and a heartbeat or lease reclaim racing an ack sees the task's current status.
+# KEYS: pending list, tasks hash, leases zset, results hash, task-key hash (each script uses a prefix of them)
+redis_enqueue_script = """
+if redis.call('HSETNX', KEYS[5], ARGV[1], ARGV[2]) == 0 then return 0 end
+redis.call('HSET', KEYS[2], ARGV[2], ARGV[3])
+redis.call('RPUSH', KEYS[1], ARGV[2])
+return 1
+"""
+
+# ARGV: worker id, lease expiry, count. Returns {{id, payload json, attempt}, ...}
+redis_lease_script = """
+local leased = {}
+while #leased < tonumber(ARGV[3]) do
+    local task_id = redis.call('LPOP', KEYS[1])
+    if not task_id then break end
+    local task_json = redis.call('HGET', KEYS[2], task_id)
+    if task_json then
+        local task = cjson.decode(task_json)
+        if task['status'] == 'pending' then
+            task['status'] = 'leased'
+            task['owner'] = ARGV[1]
+            task['attempts'] = task['attempts'] + 1
+            redis.call('HSET', KEYS[2], task_id, cjson.encode(task))
+            redis.call('ZADD', KEYS[3], ARGV[2], task_id)
+            table.insert(leased, {task_id, cjson.encode(task['payload']), task['attempts']})
+        end
+    end
+end
+return leased
+"""
+
+# ARGV: now, max attempts. Expired leases of tasks that are still leased go back to pending (or fail);
+# a lease entry left behind by a task that is already done or failed is just dropped.
+redis_reclaim_script = """
+local reclaimed = 0
+for _, task_id in ipairs(redis.call('ZRANGEBYSCORE', KEYS[3], 0, ARGV[1])) do
+    redis.call('ZREM', KEYS[3], task_id)
+    local task_json = redis.call('HGET', KEYS[2], task_id)
+    if task_json then
+        local task = cjson.decode(task_json)
+        if task['status'] == 'leased' then
+            task['owner'] = cjson.null
+            if task['attempts'] >= tonumber(ARGV[2]) then
+                task['status'] = 'failed'
+                task['error'] = 'lease expired too many times'
+            else
+                task['status'] = 'pending'
+                redis.call('LPUSH', KEYS[1], task_id)
+            end
+            redis.call('HSET', KEYS[2], task_id, cjson.encode(task))
+            reclaimed = reclaimed + 1
+        end
+    end
+end
+return reclaimed
+"""
+
+# ARGV: task id, worker id, lease expiry. 1 if the lease was extended, 0 if the worker lost it.
+redis_heartbeat_script = """
+local task_json = redis.call('HGET', KEYS[2], ARGV[1])
+if not task_json then return 0 end
+local task = cjson.decode(task_json)
+if task['status'] ~= 'leased' or task['owner'] ~= ARGV[2] then return 0 end
+redis.call('ZADD', KEYS[3], ARGV[3], ARGV[1])
+return 1
+"""
+
+# ARGV: task id, worker id, 'ack' or 'nack', result json (ack) or error (nack), max attempts
+redis_finish_script = """
+local task_json = redis.call('HGET', KEYS[2], ARGV[1])
+if not task_json then return 0 end
+local task = cjson.decode(task_json)
+if task['status'] ~= 'leased' or task['owner'] ~= ARGV[2] then return 0 end
+redis.call('ZREM', KEYS[3], ARGV[1])
+task['owner'] = cjson.null
+if ARGV[3] == 'ack' then
+    task['status'] = 'done'
+    redis.call('HSET', KEYS[4], ARGV[1], ARGV[4])
+else
+    task['error'] = ARGV[4]
+    if task['attempts'] >= tonumber(ARGV[5]) then
+        task['status'] = 'failed'
+    else
+        task['status'] = 'pending'
+        redis.call('RPUSH', KEYS[1], ARGV[1])
+    end
+end
+redis.call('HSET', KEYS[2], ARGV[1], cjson.encode(task))
+return 1
+"""
+
+# Shared token bucket (rate_limit.SharedTokenBucket). KEYS: bucket hash.
+# ARGV: now, initial rate, burst, 'take' or 'adjust', multiplier, step, min rate, max rate.
+# 'take' returns 0 or the seconds to wait, 'adjust' the new rate (as strings: Lua numbers would be truncated).
+redis_rate_bucket_script = """
+local now, burst = tonumber(ARGV[1]), tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'rate', 'tokens', 'updated')
+local rate = tonumber(state[1]) or tonumber(ARGV[2])
+local tokens = tonumber(state[2]) or burst
+local updated = tonumber(state[3]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+local answer
+if ARGV[4] == 'take' then
+    if tokens >= 1 then
+        tokens = tokens - 1
+        answer = 0
+    else
+        answer = (1 - tokens) / rate
+    end
+else
+    rate = math.min(tonumber(ARGV[8]), math.max(tonumber(ARGV[7]), rate * tonumber(ARGV[5]) + tonumber(ARGV[6])))
+    answer = rate
+end
+redis.call('HSET', KEYS[1], 'rate', tostring(rate), 'tokens', tostring(tokens), 'updated', tostring(now))
+return tostring(answer)
+"""
+
+
+class RedisTaskBroker:
+    # Keys per queue: <prefix>:<queue>:pending (list of ids), :leases (zset id -> expiry),
+    # :tasks (hash id -> task json), :keys (hash task_key -> id), :results (hash id -> result json)
+    # client is an optional ready redis.Redis-compatible client (decode_responses=True) instead of url.
+    def __init__(self, url=None, lease_seconds=300, max_attempts=3, prefix="gmaps_scraper", client=None):
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(url, decode_responses=True)
+        self.client = client
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.prefix = prefix
+        self._enqueue_script = client.register_script(redis_enqueue_script)
+        self._lease_script = client.register_script(redis_lease_script)
+        self._reclaim_script = client.register_script(redis_reclaim_script)
+        self._heartbeat_script = client.register_script(redis_heartbeat_script)
+        self._finish_script = client.register_script(redis_finish_script)
+        self._rate_bucket_script = client.register_script(redis_rate_bucket_script)
+
+    def _key(self, queue, name):
+        return f"{self.prefix}:{queue}:{name}"
+
+    def _keys(self, queue):
+        return [self._key(queue, name) for name in ["pending", "tasks", "leases", "results", "keys"]]
+
+    def enqueue(self, queue, payloads):
+        inserted = 0
+        for payload in payloads:
+            task_id = uuid.uuid4().hex
+            # The task key makes enqueueing the same task twice a no-op
+            task = {'payload': payload, 'attempts': 0, 'status': 'pending', 'owner': None}
+            inserted += self._enqueue_script(keys=self._keys(queue),
+                                             args=[task_key_for(queue, payload), task_id, json.dumps(task)])
+        return inserted
+
+    def _reclaim_expired(self, queue):
+        return self._reclaim_script(keys=self._keys(queue)[:3], args=[time.time(), self.max_attempts])
+
+    def lease(self, queue, worker_id, count=1):
+        self._reclaim_expired(queue)
+        rows = self._lease_script(keys=self._keys(queue)[:3],
+                                  args=[worker_id, time.time() + self.lease_seconds, count])
+        return [{'id': task_id, 'payload': json.loads(payload_json), 'attempt': int(attempt)}
+                for task_id, payload_json, attempt in rows]
+
+    def heartbeat(self, task_ids, worker_id, queue=None):
+        lost_task_ids = []
+        for task_id in task_ids:
+            task_queue = queue or self._queue_of(task_id)
+            if not task_queue or not self._heartbeat_script(
+                    keys=self._keys(task_queue)[:3], args=[task_id, worker_id, time.time() + self.lease_seconds]):
+                lost_task_ids.append(task_id)
+        return lost_task_ids
+
+    def _queue_of(self, task_id):
+        for queue in [links_queue, details_queue]:
+            if self.client.hexists(self._key(queue, "tasks"), task_id):
+                return queue
+        return None
+
+    def _finish(self, task_id, worker_id, action, detail):
+        queue = self._queue_of(task_id)
+        if queue is None:
+            return False
+        return bool(self._finish_script(keys=self._keys(queue)[:4],
+                                        args=[task_id, worker_id, action, detail, self.max_attempts]))
+
+    def ack(self, task_id, worker_id, result):
+        return self._finish(task_id, worker_id, 'ack', json.dumps(result))
+
+    # Gives the task back: pending again while attempts remain, otherwise failed
+    def nack(self, task_id, worker_id, error):
+        return self._finish(task_id, worker_id, 'nack', str(error))
+
+    def results(self, queue):
+        for result_json in self.client.hvals(self._key(queue, "results")):
+            yield json.loads(result_json)
+
+    def stats(self, queue):
+        counts = {'pending': 0, 'leased': 0, 'done': 0, 'failed': 0}
+        for task_json in self.client.hvals(self._key(queue, "tasks")):
+            counts[json.loads(task_json)['status']] += 1
+        return counts
+
+    # --- Shared token buckets (rate_limit.SharedTokenBucket) ---
+    def _rate_bucket(self, key, initial_rate, burst, mode, multiplier=1.0, step=0.0, min_rate=0.0, max_rate=1e12):
+        return float(self._rate_bucket_script(keys=[f"{self.prefix}:rate:{key}"],
+                                              args=[time.time(), initial_rate, burst, mode, multiplier, step,
+                                                    min_rate, min(max_rate, 1e12)]))
+
+    def rate_bucket_take(self, key, initial_rate, burst):
+        return self._rate_bucket(key, initial_rate, burst, 'take')
+
+    def rate_bucket_adjust(self, key, initial_rate, burst, multiplier, step, min_rate, max_rate):
+        return self._rate_bucket(key, initial_rate, burst, 'adjust', multiplier, step, min_rate, max_rate)
+
+    def rate_bucket_rate(self, key, initial_rate, burst):
+        rate = self.client.hget(f"{self.prefix}:rate:{key}", 'rate')
+        return float(rate) if rate is not None else initial_rate
+
+
+def open_broker(broker_url, lease_seconds=300, max_attempts=3):
+    if broker_url.startswith("sqlite:///"):
+        return SQLiteTaskBroker(broker_url[len("sqlite:///"):], lease_seconds=lease_seconds, max_attempts=max_attempts)
+    if broker_url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisTaskBroker(broker_url, lease_seconds=lease_seconds, max_attempts=max_attempts)
+    raise ValueError(f"Unsupported broker URL '{broker_url}' (use sqlite:///path.db or redis://host:port/db)")
+
+
+# Keeps the leases of the in-flight tasks alive from a background thread while the
+# browser is busy (a single feed scroll can take minutes).
+class LeaseHeartbeat:
+    def __init__(self, broker, worker_id, interval_seconds):
+        self.broker = broker
+        self.worker_id = worker_id
+        self.interval_seconds = interval_seconds
+        self.task_ids = set()
+        self.lost_task_ids = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join(timeout=self.interval_seconds)
+
+    def track(self, task_ids):
+        with self._lock:
+            self.task_ids.update(task_ids)
+
+    def untrack(self, task_id):
+        with self._lock:
+            self.task_ids.discard(task_id)
+            self.lost_task_ids.discard(task_id)
+
+    # True once a heartbeat found the task no longer leased to this worker (expired and reclaimed):
+    # another worker may be on it, so it must be dropped, not acked or nacked
+    def lost(self, task_id):
+        with self._lock:
+            return task_id in self.lost_task_ids
+
+    def _run(self):
+        while not self._stop.wait(self.interval_seconds):
+            with self._lock:
+                task_ids = list(self.task_ids)
+            if not task_ids:
+                continue
+            try:
+                lost = self.broker.heartbeat(task_ids, self.worker_id)
+                if lost:
+                    print(f"Warning: Lost the lease on {len(lost)} task(s); another worker may redo them.")
+                    with self._lock:
+                        self.lost_task_ids.update(lost)
+            except Exception as e:
+                print(f"Warning: Heartbeat failed: {e}")
+
+
+# --- Stateless Worker: Links Stage ---
+# Leases search queries, collects their place links (with card data) on one
+# long-lived driver, enqueues each link as a details task and acknowledges the query.
+# With a polygon area (geo.load_polygon), only links inside it become details tasks.
+def run_links_worker(broker, worker_id=None, idle_timeout=30, poll_seconds=5, polygon=None):
+    from .links import navigate_search_and_collect_all_item_links
+    from .selector_registry import SelectorDriftError, get_selector_registry
+    from .geo import filter_links_to_polygon
+
+    worker_id = worker_id or default_worker_id()
+    print(f"--- Links worker '{worker_id}' starting ---")
+    get_selector_registry().reset() # Circuits from an earlier run in this process do not carry over
+    driver, display = setup_driver()
+    if not driver:
+        print("--- Worker Aborted: Driver setup failed. ---")
+        return 0
+
+    processed = 0
+    idle_since = time.time()
+    try:
+        with LeaseHeartbeat(broker, worker_id, interval_seconds=max(1, broker.lease_seconds / 3)) as heartbeat:
+            while True:
+                tasks = broker.lease(links_queue, worker_id, count=1)
+                if not tasks:
+                    if time.time() - idle_since > idle_timeout:
+                        print("Links queue idle. Worker exiting.")
+                        break
+                    time.sleep(poll_seconds)
+                    continue
+                idle_since = time.time()
+
+                task = tasks[0]
+                heartbeat.track([task['id']])
+                query = task['payload']['query']
+                print(f"\n--- Links task {task['id']} (attempt {task['attempt']}): '{query}' ---")
+                try:
+                    card_data = {}
+                    links = navigate_search_and_collect_all_item_links(driver, query=query, card_data=card_data)
+                    if heartbeat.lost(task['id']):
+                        print(f"Dropping links task {task['id']}: its lease was lost to another worker.")
+                    elif not links:
+                        broker.nack(task['id'], worker_id, "no links collected")
+                    else:
+                        detail_links = filter_links_to_polygon(links, polygon) if polygon else links
+                        added = broker.enqueue(details_queue, [{'url': link, 'query': query, 'card': card_data.get(link)}
+                                                               for link in detail_links])
+                        broker.ack(task['id'], worker_id, {'query': query, 'links': links, 'cards': card_data})
+                        print(f"Queued {added} new details task(s) from {len(links)} links.")
+                        processed += 1
+                except SelectorDriftError as drift_e:
+                    # Hand the query back and stop this worker: the selectors need fixing
+                    print(f"--- Stopping worker: {drift_e} ---")
+                    broker.nack(task['id'], worker_id, "selector drift")
+                    break
+                except Exception as e:
+                    print(f"--- ERROR in links task {task['id']}: {e} ---")
+                    broker.nack(task['id'], worker_id, e)
+                finally:
+                    heartbeat.untrack(task['id'])
+    finally:
+        close_driver(driver, display, step_label="Links worker cleanup")
+    print(f"--- Links worker '{worker_id}' finished: {processed} queries processed ---")
+    return processed
+
+
+# --- Stateless Worker: Details Stage ---
+# Leases batches of place links, scrapes each one and acknowledges it with its
+# record. Uses the same watchdog as run_scrape_from_links; a page that failed
+# because the browser died is handed back to the queue instead of being acked.
+# Pacing comes from the shared rate limiter inside scrape_detail_page_from_link.
+# prefetch_depth > 0 loads the next links of the leased batch in background tabs (prefetch.py).
+def run_details_worker(broker, worker_id=None, batch_size=5, idle_timeout=30, poll_seconds=5,
+                       use_watchdog=True, watchdog=None, snapshot_dir=None, prefetch_depth=0):
+    from .details import scrape_detail_page_from_link
+    from .prefetch import TabPrefetcher
+    from .selector_registry import SelectorDriftError, get_selector_registry
+    from .watchdog import create_driver_watchdog, watchdog_record_page, is_dead_driver_error, recycle_driver
+
+    worker_id = worker_id or default_worker_id()
+    print(f"--- Details worker '{worker_id}' starting ---")
+    get_selector_registry().reset() # Circuits from an earlier run in this process do not carry over
+    driver, display = setup_driver()
+    if not driver:
+        print("--- Worker Aborted: Driver setup failed. ---")
+        return 0
+    if use_watchdog and watchdog is None:
+        watchdog = create_driver_watchdog()
+
+    processed = 0
+    drift_stopped = False
+    idle_since = time.time()
+    prefetcher = TabPrefetcher(driver, depth=prefetch_depth) if prefetch_depth > 0 else None
+    try:
+        with LeaseHeartbeat(broker, worker_id, interval_seconds=max(1, broker.lease_seconds / 3)) as heartbeat:
+            while driver and not drift_stopped:
+                tasks = broker.lease(details_queue, worker_id, count=batch_size)
+                if not tasks:
+                    if time.time() - idle_since > idle_timeout:
+                        print("Details queue idle. Worker exiting.")
+                        break
+                    time.sleep(poll_seconds)
+                    continue
+                idle_since = time.time()
+                heartbeat.track([task['id'] for task in tasks])
+
+                for task_index, task in enumerate(tasks):
+                    url = task['payload']['url']
+                    if heartbeat.lost(task['id']):
+                        print(f"Skipping details task {task['id']}: its lease was lost to another worker.")
+                        heartbeat.untrack(task['id'])
+                        if prefetcher:
+                            prefetcher.discard(url)
+                        continue
+                    if not driver:
+                        # Recycle failed: hand the rest of the batch back
+                        for remaining_task in tasks[task_index:]:
+                            broker.nack(remaining_task['id'], worker_id, "driver recycle failed")
+                            heartbeat.untrack(remaining_task['id'])
+                        break
+                    page_start_time = time.time()
+                    prefetched = None
+                    fill_prefetch = None
+                    if prefetcher:
+                        prefetched = prefetcher.take(url)
+                        upcoming_urls = [next_task['payload']['url'] for next_task in tasks[task_index + 1:]]
+                        fill_prefetch = lambda: prefetcher.fill(upcoming_urls[:prefetch_depth])
+                    try:
+                        record = scrape_detail_page_from_link(driver, url, snapshot_dir=snapshot_dir,
+                                                              prefetched=prefetched, on_loaded=fill_prefetch)
+                    except SelectorDriftError as drift_e:
+                        # Hand the batch back untouched and stop this worker: the selectors need fixing
+                        print(f"--- Stopping worker: {drift_e} ---")
+                        for remaining_task in tasks[task_index:]:
+                            broker.nack(remaining_task['id'], worker_id, "selector drift")
+                            heartbeat.untrack(remaining_task['id'])
+                        drift_stopped = True
+                        break
+                    page_seconds = time.time() - page_start_time
+
+                    page_failed = str(record.get('Scrape Status', '')).startswith('Navigation/Load Failed')
+                    recycle_reason = None
+                    if use_watchdog:
+                        if page_failed and is_dead_driver_error(record['Scrape Status']):
+                            recycle_reason = "browser session died"
+                        else:
+                            recycle_reason = watchdog_record_page(watchdog, driver, page_seconds,
+                                                                  prefetched=prefetched is not None)
+
+                    if heartbeat.lost(task['id']):
+                        print(f"Dropping details task {task['id']}: its lease was lost to another worker.")
+                    elif recycle_reason and page_failed:
+                        broker.nack(task['id'], worker_id, record['Scrape Status'])
+                    else:
+                        broker.ack(task['id'], worker_id, dict(record))
+                        processed += 1
+                    heartbeat.untrack(task['id'])
+
+                    if recycle_reason:
+                        if prefetcher:
+                            prefetcher.close(close_tabs=False)
+                        driver, display = recycle_driver(driver, display, watchdog, recycle_reason)
+                        if prefetcher and driver:
+                            prefetcher = TabPrefetcher(driver, depth=prefetch_depth)
+    finally:
+        if prefetcher:
+            prefetcher.close(close_tabs=False)
+        close_driver(driver, display, step_label="Details worker cleanup")
+    print(f"--- Details worker '{worker_id}' finished: {processed} places processed ---")
+    return processed
+
+
+# Collects the acknowledged details records into one DataFrame / CSV
+def export_details_results(broker, csv_filename=None, normalize=False):
+    import pandas as pd
+    from .details import detail_columns
+
+    records = list(broker.results(details_queue))
+    snapshot_columns = ['Snapshot'] if any('Snapshot' in record for record in records) else []
+    df = pd.DataFrame(records, columns=detail_columns + snapshot_columns)
+    print(f"Collected {len(df)} details records from the queue.")
+    if normalize and not df.empty:
+        from .normalize import normalize_fields
+        df = normalize_fields(df)
+    if csv_filename and not df.empty:
+        try:
+            df.to_csv(csv_filename, index=False)
+            print(f"Data successfully saved to '{csv_filename}'")
+        except Exception as e:
+            print(f"--- ERROR: Failed to save queue results to CSV ---")
+            print(f"Error details: {e}")
+    return df
@@ -0,0 +1,57 @@
+import os
+
+from gmaps_scraper.archive import (parse_detail_html, reextract_archive, store_snapshot, record_snapshot,
+                                   latest_snapshots, load_snapshot, snapshot_column)
+
+place_html = """
+<div role="main">
+  <h1 class="DUwDvf lfPIob">Joe's Pizza</h1>
+  <button class="DkEaL" jsaction="pane.category">Pizza restaurant</button>
+  <button data-item-id="address" aria-label="Address: 7 Carmine St, New York, NY 10014"></button>
+  <button class="CsEnBe" data-item-id="phone:tel:+12123661182"><div class="Io6YTe">(212) 366-1182</div></button>
+  <a class="CsEnBe" data-item-id="authority" href="https://www.joespizzanyc.com/">joespizzanyc.com</a>
+</div>
+"""
+
+
+def test_parse_detail_html_reads_every_field():
+    data_item = parse_detail_html(place_html, "https://www.google.com/maps/place/a")
+    assert (data_item['Name'], data_item['Category']) == ("Joe's Pizza", "Pizza restaurant")
+    assert data_item['Address'] == "7 Carmine St, New York, NY 10014" # From the aria-label
+    assert data_item['Phone'] == "(212) 366-1182" # From the nested div
+    assert data_item['Website'] == "https://www.joespizzanyc.com/"
+    assert data_item['Scrape Status'] == 'Success'
+
+
+def test_parse_detail_html_without_a_name_is_a_major_failure():
+    data_item = parse_detail_html("<div role='main'><p>Loading</p></div>", "https://www.google.com/maps/place/a")
+    assert data_item['Name'] == 'N/A' and data_item['Scrape Status'] == "Major Failure: Name Not Found"
+
+
+def test_identical_snapshots_are_stored_once(tmp_path):
+    archive_dir = str(tmp_path)
+    first_hash = store_snapshot(archive_dir, place_html)
+    assert store_snapshot(archive_dir, place_html) == first_hash
+    stored_files = [name for _, _, names in os.walk(os.path.join(archive_dir, "objects")) for name in names]
+    assert len(stored_files) == 1 and load_snapshot(archive_dir, first_hash) == place_html
+
+
+def test_reextract_uses_the_latest_snapshot_per_url(tmp_path):
+    archive_dir = str(tmp_path)
+    old_hash = store_snapshot(archive_dir, place_html.replace("Joe's Pizza", "Old Name"))
+    new_hash = store_snapshot(archive_dir, place_html)
+    record_snapshot(archive_dir, "https://www.google.com/maps/place/a", old_hash)
+    record_snapshot(archive_dir, "https://www.google.com/maps/place/b", old_hash)
+    record_snapshot(archive_dir, "https://www.google.com/maps/place/a", new_hash)
+    with open(os.path.join(archive_dir, "index.jsonl"), "a") as index_file:
+        index_file.write('{"url": "https://www.google.com/maps/pl') # Torn line from a crashed writer
+    assert list(latest_snapshots(archive_dir).values()) == [new_hash, old_hash]
+
+    df = reextract_archive(archive_dir, csv_filename=str(tmp_path / "out.csv"), processes=1)
+    assert df['Name'].tolist() == ["Joe's Pizza", "Old Name"]
+    assert df[snapshot_column].tolist() == [new_hash, old_hash]
+    assert os.path.exists(tmp_path / "out.csv")
+
+
+def test_reextract_without_an_index_returns_an_empty_frame(tmp_path):
+    assert reextract_archive(str(tmp_path), csv_filename=None).empty
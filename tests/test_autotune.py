@@ -0,0 +1,20 @@
+from gmaps_scraper.autotune import standin_rate_limits, standin_unlimited_rate, choose_knee
+from gmaps_scraper.rate_limit import maps_place_target, maps_search_target
+from gmaps_scraper.standin import StandInServer
+
+
+def test_standin_trials_start_at_the_standin_capacity():
+    unlimited = standin_rate_limits(StandInServer())
+    assert unlimited[maps_place_target]['initial_rate'] == standin_unlimited_rate
+    throttled = standin_rate_limits(StandInServer(max_place_rps=3))
+    assert throttled[maps_place_target]['initial_rate'] == throttled[maps_place_target]['max_rate'] == 3
+    assert throttled[maps_search_target]['initial_rate'] == standin_unlimited_rate
+
+
+def test_knee_is_the_cheapest_setting_near_the_best_throughput():
+    def trial(workers, pages_per_sec, error_rate=0.0):
+        return {'workers': workers, 'prefetch_depth': 0, 'pages_per_sec': pages_per_sec, 'error_rate': error_rate,
+                'p95_seconds': 1.0, 'peak_rss_mb': 500}
+
+    trials = [trial(1, 1.0), trial(2, 1.9), trial(4, 2.0), trial(8, 3.0, error_rate=0.2)]
+    assert choose_knee(trials)['workers'] == 2
@@ -0,0 +1,98 @@
+import pandas as pd
+import pytest
+
+from gmaps_scraper import cli, details, links, refresh
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    # Stage entry points and the environment check are replaced by recorders
+    recorded = {'env': []}
+
+    def recorder(name, result):
+        def record(*args, **kwargs):
+            recorded[name] = (args, kwargs)
+            return result
+        return record
+
+    monkeypatch.setattr(cli, "ensure_environment", lambda **kwargs: recorded['env'].append(kwargs) or {'ok': True})
+    monkeypatch.setattr(links, "run_full_extraction_process", recorder('links', ['https://maps/a']))
+    monkeypatch.setattr(details, "run_scrape_from_links", recorder('details', pd.DataFrame([{'Name': 'A'}])))
+    monkeypatch.setattr(refresh, "run_refresh_from_previous", recorder('refresh', pd.DataFrame()))
+    return recorded
+
+
+@pytest.fixture
+def links_csv(tmp_path):
+    path = tmp_path / "links.csv"
+    pd.DataFrame([{'Business Link': 'https://maps/a', 'Card Name': 'A', 'Card Rating': '4.5', 'Card Reviews': '10',
+                   'Card Category': 'Pizza', 'Card Fingerprint': 'fa'},
+                  {'Business Link': 'https://maps/b', 'Card Name': 'B', 'Card Rating': 'N/A', 'Card Reviews': 'N/A',
+                   'Card Category': 'N/A', 'Card Fingerprint': 'fb'}]).to_csv(path, index=False)
+    return str(path)
+
+
+def test_read_links_file_formats(tmp_path, links_csv):
+    found_links, card_data = cli.read_links_file(links_csv)
+    assert found_links == ['https://maps/a', 'https://maps/b']
+    assert card_data['https://maps/a']['Card Fingerprint'] == 'fa'
+    details_csv = tmp_path / "details.csv"
+    pd.DataFrame([{'Google Maps Link': 'https://maps/c', 'Name': 'C'}]).to_csv(details_csv, index=False)
+    assert cli.read_links_file(str(details_csv)) == (['https://maps/c'], {})
+    plain = tmp_path / "links.txt"
+    plain.write_text("https://maps/d\n\nhttps://maps/e\n")
+    assert cli.read_links_file(str(plain)) == (['https://maps/d', 'https://maps/e'], {})
+
+
+def test_subcommand_is_required():
+    with pytest.raises(SystemExit):
+        cli.build_parser().parse_args([])
+
+
+def test_links_dispatch(calls, tmp_path):
+    assert cli.main(["links", "pizza in ny", "--output", str(tmp_path / "out.csv")]) == 0
+    assert calls['links'][1]['query'] == "pizza in ny" and calls['links'][1]['card_data'] == {}
+    assert cli.main(["links", "pizza in ny", "--no-card-data"]) == 0
+    assert calls['links'][1]['card_data'] is None
+    assert len(calls['env']) == 2
+
+
+def test_details_dispatch_reads_the_links_file(calls, links_csv):
+    assert cli.main(["--skip-env-check", "details", "--input", links_csv, "--max-rss-mb", "1000"]) == 0
+    args, kwargs = calls['details']
+    assert args[0] == ['https://maps/a', 'https://maps/b'] and kwargs['watchdog']['max_rss_mb'] == 1000
+    assert not calls['env']
+    cli.main(["--skip-env-check", "details", "--input", links_csv, "--no-watchdog"])
+    assert calls['details'][1]['watchdog'] is None and calls['details'][1]['use_watchdog'] is False
+
+
+def test_refresh_dispatch_passes_the_card_data(calls, links_csv):
+    assert cli.main(["--skip-env-check", "refresh", "--previous", "old.csv", "--links-csv", links_csv,
+                     "--budget", "5"]) == 1 # Nothing refreshed
+    args, kwargs = calls['refresh']
+    assert args == ("old.csv",) and kwargs['refresh_budget'] == 5
+    assert set(kwargs['card_data']) == {'https://maps/a', 'https://maps/b'}
+
+
+def test_failed_environment_check_stops_before_the_stage(calls, monkeypatch):
+    monkeypatch.setattr(cli, "ensure_environment", lambda **kwargs: {'ok': False})
+    assert cli.main(["links", "pizza in ny"]) == 1
+    assert 'links' not in calls
+
+
+def test_only_the_queue_worker_checks_the_environment(calls, monkeypatch):
+    monkeypatch.setattr(cli, "run_queue_command", lambda *args: 0)
+    assert cli.main(["queue", "stats", "--broker", "sqlite:///sweep.db"]) == 0
+    assert not calls['env']
+    assert cli.main(["queue", "worker", "--broker", "sqlite:///sweep.db"]) == 0
+    assert len(calls['env']) == 1
+
+
+def test_limit_options_reach_the_stages(calls, links_csv):
+    assert cli.main(["--skip-env-check", "pipeline", "pizza in ny", "--limit", "3"]) == 0
+    assert calls['links'][1]['target_count'] == 3 * cli.pipeline_limit_headroom
+    assert calls['links'][1]['card_predicate']({}) # Limit mode alone keeps every card, in feed order
+    assert calls['details'][1]['target_count'] == 3
+    assert cli.main(["--skip-env-check", "details", "--input", links_csv, "--min-rating", "4.5",
+                     "--category", "pizza", "--limit", "1"]) == 0
+    assert calls['details'][0][0] == ['https://maps/a'] and calls['details'][1]['target_count'] == 1
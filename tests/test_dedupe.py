@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+from gmaps_scraper.dedupe import (assign_duplicate_clusters, build_features, score_pairs, cluster_id_column,
+                                  cluster_size_column)
+
+
+def places(*rows):
+    columns = ['Google Maps Link', 'Name', 'Address', 'Phone', 'Latitude', 'Longitude', 'Scrape Status']
+    return pd.DataFrame([dict(zip(columns, row)) for row in rows], columns=columns)
+
+
+def pair_score(df, first=0, second=1):
+    return score_pairs(np.array([first]), np.array([second]), build_features(df))[0]
+
+
+def test_same_business_under_two_links_is_one_cluster():
+    df = places(
+        ('a', "Joe's Pizza", '7 Carmine St, New York, NY 10014', '(212) 366-1182', '40.7305', '-74.0021', 'Success'),
+        ('b', "Joe's Pizza Carmine", '7 Carmine Street, New York, NY 10014', '+1 212-366-1182', '40.7306', '-74.0022',
+         'Success'),
+        ('c', 'Bleecker Street Pizza', '69 7th Ave S, New York, NY 10014', '(212) 924-4466', '40.7321', '-74.0033',
+         'Success'),
+    )
+    clustered = assign_duplicate_clusters(df)
+    assert clustered[cluster_id_column].tolist() == [0, 0, 1]
+    assert clustered[cluster_size_column].tolist() == [2, 2, 1]
+    assert assign_duplicate_clusters(df, collapse=True)['Google Maps Link'].tolist() == ['a', 'c']
+
+
+def test_name_alone_never_merges():
+    df = places(('a', 'Starbucks', 'N/A', 'N/A', '', '', 'Success'), ('b', 'Starbucks', 'N/A', 'N/A', '', '', 'Success'))
+    assert pair_score(df) == 0.0
+
+
+def test_phone_and_address_merge_without_names():
+    df = places(('a', 'N/A', '7 Carmine St, New York', '(212) 366-1182', '', '', 'Success'),
+                ('b', 'N/A', '7 Carmine St, New York', '212-366-1182', '', '', 'Success'))
+    assert pair_score(df) == 1.0
+    assert assign_duplicate_clusters(df)[cluster_id_column].tolist() == [0, 0]
+
+
+def test_same_phone_different_places_stay_apart():
+    df = places(('a', 'Hilton Midtown', '1335 6th Ave', '(800) 445-8667', '40.7624', '-73.9793', 'Success'),
+                ('b', 'Hilton Garden Inn', '790 8th Ave', '(800) 445-8667', '40.7610', '-73.9879', 'Success'))
+    assert assign_duplicate_clusters(df)[cluster_id_column].tolist() == [0, 1]
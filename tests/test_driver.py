@@ -0,0 +1,139 @@
+import os
+import sys
+import types
+
+import pytest
+
+from gmaps_scraper import driver as driver_module
+from gmaps_scraper import env
+
+
+def make_driver(root, *parts):
+    directory = os.path.join(root, *parts)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, 'chromedriver')
+    with open(path, 'w') as driver_file:
+        driver_file.write("#!/bin/sh\n")
+    os.chmod(path, 0o755)
+    return path
+
+
+@pytest.fixture
+def chrome(monkeypatch, tmp_path):
+    # A fake Chrome binary, driver roots and cache in tmp_path; chrome['version'] is what Chrome reports
+    state = {'version': "Google Chrome 124.0.6367.91", 'version_calls': 0, 'root': str(tmp_path / "wdm")}
+    binary = tmp_path / "google-chrome"
+    binary.write_text("v1")
+
+    def get_chrome_version():
+        state['version_calls'] += 1
+        return state['version']
+    monkeypatch.setattr(env, "get_chrome_version", get_chrome_version)
+    monkeypatch.setattr(driver_module, "chrome_binary_location", str(binary))
+    monkeypatch.setattr(driver_module, "driver_cache_path", str(tmp_path / "cache" / "chromedriver.json"))
+    monkeypatch.setattr(driver_module, "local_chromedriver_roots", [state['root']])
+    monkeypatch.setattr(driver_module, "fallback_chromedriver_path", str(tmp_path / "missing"))
+    state['binary'] = binary
+    return state
+
+
+def test_cached_path_skips_the_version_lookup(chrome):
+    local_path = make_driver(chrome['root'], "linux64", "124.0.6367.91")
+    assert driver_module.resolve_chromedriver_path() == local_path
+    assert driver_module.resolve_chromedriver_path() == local_path
+    assert chrome['version_calls'] == 1
+
+
+def test_chrome_update_resolves_again(chrome):
+    make_driver(chrome['root'], "linux64", "124.0.6367.91")
+    driver_module.resolve_chromedriver_path()
+    chrome['binary'].write_text("v2, a bigger binary")
+    chrome['version'] = "Google Chrome 125.0.6422.60"
+    new_path = make_driver(chrome['root'], "linux64", "125.0.6422.60")
+    assert driver_module.resolve_chromedriver_path() == new_path
+    assert set(driver_module.load_driver_cache()['drivers']) == {"124.0.6367.91", "125.0.6422.60"}
+
+
+def test_exact_version_wins_over_a_newer_driver_of_the_same_major(chrome):
+    exact_path = make_driver(chrome['root'], "linux64", "124.0.6367.91")
+    make_driver(chrome['root'], "linux64", "124.0.6367.201")
+    make_driver(chrome['root'], "linux64", "125.0.6422.60")
+    assert driver_module.find_local_chromedriver("124.0.6367.91") == exact_path
+    assert driver_module.find_local_chromedriver("124.0.6367.1").endswith(os.path.join("124.0.6367.201", "chromedriver"))
+    assert driver_module.find_local_chromedriver("126.0.1.1") is None
+
+
+def test_refresh_goes_to_webdriver_manager(chrome, monkeypatch, tmp_path):
+    make_driver(chrome['root'], "linux64", "124.0.6367.91")
+    driver_module.resolve_chromedriver_path()
+    downloaded_path = make_driver(str(tmp_path / "downloaded"))
+    manager_module = types.ModuleType("webdriver_manager.chrome")
+    manager_module.ChromeDriverManager = lambda: types.SimpleNamespace(install=lambda: downloaded_path)
+    monkeypatch.setitem(sys.modules, "webdriver_manager", types.ModuleType("webdriver_manager"))
+    monkeypatch.setitem(sys.modules, "webdriver_manager.chrome", manager_module)
+    assert driver_module.resolve_chromedriver_path(refresh=True) == downloaded_path
+    assert driver_module.resolve_chromedriver_path() == downloaded_path # Cached from now on
+
+
+class FakeDriver:
+    pass
+
+
+class FakeDisplay:
+    def __init__(self):
+        self.stopped = False
+
+    def stop(self):
+        self.stopped = True
+
+
+@pytest.fixture
+def chrome_starts(monkeypatch):
+    # chrome_starts(headless=..., xvfb=...) decides which starts succeed; returns the recorded calls
+    def stub(headless=True, xvfb=True):
+        calls = {'starts': [], 'displays': []}
+
+        def start_chrome(chrome_options, retry_resolution=True):
+            is_headless = "--headless=new" in chrome_options.arguments
+            calls['starts'].append(('headless' if is_headless else 'xvfb', retry_resolution, chrome_options.arguments))
+            return FakeDriver() if (headless if is_headless else xvfb) else None
+
+        def start_virtual_display():
+            calls['displays'].append(FakeDisplay())
+            return calls['displays'][-1]
+
+        monkeypatch.setattr(driver_module, "start_chrome", start_chrome)
+        monkeypatch.setattr(driver_module, "start_virtual_display", start_virtual_display)
+        return calls
+    yield stub
+    driver_module.configure_driver()
+
+
+def test_auto_mode_runs_headless_without_a_display(chrome_starts):
+    calls = chrome_starts()
+    driver_module.configure_driver(display_mode="auto", proxy="10.0.0.1:3128")
+    driver, display = driver_module.setup_driver()
+    assert driver is not None and display is None and not calls['displays']
+    assert driver.proxy == "10.0.0.1:3128" and "--proxy-server=10.0.0.1:3128" in calls['starts'][0][2]
+
+
+def test_auto_mode_falls_back_to_xvfb_without_a_second_lookup(chrome_starts):
+    calls = chrome_starts(headless=False)
+    driver_module.configure_driver(display_mode="auto")
+    driver, display = driver_module.setup_driver()
+    assert driver is not None and display is calls['displays'][0]
+    assert [(mode, retry) for mode, retry, _ in calls['starts']] == [('headless', False), ('xvfb', True)]
+
+
+def test_failed_start_stops_the_display(chrome_starts):
+    calls = chrome_starts(headless=False, xvfb=False)
+    driver_module.configure_driver(display_mode="xvfb")
+    assert driver_module.setup_driver() == (None, None)
+    assert calls['displays'][0].stopped
+
+
+def test_headless_mode_never_starts_a_display(chrome_starts):
+    calls = chrome_starts(headless=False)
+    driver_module.configure_driver(display_mode="headless")
+    assert driver_module.setup_driver() == (None, None)
+    assert not calls['displays'] and calls['starts'][0][1]
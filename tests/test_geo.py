@@ -0,0 +1,68 @@
+import random
+
+import pytest
+
+from gmaps_scraper.geo import (GridIndex, build_spatial_index, coordinates_from_url, filter_links_to_polygon,
+                               haversine_m)
+
+
+def random_points(count, seed=7):
+    rng = random.Random(seed)
+    return [(40.70 + rng.random() * 0.1, -74.02 + rng.random() * 0.1, i) for i in range(count)]
+
+
+@pytest.fixture
+def points():
+    return random_points(500)
+
+
+@pytest.fixture
+def index(points):
+    grid = GridIndex(cell_degrees=0.01)
+    for lat, lng, item in points:
+        grid.insert(lat, lng, item)
+    return grid
+
+
+def test_bbox_matches_brute_force(points, index):
+    for box in [(40.72, -74.00, 40.75, -73.97), (40.0, -75.0, 41.0, -73.0), (41.0, -74.0, 41.1, -73.9)]:
+        south, west, north, east = box
+        expected = {item for lat, lng, item in points if south <= lat <= north and west <= lng <= east}
+        assert {item for _, _, item in index.within_bbox(*box)} == expected
+
+
+def test_radius_matches_brute_force(points, index):
+    for lat, lng, radius_m in [(40.75, -73.97, 800), (40.70, -74.02, 3000), (40.80, -73.92, 50)]:
+        expected = sorted((haversine_m(lat, lng, p_lat, p_lng), item) for p_lat, p_lng, item in points
+                          if haversine_m(lat, lng, p_lat, p_lng) <= radius_m)
+        assert [(distance, item) for distance, _, _, item in index.within_radius(lat, lng, radius_m)] == expected
+
+
+def test_nearest_matches_brute_force(points, index):
+    # Inside the occupied area, outside it, and far away
+    for lat, lng in [(40.75, -73.97), (40.69, -74.03), (34.05, -118.24)]:
+        expected = sorted((haversine_m(lat, lng, p_lat, p_lng), item) for p_lat, p_lng, item in points)[:5]
+        assert [item for _, _, _, item in index.nearest(lat, lng, k=5)] == [item for _, item in expected]
+    assert GridIndex().nearest(40.75, -73.97) == []
+
+
+def test_index_reads_columns_then_links():
+    rows = [{'Google Maps Link': 'https://www.google.com/maps/place/A/data=!3d40.1!4d-74.1', 'Latitude': 'N/A',
+             'Longitude': 'N/A'},
+            {'Google Maps Link': 'https://www.google.com/maps/place/B', 'Latitude': 40.2, 'Longitude': -74.2},
+            {'Google Maps Link': 'https://www.google.com/maps/place/C', 'Latitude': 'N/A', 'Longitude': 'N/A'}]
+    index = build_spatial_index(rows)
+    assert sorted((lat, lng) for lat, lng, _ in index.within_bbox(39, -75, 41, -73)) == [(40.1, -74.1), (40.2, -74.2)]
+
+
+def test_coordinates_and_polygon_filter():
+    search_then_place = "https://www.google.com/maps/search/x/@40.0,-74.0/data=!3d40.0!4d-74.0!3d40.7489!4d-73.9833"
+    assert coordinates_from_url(search_then_place) == (40.7489, -73.9833)
+    assert coordinates_from_url("https://www.google.com/maps/place/x/data=!3d95.0!4d10.0") is None
+    # A square around midtown with a hole in its north-east corner
+    area = [[[(40.74, -74.00), (40.74, -73.97), (40.77, -73.97), (40.77, -74.00)],
+             [(40.76, -73.98), (40.76, -73.97), (40.77, -73.97), (40.77, -73.98)]]]
+    links = [f"https://www.google.com/maps/place/{name}/data=!3d{lat}!4d{lng}"
+             for name, lat, lng in [('in', 40.75, -73.99), ('hole', 40.765, -73.975), ('out', 40.70, -73.99)]]
+    assert filter_links_to_polygon(links + ["https://www.google.com/maps/place/none"], area) == links[:1]
+    assert len(filter_links_to_polygon(links + ["none"], area, keep_unlocated=True)) == 2
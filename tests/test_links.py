@@ -0,0 +1,37 @@
+from gmaps_scraper.links import build_card_predicate, select_top_links, parse_card_text, card_fingerprint
+
+
+def card(rating='4.5', category='Pizza restaurant'):
+    return {'Card Name': 'X', 'Card Rating': rating, 'Card Reviews': '10', 'Card Category': category}
+
+
+def test_parse_card_text():
+    parsed = parse_card_text(" Banter NYC ", "Banter NYC\n4,5(1,234)\nCafe · $$ · 6 E 36th St\nOpen ⋅ Closes 10 PM")
+    assert (parsed['Card Name'], parsed['Card Rating'], parsed['Card Reviews'], parsed['Card Category']) == (
+        'Banter NYC', '4.5', '1234', 'Cafe')
+    assert parse_card_text("", "No reviews")['Card Rating'] == 'N/A'
+
+
+def test_fingerprint_ignores_the_review_count():
+    assert card_fingerprint(card()) == card_fingerprint({**card(), 'Card Reviews': '11'})
+    assert card_fingerprint(card()) != card_fingerprint(card(rating='4.4'))
+
+
+def test_card_predicate():
+    assert build_card_predicate() is None
+    predicate = build_card_predicate(min_rating=4.5, categories=[" PIZZA ", ""])
+    assert predicate(card())
+    assert not predicate(card(rating='4.4'))
+    assert not predicate(card(rating='N/A')) # Unrated places never meet a rating floor
+    assert not predicate(card(category='Cafe'))
+    assert build_card_predicate(categories=['cafe', 'bakery'])(card(category='Bakery · $'))
+
+
+def test_select_top_links_keeps_feed_order():
+    card_data = {'a': card(rating='4.0'), 'b': card(), 'c': card(rating='4.8'), 'd': card()}
+    links = ['a', 'b', 'no-card', 'c', 'd']
+    assert select_top_links(links, target_count=2) == ['a', 'b']
+    assert select_top_links(links) == links
+    predicate = build_card_predicate(min_rating=4.5)
+    assert select_top_links(links, card_data, target_count=2, card_predicate=predicate) == ['b', 'c']
+    assert select_top_links(links, None, card_predicate=predicate) == []
@@ -0,0 +1,48 @@
+import pandas as pd
+import pytest
+
+from gmaps_scraper import normalize
+from gmaps_scraper.normalize import normalize_fields
+
+places = pd.DataFrame({
+    'Phone': ['(212) 696-5036', '+44 20 7946 0958', '1-800-555-0199 ext. 12', '00 33 1 42 68 53 00', '911', 'N/A', ''],
+    'Address': ['6 E 36th St, New York, NY 10016', '350 5th Ave, New York, NY 10118-0110, United States',
+                'Some Mall Level 2 NY 10001', 'Berlin, Germany', 'N/A', '', '1 Main St, Springfield, IL 62701'],
+    'Website': ['https://www.google.com/url?q=https://example.com/menu%3Fa%3D1&sa=U', 'http://WWW2.Example.org:8080/x',
+                '/url?q=https://shop.example.net/&sa=D', 'https://evil.com/url?q=https://example.com/',
+                'https://user:pw@sub.example.com/', 'N/A', ''],
+})
+
+expected = {
+    'Phone E164': ['+12126965036', '+442079460958', '+18005550199', '+33142685300', 'N/A', 'N/A', 'N/A'],
+    'Street': ['6 E 36th St', '350 5th Ave', 'N/A', 'N/A', 'N/A', 'N/A', '1 Main St'],
+    'City': ['New York', 'New York', 'N/A', 'N/A', 'N/A', 'N/A', 'Springfield'],
+    'State': ['NY', 'NY', 'NY', 'N/A', 'N/A', 'N/A', 'IL'],
+    'ZIP': ['10016', '10118-0110', '10001', 'N/A', 'N/A', 'N/A', '62701'],
+    'Website URL': ['https://example.com/menu?a=1', 'http://WWW2.Example.org:8080/x', 'https://shop.example.net/',
+                    'https://evil.com/url?q=https://example.com/', 'https://user:pw@sub.example.com/', 'N/A', 'N/A'],
+    'Website Domain': ['example.com', 'example.org', 'shop.example.net', 'evil.com', 'sub.example.com', 'N/A', 'N/A'],
+}
+
+
+@pytest.fixture(params=['fast', 'fallback'])
+def string_mode(request, monkeypatch):
+    if request.param == 'fast':
+        if not normalize.has_fast_strings():
+            pytest.skip("numpy.strings with StringDType not available")
+    else:
+        monkeypatch.setattr(normalize, "fast_strings", False)
+    return request.param
+
+
+def test_normalized_columns(string_mode):
+    normalized_df = normalize_fields(places)
+    for column, values in expected.items():
+        assert normalized_df[column].tolist() == values, column
+    assert normalized_df['Phone'].tolist() == places['Phone'].tolist() # Raw columns are kept
+
+
+def test_default_country_code_drops_the_trunk_zero(string_mode):
+    phones = pd.Series(['020 7946 0958', '44 20 7946 0958', '7946 0958'])
+    assert normalize.normalize_phones(phones, default_country_code="44").tolist() == [
+        '+442079460958', '+442079460958', 'N/A']
@@ -0,0 +1,88 @@
+import pytest
+
+from gmaps_scraper.prefetch import TabPrefetcher
+from gmaps_scraper.rate_limit import get_rate_limiter, use_shared_rate_store, maps_place_target
+from gmaps_scraper.watchdog import create_driver_watchdog, watchdog_record_page
+
+
+class FakeSwitchTo:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def window(self, handle):
+        if handle not in self.driver.window_handles or handle in self.driver.crashed:
+            raise Exception(f"no such window: {handle}")
+        self.driver.current_window_handle = handle
+
+
+class FakeDriver:
+    # Tabs are handles 'tab-0', 'tab-1', ...; window.open adds one, close() removes the current one
+    def __init__(self):
+        self.window_handles = ['tab-0']
+        self.current_window_handle = 'tab-0'
+        self.urls = {'tab-0': 'about:blank'}
+        self.crashed = set()
+        self.switch_to = FakeSwitchTo(self)
+
+    def execute_script(self, script, *args):
+        if script.startswith("window.open"):
+            handle = f"tab-{len(self.urls)}"
+            self.window_handles.append(handle)
+            self.urls[handle] = args[0]
+            return None
+        return 0.5 # Navigation Timing duration
+
+    def close(self):
+        self.window_handles.remove(self.current_window_handle)
+        self.current_window_handle = None
+
+
+@pytest.fixture
+def place_limiter():
+    use_shared_rate_store(None) # Fresh limiters
+    yield get_rate_limiter(f"target:{maps_place_target}", initial_rate=1000.0, burst=10.0, initial_concurrency=4)
+    use_shared_rate_store(None)
+
+
+def test_take_switches_to_the_prefetched_tab_and_closes_the_finished_one(place_limiter):
+    driver = FakeDriver()
+    prefetcher = TabPrefetcher(driver, depth=2)
+    prefetcher.fill(['a', 'b', 'c'])
+    assert list(prefetcher.pages) == ['a', 'b'] and place_limiter.in_flight == 2
+    page = prefetcher.take('a')
+    assert driver.current_window_handle == page.handle and driver.urls[page.handle] == 'a'
+    assert 'tab-0' not in driver.window_handles
+    page.finish(driver)
+    assert prefetcher.take('c') is None # Not prefetched: the caller loads it itself
+    prefetcher.close()
+    assert place_limiter.in_flight == 0 and driver.window_handles == [page.handle]
+
+
+def test_crashed_prefetch_tab_leaves_the_current_tab_usable(place_limiter):
+    driver = FakeDriver()
+    prefetcher = TabPrefetcher(driver, depth=1)
+    prefetcher.fill(['a'])
+    driver.crashed.add(prefetcher.pages['a'].handle)
+    assert prefetcher.take('a') is None
+    assert driver.current_window_handle == 'tab-0' and 'tab-0' in driver.window_handles
+    assert place_limiter.in_flight == 0
+
+
+def test_discard_frees_the_slot_and_the_tab(place_limiter):
+    driver = FakeDriver()
+    prefetcher = TabPrefetcher(driver, depth=1)
+    prefetcher.fill(['a'])
+    prefetcher.discard('a')
+    assert place_limiter.in_flight == 0 and driver.window_handles == ['tab-0']
+    assert driver.current_window_handle == 'tab-0'
+    prefetcher.fill(['b'])
+    assert list(prefetcher.pages) == ['b']
+
+
+def test_prefetched_pages_stay_out_of_the_watchdog_latency():
+    watchdog = create_driver_watchdog(baseline_pages=2, latency_window=2, check_every=1000)
+    for _ in range(4):
+        assert watchdog_record_page(watchdog, None, 0.01, prefetched=True) is None
+    for _ in range(2):
+        watchdog_record_page(watchdog, None, 2.0)
+    assert watchdog['baseline_latency'] == 2.0 and watchdog['pages_since_recycle'] == 6
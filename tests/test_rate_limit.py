@@ -0,0 +1,70 @@
+import pytest
+
+from gmaps_scraper.rate_limit import (AdaptiveRateLimiter, rate_limited, get_rate_limiter, use_shared_rate_store,
+                                      configure_rate_limits, maps_place_target, maps_search_target)
+from gmaps_scraper.work_queue import SQLiteTaskBroker, RedisTaskBroker
+
+
+@pytest.fixture(params=['sqlite', 'redis'])
+def make_stores(request, tmp_path):
+    # Two broker objects over the same storage, as two worker processes would open them
+    if request.param == 'sqlite':
+        return lambda: [SQLiteTaskBroker(str(tmp_path / "sweep.db")) for _ in range(2)]
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    server = fakeredis.FakeServer()
+    return lambda: [RedisTaskBroker(client=fakeredis.FakeRedis(server=server, decode_responses=True))
+                    for _ in range(2)]
+
+
+@pytest.fixture(autouse=True)
+def local_limiters():
+    use_shared_rate_store(None)
+    configure_rate_limits(None)
+    yield
+    use_shared_rate_store(None)
+    configure_rate_limits(None)
+
+
+def test_shared_bucket_is_one_budget_for_all_stores(make_stores):
+    first, second = make_stores()
+    assert first.rate_bucket_take("target:maps-place", 0.5, 1.0) == 0
+    assert second.rate_bucket_take("target:maps-place", 0.5, 1.0) > 1.5 # The other process took the token
+    assert first.rate_bucket_take("proxy:a", 0.5, 1.0) == 0 # Buckets are per limiter key
+
+
+def test_shared_rate_adjustments_accumulate(make_stores):
+    first, second = make_stores()
+    first_limiter = AdaptiveRateLimiter("target:maps-place", initial_rate=1.0, store=first)
+    second_limiter = AdaptiveRateLimiter("target:maps-place", initial_rate=1.0, store=second)
+    for limiter in [first_limiter, second_limiter]:
+        limiter.in_flight += 1 # As if acquire() had run; only the release matters here
+        limiter.release(0.0, latency=0.1) # Fast response: +increase_step each
+    assert first_limiter.bucket.rate == pytest.approx(1.1)
+    second_limiter.in_flight += 1
+    second_limiter.release(0.0, blocked=True)
+    assert first_limiter.bucket.rate == pytest.approx(0.55)
+
+
+def test_failed_second_acquire_is_not_a_success():
+    target_limiter = get_rate_limiter("target:maps-place")
+    proxy_limiter = get_rate_limiter("proxy:broken")
+    rate_before = target_limiter.bucket.rate
+
+    def broken_acquire():
+        raise KeyboardInterrupt
+
+    proxy_limiter.acquire = broken_acquire
+    with pytest.raises(KeyboardInterrupt):
+        with rate_limited("maps-place", proxy="broken"):
+            pass
+    assert target_limiter.stats['failed'] == 1
+    assert target_limiter.bucket.rate == rate_before
+    assert target_limiter.in_flight == 0
+
+
+def test_configured_rate_limits_override_the_defaults():
+    configure_rate_limits({maps_place_target: {'initial_rate': 4.0, 'max_rate': 4.0, 'initial_concurrency': 3}})
+    place_limiter = get_rate_limiter(f"target:{maps_place_target}")
+    assert (place_limiter.bucket.rate, place_limiter.max_rate, place_limiter.concurrency) == (4.0, 4.0, 3)
+    assert get_rate_limiter(f"target:{maps_search_target}").bucket.rate == 1.0
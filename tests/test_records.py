@@ -0,0 +1,65 @@
+import json
+
+import pandas as pd
+
+from gmaps_scraper.details import detail_columns
+from gmaps_scraper.records import PlaceRecord, RecordBuffer
+
+result_columns = detail_columns + ['Snapshot']
+
+
+def place(link, latitude='N/A', longitude='N/A', status='Success', **fields):
+    row = {'Google Maps Link': link, 'Name': 'N/A', 'Address': 'N/A', 'Category': 'N/A', 'Phone': 'N/A',
+           'Website': 'N/A', 'Latitude': latitude, 'Longitude': longitude, 'Scrape Status': status}
+    row.update(fields)
+    return row
+
+
+def buffered_and_old(rows, columns=result_columns):
+    # (DataFrame from RecordBuffer, DataFrame the way run_scrape_from_links used to build it)
+    buffer = RecordBuffer(columns)
+    for row in rows:
+        buffer.append(PlaceRecord(row) if 'Name' in row else row)
+    return buffer.to_dataframe(), pd.DataFrame(rows, columns=columns)
+
+
+def test_record_reads_like_a_dict():
+    record = PlaceRecord(place('https://maps/place/a', Name='Cafe A'))
+    record['Category'] = 'Cafe'
+    assert record['Name'] == 'Cafe A' and record.get('Snapshot', 'none') == 'none'
+    assert 'Snapshot' not in record and 'Category' in record
+    assert json.loads(json.dumps(dict(record))) == dict(place('https://maps/place/a', Name='Cafe A', Category='Cafe'))
+
+
+def test_status_and_category_are_interned():
+    first = PlaceRecord({'Category': ''.join(['Piz', 'za']), 'Scrape Status': ''.join(['Succ', 'ess'])})
+    second = PlaceRecord({'Category': ''.join(['Pi', 'zza']), 'Scrape Status': ''.join(['Su', 'ccess'])})
+    assert first['Category'] is second['Category']
+    assert first['Scrape Status'] is second['Scrape Status']
+
+
+def test_dataframe_matches_row_dicts_with_coordinates():
+    rows = [place(f"https://maps/place/{i}", 40.0 + i / 1000, -73.0 - i / 1000, Name=f"Place {i}") for i in range(5)]
+    buffered, old = buffered_and_old(rows, detail_columns)
+    pd.testing.assert_frame_equal(buffered, old)
+    assert buffered['Latitude'].dtype == 'float64'
+
+
+def test_dataframe_matches_row_dicts_with_placeholders_and_missing_values():
+    rows = [place("https://maps/place/a", 40.1, -73.2, Name="A", Snapshot="abc123"),
+            place("https://maps/place/b", Name="B", status="Navigation/Load Failed: timeout"),
+            {'Google Maps Link': 'N/A', 'Scrape Status': 'Skipped (Invalid URL)'},
+            {'Google Maps Link': 'https://maps/place/c', 'Scrape Status': 'Not Attempted (Selector Drift)'}]
+    buffered, old = buffered_and_old(rows)
+    pd.testing.assert_frame_equal(buffered, old)
+    pd.testing.assert_frame_equal(buffered.isna(), old.isna())
+    assert buffered.to_csv(index=False) == old.to_csv(index=False)
+
+
+def test_buffer_counts_successes_and_hands_off_once():
+    buffer = RecordBuffer(detail_columns)
+    buffer.append(PlaceRecord(place("https://maps/place/a")))
+    buffer.append({'Google Maps Link': 'https://maps/place/b', 'Scrape Status': 'Not Attempted (Selector Drift)'})
+    assert (len(buffer), buffer.successes) == (2, 1)
+    assert len(buffer.to_dataframe()) == 2
+    assert len(buffer) == 0
@@ -0,0 +1,67 @@
+import pandas as pd
+
+from gmaps_scraper.details import detail_columns
+from gmaps_scraper.refresh import prepare_refresh_state, select_refresh_urls, merge_refresh_results
+
+recent = pd.Timestamp.now(tz='UTC').isoformat()
+
+
+def place(url, status='Success', **fields):
+    row = {column: 'N/A' for column in detail_columns}
+    row.update({'Google Maps Link': url, 'Name': url.upper(), 'Scrape Status': status}, **fields)
+    return row
+
+
+def refreshed_place(url, fingerprint, **fields):
+    return place(url, **{'Last Scraped': recent, 'Scrape Count': 1, 'Change Count': 0, 'Failure Count': 0,
+                         'Card Fingerprint': fingerprint, **fields})
+
+
+def card(fingerprint):
+    return {'Card Fingerprint': fingerprint}
+
+
+def test_plain_results_csv_gets_counts_from_its_status():
+    state_df = prepare_refresh_state(pd.DataFrame([place('a'), place('b', status='Error: timeout'),
+                                                   place('c', status='Not Attempted (Setup Failed)')]))
+    assert state_df['Scrape Count'].tolist() == [1, 0, 0]
+    assert state_df['Failure Count'].tolist() == [0, 1, 0]
+    assert state_df['Card Fingerprint'].tolist() == ['', '', '']
+
+
+def test_changed_and_new_cards_come_first():
+    previous_df = pd.DataFrame([refreshed_place('a', 'fa'), refreshed_place('b', 'fb')])
+    selected_urls, _ = select_refresh_urls(previous_df, card_data={'a': card('fa'), 'b': card('fb2'), 'c': card('fc')},
+                                           refresh_budget=2)
+    assert selected_urls == ['c', 'b']
+
+
+def test_unknown_fingerprints_are_seeded_not_refetched():
+    previous_df = pd.DataFrame([place('a', **{'Last Scraped': recent}), place('b', **{'Last Scraped': recent})])
+    selected_urls, state_df = select_refresh_urls(previous_df, card_data={'a': card('fa'), 'b': card('fb')})
+    assert selected_urls == []
+    assert state_df['Card Fingerprint'].tolist() == ['fa', 'fb']
+
+
+def test_success_takes_the_new_fields_and_the_card():
+    state_df = prepare_refresh_state(pd.DataFrame([refreshed_place('a', 'old', Phone='1')]))
+    refreshed_df = pd.DataFrame([place('a', Phone='2')])
+    merged = merge_refresh_results(state_df, refreshed_df, card_data={'a': card('new')}).iloc[0]
+    assert merged['Phone'] == '2'
+    assert (merged['Scrape Count'], merged['Change Count'], merged['Card Fingerprint']) == (2, 1, 'new')
+
+
+def test_failure_keeps_fields_and_fingerprint():
+    state_df = prepare_refresh_state(pd.DataFrame([refreshed_place('a', 'old', Phone='1')]))
+    refreshed_df = pd.DataFrame([place('a', status='Error: timeout')])
+    merged = merge_refresh_results(state_df, refreshed_df, card_data={'a': card('new')}).iloc[0]
+    assert (merged['Phone'], merged['Card Fingerprint'], merged['Failure Count']) == ('1', 'old', 1)
+    selected_urls, _ = select_refresh_urls(pd.DataFrame([merged]), card_data={'a': card('new')}, refresh_budget=1)
+    assert selected_urls == ['a'] # Still a card change on the next refresh
+
+
+def test_success_takes_the_coordinates_too():
+    state_df = prepare_refresh_state(pd.DataFrame([refreshed_place('a', 'fa', Latitude='40.1')]))
+    refreshed_df = pd.DataFrame([place('a', Latitude=40.2, Longitude=float('nan'))])
+    merged = merge_refresh_results(state_df, refreshed_df).iloc[0]
+    assert (merged['Latitude'], merged['Longitude'], merged['Change Count']) == (40.2, 'N/A', 0)
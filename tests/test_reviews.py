@@ -0,0 +1,109 @@
+import csv
+from datetime import datetime
+
+import pytest
+
+from gmaps_scraper import reviews
+from gmaps_scraper.reviews import iter_place_reviews, estimate_review_date, rating_from_label
+from gmaps_scraper.rate_limit import get_rate_limiter, use_shared_rate_store, maps_place_target, maps_reviews_target
+
+
+class FakeElement:
+    def click(self):
+        pass
+
+    def find_elements(self, by, selector):
+        return [self] # New cards show up right after each scroll
+
+
+class FakeRegistry:
+    def __init__(self, sortable=False):
+        self.missing = set() if sortable else {'reviews_sort_button'}
+
+    def find(self, context, field, timeout=None):
+        return None if field in self.missing else FakeElement()
+
+    def selectors(self, field):
+        return [field]
+
+    def reset(self):
+        pass
+
+
+class FakeDriver:
+    # batches: what each batch-script call returns, as (rows, cards still in the pane); [] once exhausted
+    def __init__(self, *batches):
+        self.batches = list(batches)
+        self.batch_calls = 0
+        self.scrolls = 0
+        self.current_url = "https://www.google.com/maps/place/x"
+        self.title = "x - Google Maps"
+
+    def get(self, url):
+        self.current_url = url
+
+    def execute_script(self, script, *args):
+        if script == reviews.review_batch_script:
+            self.batch_calls += 1
+            return self.batches.pop(0) if self.batches else ([], 0)
+        self.scrolls += 1
+
+
+def review(review_id, date="a week ago"):
+    return [review_id, f"Author {review_id}", "5 stars", date, f"Text {review_id}"]
+
+
+@pytest.fixture(autouse=True)
+def fast_limiters(monkeypatch):
+    monkeypatch.setattr(reviews.time, "sleep", lambda seconds: None)
+    use_shared_rate_store(None) # Fresh limiters
+    for target in [maps_place_target, maps_reviews_target]:
+        get_rate_limiter(f"target:{target}", initial_rate=1000.0, burst=10.0)
+    yield
+    use_shared_rate_store(None)
+
+
+def read_ids(driver, **kwargs):
+    return [row['Review ID'] for row in iter_place_reviews(driver, "https://maps/a", registry=FakeRegistry(), **kwargs)]
+
+
+def test_rerendered_cards_are_read_once_and_the_scroll_stops_when_nothing_is_new():
+    driver = FakeDriver(([review('r1'), review('r2')], 1), ([review('r2'), review('r3')], 0))
+    assert read_ids(driver) == ['r1', 'r2', 'r3']
+    assert driver.scrolls == 3 and driver.batch_calls == 5 # Cards still in the pane are read before scrolling
+
+
+def test_max_reviews_stops_mid_batch():
+    driver = FakeDriver(([review('r1'), review('r2'), review('r3')], 0))
+    assert read_ids(driver, max_reviews=2) == ['r1', 'r2']
+    assert driver.scrolls == 0
+
+
+def test_since_skips_old_reviews_and_stops_on_a_stale_streak():
+    old = [review(f"old{i}", date="2 years ago") for i in range(5)]
+    driver = FakeDriver(([review('new'), *old], 0), ([review('never')], 0))
+    rows = list(iter_place_reviews(driver, "https://maps/a", since=datetime(2026, 1, 1).date(),
+                                   registry=FakeRegistry(sortable=True), stale_streak=5))
+    assert [row['Review ID'] for row in rows] == ['new'] and driver.batch_calls == 1
+
+
+def test_dates_and_ratings():
+    now = datetime(2026, 3, 31)
+    assert estimate_review_date("3 months ago", now) == "2025-12-31"
+    assert estimate_review_date("Edited a year ago", now) == "2025-03-31"
+    assert estimate_review_date("", now) == 'N/A'
+    assert (rating_from_label("4 stars"), rating_from_label("4,5/5"), rating_from_label(None)) == ('4', '4.5', 'N/A')
+
+
+def test_harvest_streams_every_batch_to_the_csv(monkeypatch, tmp_path):
+    driver = FakeDriver(*[([review(f"r{i}")], 0) for i in range(5)])
+    monkeypatch.setattr(reviews, "setup_driver", lambda: (driver, None))
+    monkeypatch.setattr(reviews, "close_driver", lambda *args, **kwargs: None)
+    monkeypatch.setattr(reviews, "get_selector_registry", lambda: FakeRegistry())
+    csv_filename = str(tmp_path / "reviews.csv")
+    assert reviews.run_review_harvest(["https://maps/a", "N/A"], csv_filename=csv_filename, batch_size=2,
+                                      use_watchdog=False) == 5
+    with open(csv_filename, newline='', encoding='utf-8') as reviews_file:
+        rows = list(csv.DictReader(reviews_file))
+    assert [row['Review ID'] for row in rows] == ['r0', 'r1', 'r2', 'r3', 'r4']
+    assert rows[0]['Rating'] == '5' and rows[0]['Google Maps Link'] == "https://maps/a"
@@ -0,0 +1,69 @@
+import pytest
+
+from gmaps_scraper.selector_registry import SelectorRegistry, SelectorDriftError, required_field_misses
+
+
+class FakePage:
+    # A loaded page (driver or element) on which only the selectors in `present` match
+    def __init__(self, present=(), current_url="https://www.google.com/maps/place/x", title="x - Google Maps"):
+        self.present = set(present)
+        self.current_url = current_url
+        self.title = title
+        self.lookups = []
+
+    def find_elements(self, by, selector):
+        self.lookups.append(selector)
+        return [f"<{selector}>"] if selector in self.present else []
+
+
+def make_registry(required=True, **spec):
+    return SelectorRegistry(fields={'name': {'selectors': ["h1.new", "h1.old"], 'required': required, **spec}})
+
+
+def test_circuit_opens_after_the_miss_streak_and_skips_the_wait():
+    registry = make_registry(required=False, max_consecutive_misses=2)
+    for _ in range(2):
+        assert registry.find(FakePage(), 'name') is None
+    assert registry.selector_states('name') == [("h1.new", True), ("h1.old", True)]
+
+
+def test_superseded_selector_opens_at_the_required_threshold():
+    registry = make_registry(required=False, max_consecutive_misses=100)
+    for _ in range(required_field_misses):
+        assert registry.find(FakePage(present=["h1.old"]), 'name') == "<h1.old>"
+    assert registry.selector_states('name') == [("h1.new", True), ("h1.old", False)]
+
+
+def test_dead_required_field_raises_drift_error_after_half_open_probe():
+    registry = make_registry(max_consecutive_misses=2)
+    registry.find(FakePage(), 'name')
+    with pytest.raises(SelectorDriftError):
+        registry.find(FakePage(), 'name')
+    # Half-open: the first selector is probed with the full wait and closes again when it matches
+    assert registry.find(FakePage(present=["h1.new"]), 'name', timeout=0.1) == "<h1.new>"
+    assert registry.selector_states('name') == [("h1.new", False), ("h1.old", True)]
+    assert not registry.field_is_dead('name')
+
+
+def test_block_and_error_pages_are_not_misses():
+    registry = make_registry(max_consecutive_misses=1)
+    registry.find(FakePage(current_url="https://www.google.com/sorry/index"), 'name')
+    registry.find(FakePage(current_url="chrome-error://chromewebdata/"), 'name')
+    registry.find(FakePage(title="Our systems have detected unusual traffic"), 'name')
+    assert [row['misses'] for row in registry.health_report()] == [0, 0]
+
+
+def test_polled_fields_only_record_hits():
+    registry = make_registry(required=False, max_consecutive_misses=1, polled=True)
+    for _ in range(5):
+        registry.find(FakePage(), 'name')
+    assert not registry.field_is_dead('name')
+    registry.find(FakePage(present=["h1.new"]), 'name')
+    assert [(row['hits'], row['misses']) for row in registry.health_report()] == [(1, 0), (0, 0)]
+
+
+def test_reset_closes_every_circuit():
+    registry = make_registry(required=False, max_consecutive_misses=1)
+    registry.find(FakePage(), 'name')
+    registry.reset()
+    assert registry.selector_states('name') == [("h1.new", False), ("h1.old", False)]
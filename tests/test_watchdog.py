@@ -0,0 +1,53 @@
+import os
+
+from gmaps_scraper import watchdog as watchdog_module
+from gmaps_scraper.watchdog import create_driver_watchdog, watchdog_record_page, is_dead_driver_error
+
+
+def record(watchdog, *page_seconds):
+    return [watchdog_record_page(watchdog, None, seconds) for seconds in page_seconds]
+
+
+def test_baseline_is_the_median_of_the_first_pages():
+    watchdog = create_driver_watchdog(baseline_pages=3, check_every=1000)
+    assert record(watchdog, 1.0, 5.0, 2.0) == [None, None, None]
+    assert watchdog['baseline_latency'] == 2.0 and not watchdog['latencies']
+
+
+def test_latency_blowup_recycles_only_once_the_window_is_full():
+    watchdog = create_driver_watchdog(baseline_pages=2, latency_window=3, latency_factor=3.0, check_every=1000)
+    record(watchdog, 1.0, 1.0)
+    assert record(watchdog, 2.5, 10.0) == [None, None]
+    reason = watchdog_record_page(watchdog, None, 10.0)
+    assert reason is not None and "latency" in reason
+
+
+def test_one_slow_page_does_not_move_the_median():
+    watchdog = create_driver_watchdog(baseline_pages=2, latency_window=3, check_every=1000)
+    record(watchdog, 1.0, 1.0)
+    assert record(watchdog, 1.0, 30.0, 1.0, 1.0) == [None, None, None, None]
+
+
+def test_rss_is_sampled_every_check_every_pages(monkeypatch):
+    samples = []
+
+    def fake_rss(driver):
+        samples.append(driver)
+        return 3000.0
+    monkeypatch.setattr(watchdog_module, "get_driver_rss_mb", fake_rss)
+    watchdog = create_driver_watchdog(max_rss_mb=2500, baseline_pages=100, check_every=3)
+    assert record(watchdog, 1.0, 1.0) == [None, None]
+    reason = watchdog_record_page(watchdog, 'driver', 1.0)
+    assert samples == ['driver'] and "RSS 3000MB" in reason
+
+
+def test_page_cap():
+    watchdog = create_driver_watchdog(baseline_pages=100, check_every=1000, max_pages_per_driver=2)
+    assert record(watchdog, 1.0, 1.0)[1] == "reached 2 pages on this driver"
+
+
+def test_process_tree_rss_and_dead_driver_errors():
+    assert watchdog_module.get_process_tree_rss_mb(os.getpid()) > 0
+    assert watchdog_module.get_driver_rss_mb(object()) == 0.0
+    assert is_dead_driver_error("Message: invalid session id")
+    assert not is_dead_driver_error("Timed out waiting for h1")
@@ -0,0 +1,114 @@
+import time
+
+import pytest
+
+from gmaps_scraper.work_queue import SQLiteTaskBroker, RedisTaskBroker, LeaseHeartbeat, details_queue, links_queue
+
+lease_seconds = 0.2
+
+
+@pytest.fixture(params=['sqlite', 'redis'])
+def make_broker(request, tmp_path):
+    def make(max_attempts=3):
+        if request.param == 'sqlite':
+            return SQLiteTaskBroker(str(tmp_path / "sweep.db"), lease_seconds=lease_seconds,
+                                    max_attempts=max_attempts)
+        fakeredis = pytest.importorskip("fakeredis")
+        pytest.importorskip("lupa") # The Redis broker's Lua scripts
+        return RedisTaskBroker(client=fakeredis.FakeRedis(decode_responses=True), lease_seconds=lease_seconds,
+                               max_attempts=max_attempts)
+    return make
+
+
+def wait_for_lease_expiry():
+    time.sleep(lease_seconds * 1.5)
+
+
+def test_enqueue_ignores_duplicate_tasks(make_broker):
+    broker = make_broker()
+    assert broker.enqueue(details_queue, [{'url': 'a'}, {'url': 'b'}]) == 2
+    assert broker.enqueue(details_queue, [{'url': 'a'}, {'url': 'c'}]) == 1
+    assert broker.stats(details_queue)['pending'] == 3
+
+
+def test_lease_and_ack(make_broker):
+    broker = make_broker()
+    broker.enqueue(links_queue, [{'query': 'cafes in 10016'}])
+    tasks = broker.lease(links_queue, 'worker-1')
+    assert [(task['payload'], task['attempt']) for task in tasks] == [({'query': 'cafes in 10016'}, 1)]
+    assert broker.lease(links_queue, 'worker-2') == [] # Leased tasks are not handed out twice
+    assert broker.ack(tasks[0]['id'], 'worker-1', {'links': ['x']})
+    assert broker.stats(links_queue) == {'pending': 0, 'leased': 0, 'done': 1, 'failed': 0}
+    assert list(broker.results(links_queue)) == [{'links': ['x']}]
+
+
+def test_expired_lease_is_reclaimed_and_late_ack_rejected(make_broker):
+    broker = make_broker()
+    broker.enqueue(details_queue, [{'url': 'a'}])
+    first = broker.lease(details_queue, 'worker-1')[0]
+    wait_for_lease_expiry()
+    second = broker.lease(details_queue, 'worker-2')[0]
+    assert second['id'] == first['id'] and second['attempt'] == 2
+    assert broker.heartbeat([first['id']], 'worker-1') == [first['id']]
+    assert not broker.ack(first['id'], 'worker-1', {'late': True})
+    assert broker.ack(second['id'], 'worker-2', {'late': False})
+    assert list(broker.results(details_queue)) == [{'late': False}]
+
+
+def test_heartbeat_keeps_the_lease(make_broker):
+    broker = make_broker()
+    broker.enqueue(details_queue, [{'url': 'a'}])
+    task = broker.lease(details_queue, 'worker-1')[0]
+    for _ in range(3):
+        time.sleep(lease_seconds / 2)
+        assert broker.heartbeat([task['id']], 'worker-1') == []
+    assert broker.lease(details_queue, 'worker-2') == []
+    assert broker.ack(task['id'], 'worker-1', {})
+
+
+def test_heartbeat_after_ack_does_not_requeue(make_broker):
+    broker = make_broker()
+    broker.enqueue(details_queue, [{'url': 'a'}])
+    task = broker.lease(details_queue, 'worker-1')[0]
+    assert broker.ack(task['id'], 'worker-1', {})
+    assert broker.heartbeat([task['id']], 'worker-1') == [task['id']]
+    wait_for_lease_expiry()
+    assert broker.lease(details_queue, 'worker-2') == []
+    assert broker.stats(details_queue) == {'pending': 0, 'leased': 0, 'done': 1, 'failed': 0}
+
+
+def test_nack_fails_after_max_attempts(make_broker):
+    broker = make_broker(max_attempts=2)
+    broker.enqueue(details_queue, [{'url': 'a'}])
+    for attempt in [1, 2]:
+        task = broker.lease(details_queue, 'worker-1')[0]
+        assert task['attempt'] == attempt
+        assert broker.nack(task['id'], 'worker-1', "page failed")
+    assert broker.lease(details_queue, 'worker-1') == []
+    assert broker.stats(details_queue)['failed'] == 1
+
+
+def test_expired_leases_fail_after_max_attempts(make_broker):
+    broker = make_broker(max_attempts=2)
+    broker.enqueue(details_queue, [{'url': 'a'}])
+    for _ in range(2):
+        assert broker.lease(details_queue, 'worker-1')
+        wait_for_lease_expiry()
+    assert broker.lease(details_queue, 'worker-2') == []
+    assert broker.stats(details_queue) == {'pending': 0, 'leased': 0, 'done': 0, 'failed': 1}
+
+
+def test_lease_heartbeat_reports_lost_leases(make_broker):
+    broker = make_broker()
+    broker.enqueue(details_queue, [{'url': 'a'}])
+    task = broker.lease(details_queue, 'worker-1')[0]
+    # Heartbeats too rare to keep the lease: it expires and worker-2 takes the task over
+    with LeaseHeartbeat(broker, 'worker-1', interval_seconds=lease_seconds * 2) as heartbeat:
+        heartbeat.track([task['id']])
+        wait_for_lease_expiry()
+        assert broker.lease(details_queue, 'worker-2')[0]['id'] == task['id']
+        assert not heartbeat.lost(task['id'])
+        time.sleep(lease_seconds * 1.5)
+        assert heartbeat.lost(task['id']) # Drop it, do not finish it
+        heartbeat.untrack(task['id'])
+        assert not heartbeat.lost(task['id'])